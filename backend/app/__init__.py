@@ -1,18 +1,27 @@
+from datetime import date
+import click
 from flask import Flask
 from app.extensions import db, jwt, migrate, socketio
-from app.models import User
+from app.engines import configure_engines
 from flask_cors import CORS
 from app.config import Config
+from app.serialization import init_json
+from app.instrumentation import init_instrumentation
 
 
 def create_app(config_object=Config) -> Flask:
     flask_app = Flask(__name__)
     flask_app.config.from_object(config_object)
+    init_json(flask_app)
+    init_instrumentation(flask_app)
 
     jwt.init_app(flask_app)
+    configure_engines(flask_app)
     db.init_app(flask_app)
     migrate.init_app(flask_app, db)
-    socketio.init_app(flask_app)
+    socketio.init_app(
+        flask_app, message_queue=flask_app.config.get("SOCKETIO_MESSAGE_QUEUE")
+    )
 
     # Initialize CORS and allow all origins for development
     CORS(flask_app)
@@ -29,28 +38,33 @@ def create_app(config_object=Config) -> Flask:
 
     flask_app.register_blueprint(portfolio_bp_single)
 
+    from app.services.identity_cache import init_identity_cache, load_user
+
+    init_identity_cache(flask_app)
+
+    from app.services.data_versions import init_data_versions
+
+    init_data_versions(flask_app)
+
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity: str = jwt_data["sub"]
-        return db.session.scalar(db.select(User).filter_by(user_id=identity))
+        return load_user(identity)
 
-    # Register a CLI command to initialize the database and start tasks
-    from app.tasks.data_fetch import start_websocket
-    import threading
-
-    with flask_app.app_context():
-        from app.tasks.data_fetch import fetch_and_update_stock_data, start_websocket
+    # Live ingestion normally runs in its own process (`flask run-ingest`) so
+    # web workers start without network I/O; single-process dev setups can
+    # opt back in to the in-process stream.
+    if flask_app.config.get("RUN_INGESTION_IN_PROCESS"):
+        from app.tasks.data_fetch import run_ingestion
         import threading
 
-        db.create_all()
-        fetch_and_update_stock_data()
-        websocket_thread = threading.Thread(target=start_websocket, args=(flask_app,))
-        websocket_thread.daemon = True
-        websocket_thread.start()
+        ingestion_thread = threading.Thread(target=run_ingestion, args=(flask_app,))
+        ingestion_thread.daemon = True
+        ingestion_thread.start()
 
     @flask_app.cli.command("init-app")
     def init_app_command():
-        """Initializes the database and starts background tasks."""
+        """Initializes the database and loads historical stock data."""
         from app.tasks.data_fetch import fetch_and_update_stock_data
 
         print("Creating database tables...")
@@ -59,4 +73,88 @@ def create_app(config_object=Config) -> Flask:
         fetch_and_update_stock_data()
         print("Initialization complete.")
 
+    @flask_app.cli.command("run-ingest")
+    def run_ingest_command():
+        """Runs the ingestion process: backfills history, then streams live ticks."""
+        from app.tasks.data_fetch import run_ingestion
+
+        print("Starting market data ingestion...")
+        run_ingestion(flask_app)
+
+    @flask_app.cli.command("generate-ticks")
+    @click.argument("path")
+    @click.option("--ticks", default=100_000, show_default=True)
+    @click.option("--days", default=1, show_default=True)
+    @click.option("--interval-ms", default=100, show_default=True)
+    @click.option("--seed", default=0, show_default=True)
+    def generate_ticks_command(path, ticks, days, interval_ms, seed):
+        """Writes synthetic ticks for the top 50 stocks for the replay provider."""
+        from app.tasks.market_data import write_synthetic_ticks
+        from app.tasks.universe import TOP_50_STOCKS
+
+        written = write_synthetic_ticks(
+            path, TOP_50_STOCKS, ticks, seed=seed, interval_ms=interval_ms, days=days
+        )
+        print(f"Wrote {written} ticks to {path}")
+
+    @flask_app.cli.command("prune-intraday")
+    def prune_intraday_command():
+        """Rolls aged intraday bars into coarser ones and drops the oldest."""
+        from app.tasks.intraday_retention import (
+            apply_intraday_retention,
+            retention_days_from_config,
+        )
+
+        result = apply_intraday_retention(retention_days_from_config(flask_app.config))
+        for minutes, count in result.deleted.items():
+            print(
+                f"{minutes}m: {count} bars removed, "
+                f"{result.rolled_up.get(minutes, 0)} coarser bars written"
+            )
+
+    @flask_app.cli.command("snapshot-portfolios")
+    @click.option("--through", help="Last day to snapshot (YYYY-MM-DD).")
+    def snapshot_portfolios_command(through):
+        """Writes daily portfolio value snapshots for new days and new trades."""
+        from app.tasks.snapshots import snapshot_portfolios
+
+        result = snapshot_portfolios(
+            date.fromisoformat(through) if through else None
+        )
+        print(
+            f"Snapshots: {result.portfolios_processed} portfolios updated, "
+            f"{result.portfolios_skipped} up to date, "
+            f"{result.rows_written} rows written"
+        )
+
+    @flask_app.cli.command("rebuild-tax-lots")
+    @click.option(
+        "--method",
+        type=click.Choice(["FIFO", "LIFO", "AVERAGE"], case_sensitive=False),
+        help="Lot matching method (defaults to TAX_LOT_METHOD).",
+    )
+    def rebuild_tax_lots_command(method):
+        """
+        Recomputes tax lots and realized gains from the transaction ledger.
+
+        Trades on every portfolio wait until the rebuild commits, so run it
+        outside market hours.
+        """
+        from app.services.tax_lots import LotMethod, lot_method_from_config
+        from app.tasks.tax_lots import rebuild_tax_lots
+
+        lot_method = (
+            LotMethod[method.upper()]
+            if method
+            else lot_method_from_config(flask_app.config)
+        )
+        result = rebuild_tax_lots(lot_method)
+        print(
+            f"Tax lots ({lot_method.value}): {result.transactions} transactions "
+            f"replayed, {result.open_lots} open lots, "
+            f"{result.realized_rows} realized rows"
+        )
+        if result.unmatched_sells:
+            print(f"Warning: {result.unmatched_sells} sells exceeded open lots")
+
     return flask_app
@@ -1,8 +1,15 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify, request
 from app.extensions import socketio
+from flask_socketio import emit, join_room, leave_room
 from http import HTTPStatus
 from . import services as stock_services
+from app.services.data_versions import data_versions
+from app.instrumentation import query_budget
+from app.tasks.broadcaster import ALL_SYMBOLS_ROOM
+from app.tasks.universe import TOP_50_STOCKS
 from typing import Tuple
+from datetime import date
+import hashlib
 
 from flask import Response
 from flask_jwt_extended import jwt_required
@@ -10,20 +17,51 @@ from flask_jwt_extended.exceptions import NoAuthorizationError
 
 stocks_bp = Blueprint("stocks", __name__, url_prefix="/stocks")
 
+# Rooms a client may join: the streamed symbols and the all-symbols room.
+# Anything else (another connection's sid room, junk names) is refused.
+SUBSCRIBABLE_ROOMS = frozenset(TOP_50_STOCKS) | {ALL_SYMBOLS_ROOM}
+MAX_SUBSCRIBE_TICKERS = len(SUBSCRIBABLE_ROOMS)
+
+
+def _etag(*parts) -> str:
+    """Strong validator for a representation built from `parts`."""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def _cacheable(response: Response, etag: str, max_age: int) -> Response:
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def _not_modified(etag: str, max_age: int) -> Response:
+    return _cacheable(
+        current_app.response_class(status=HTTPStatus.NOT_MODIFIED), etag, max_age
+    )
+
 
 @stocks_bp.route("", methods=["GET"])
+@query_budget(4)
 @jwt_required()
 def get_all_stocks_route():
     """
     Get all stocks and their latest OHLC data.
+
+    Quotes come from this worker's quote book, so the ETag is a digest of
+    the body actually served: `If-None-Match` gets a 304 only while the
+    prices this worker would send are unchanged.
     """
-    stocks_data = stock_services.get_all_stocks_with_latest_ohlc()
+    max_age = current_app.config.get("MARKET_DATA_MAX_AGE_SECONDS")
+    stocks_data = stock_services.get_all_stocks_with_latest_quotes(
+        current_app.config.get("QUOTE_MAX_AGE_SECONDS")
+    )
 
     if not stocks_data:
         return jsonify({"message": "No stocks found"}), 404
 
     results = []
-    for stock, latest_ohlc in stocks_data:
+    for stock, latest_quote in stocks_data:
         stock_details = {
             "stock_id": stock.stock_id,
             "symbol": stock.symbol,
@@ -31,38 +69,176 @@ def get_all_stocks_route():
             "sector": stock.sector,
         }
 
-        if latest_ohlc:
-            stock_details["latest_ohlc"] = {
-                "date": latest_ohlc.date.isoformat(),
-                "open": latest_ohlc.open,
-                "high": latest_ohlc.high,
-                "low": latest_ohlc.low,
-                "close": latest_ohlc.close,
-                "volume": latest_ohlc.volume,
-            }
+        if latest_quote:
+            stock_details["latest_ohlc"] = latest_quote.to_ohlc_dict()
         else:
             stock_details["latest_ohlc"] = None
         results.append(stock_details)
 
-    return jsonify(results)
+    response = jsonify(results)
+    etag = _etag("stocks", response.get_data())
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag, max_age)
+    return _cacheable(response, etag, max_age)
+
+
+def _parse_history_args(args):
+    """Validates the query string of the history endpoint."""
+    try:
+        start = date.fromisoformat(args["from"]) if args.get("from") else None
+        end = date.fromisoformat(args["to"]) if args.get("to") else None
+    except ValueError:
+        raise ValueError("'from' and 'to' must be ISO dates (YYYY-MM-DD).")
+
+    limit = args.get("limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+            if limit <= 0:
+                raise ValueError
+        except ValueError:
+            raise ValueError("'limit' must be a positive integer.")
+
+    resolution = args.get("resolution", "daily").lower()
+    if resolution not in stock_services.RESOLUTIONS:
+        raise ValueError(
+            f"'resolution' must be one of: {', '.join(stock_services.RESOLUTIONS)}."
+        )
+
+    return start, end, limit, resolution
 
 
 @stocks_bp.route("/<string:stock_id>/history", methods=["GET"])
+@query_budget(3)
 @jwt_required()
 def get_stock_history(stock_id):
     """
     Get historical data for a stock.
+
+    Query parameters: `from`/`to` (ISO dates), `limit` (newest N bars),
+    `resolution` (1m, 5m, 15m, daily, weekly or monthly) and `format=columnar`
+    to receive parallel arrays instead of a list of bars. Intraday bars are
+    dated with UTC timestamps. Responses carry an ETag tied
+    to the stock's data version; ranges ending before today may be cached
+    for longer.
     """
-    history = stock_services.get_historical_data(stock_id)
-    if not history:
+    try:
+        start, end, limit, resolution = _parse_history_args(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    columnar = request.args.get("format") == "columnar"
+    version = data_versions.get(int(stock_id)) if stock_id.isdigit() else None
+    etag = None
+    if version is not None:
+        etag = _etag(
+            "history", int(stock_id), version, start, end, limit, resolution, columnar
+        )
+    if end is not None and end < date.today():
+        max_age = current_app.config.get("HISTORY_MAX_AGE_SECONDS")
+    else:
+        max_age = current_app.config.get("MARKET_DATA_MAX_AGE_SECONDS")
+    if etag is not None and request.if_none_match.contains(etag):
+        return _not_modified(etag, max_age)
+
+    columns = stock_services.get_history_columns(
+        stock_id, start=start, end=end, limit=limit, resolution=resolution
+    )
+    if not columns["dates"]:
         return jsonify({"message": "No historical data found for this ticker."}), 404
-    return jsonify([ts.to_dict() for ts in history])
+
+    if columnar:
+        response = jsonify({"resolution": resolution, **columns})
+    else:
+        keys = ("date", "open", "high", "low", "close", "volume")
+        response = jsonify(
+            [
+                dict(zip(keys, bar))
+                for bar in zip(
+                    *(columns[name] for name in stock_services.HISTORY_COLUMNS)
+                )
+            ]
+        )
+    if etag is None:
+        return response
+    return _cacheable(response, etag, max_age)
+
+
+def _parse_screener_args(args, fields):
+    """Validates the query string of the screener endpoint."""
+    bounds = {}
+    for key, value in args.items():
+        bound, _, field = key.partition("_")
+        if bound not in ("min", "max") or not field:
+            continue
+        if field not in fields:
+            raise ValueError(f"Unknown screener field '{field}'.")
+        try:
+            bounds.setdefault(field, {})[bound] = float(value)
+        except ValueError:
+            raise ValueError(f"'{key}' must be a number.")
+    ranges = [
+        (field, limits.get("min"), limits.get("max"))
+        for field, limits in bounds.items()
+    ]
+
+    sort = args.get("sort")
+    descending = bool(sort) and sort.startswith("-")
+    if sort:
+        sort = sort.lstrip("-")
+        if sort not in fields:
+            raise ValueError(f"'sort' must be one of: {', '.join(fields)}.")
+
+    limit = args.get("limit", 50)
+    try:
+        limit = int(limit)
+        if limit <= 0:
+            raise ValueError
+    except ValueError:
+        raise ValueError("'limit' must be a positive integer.")
+
+    return ranges, args.get("sector") or None, sort or None, descending, limit
+
+
+@stocks_bp.route("/screener", methods=["GET"])
+@query_budget(4)
+@jwt_required()
+def screen_stocks():
+    """
+    Filter and sort the whole universe on precomputed indicators.
+
+    Query parameters: `min_<field>`/`max_<field>` inclusive bounds on any
+    indicator (e.g. `max_rsi_14=30`), `sector`, `sort` (a field, `-` prefix
+    for descending) and `limit` (default 50). Indicators are updated when
+    new bars land, not per request.
+    """
+    # Imported here so web workers only load NumPy when the screener is used
+    from app.services.screener import FIELDS, screener
+
+    try:
+        ranges, sector, sort, descending, limit = _parse_screener_args(
+            request.args, FIELDS
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    etag = _etag("screener", data_versions.universe_tag(), sorted(request.args.items()))
+    max_age = current_app.config.get("MARKET_DATA_MAX_AGE_SECONDS")
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag, max_age)
+
+    table = screener.table()
+    count, positions = table.screen(ranges, sector, sort, descending, limit)
+    response = jsonify(
+        {"fields": FIELDS, "count": count, "results": table.rows(positions)}
+    )
+    return _cacheable(response, etag, max_age)
 
 
 @socketio.on("connect", namespace="/stocks")
 def handle_connect():
     print("Client connected to stocks")
-    socketio.emit("status", {"msg": "Connected to stocks feed"}, namespace="/stocks")
+    emit("status", {"msg": "Connected to stocks feed"})
 
 
 @socketio.on("disconnect", namespace="/stocks")
@@ -70,11 +246,50 @@ def handle_disconnect():
     print("Client disconnected from stocks")
 
 
+def _requested_tickers(data):
+    """
+    Accepts either {"ticker": "X"} or {"tickers": ["X", "Y"]}. Returns the
+    known rooms asked for and the rest, or None if the list is too long.
+    """
+    if not isinstance(data, dict):
+        return [], []
+    tickers = data.get("tickers") or []
+    if not isinstance(tickers, list):
+        return [], []
+    if data.get("ticker"):
+        tickers = [*tickers, data["ticker"]]
+    if len(tickers) > MAX_SUBSCRIBE_TICKERS:
+        return None
+    tickers = list(dict.fromkeys(t for t in tickers if isinstance(t, str) and t))
+    known = [t for t in tickers if t in SUBSCRIBABLE_ROOMS]
+    unknown = [t[:32] for t in tickers if t not in SUBSCRIBABLE_ROOMS]
+    return known, unknown
+
+
+def _change_rooms(data, change, event: str) -> None:
+    requested = _requested_tickers(data)
+    if requested is None:
+        emit(
+            "error",
+            {"msg": f"At most {MAX_SUBSCRIBE_TICKERS} tickers per request."},
+        )
+        return
+    tickers, unknown = requested
+    for ticker in tickers:
+        change(ticker)
+    if tickers or unknown:
+        emit(event, {"tickers": tickers, "unknown": unknown})
+
+
 @socketio.on("subscribe", namespace="/stocks")
 def handle_subscribe(data):
-    ticker = data.get("ticker")
-    if ticker:
-        socketio.emit("subscribed", {"ticker": ticker}, namespace="/stocks")
+    """Joins the per-symbol rooms that receive `price_batch` frames ("*" for all)."""
+    _change_rooms(data, join_room, "subscribed")
+
+
+@socketio.on("unsubscribe", namespace="/stocks")
+def handle_unsubscribe(data):
+    _change_rooms(data, leave_room, "unsubscribed")
 
 
 @stocks_bp.errorhandler(NoAuthorizationError)
@@ -1,36 +1,220 @@
+from datetime import datetime, time, timedelta, timezone
+
 from app.extensions import db
-from app.models import TimeSeries, Stock
-from sqlalchemy import desc
+from app.models import (
+    INTRADAY_INTERVALS,
+    IntradayBar,
+    TimeSeries,
+    Stock,
+    floor_to_interval,
+)
+from app.services.quote_book import quote_book, quote_from_row
+from sqlalchemy import and_, func
+from sqlalchemy.orm import aliased
+
+
+INTRADAY_RESOLUTIONS = {"1m": 1, "5m": 5, "15m": 15}
+
+RESOLUTIONS = (*INTRADAY_RESOLUTIONS, "daily", "weekly", "monthly")
+
+HISTORY_COLUMNS = ("dates", "opens", "highs", "lows", "closes", "volumes")
+
+PRICE_COLUMNS = ("opens", "highs", "lows", "closes")
+
+# Most daily bars one weekly/monthly bucket can hold (one bar per day)
+MAX_DAYS_PER_BUCKET = {"daily": 1, "weekly": 7, "monthly": 31}
+
+
+def _bucket_start(day, resolution):
+    minutes = INTRADAY_RESOLUTIONS.get(resolution)
+    if minutes is not None:
+        return floor_to_interval(day, minutes)
+    if resolution == "weekly":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _downsample(rows, resolution):
+    """
+    Aggregates newest-first rows into coarser OHLC bars: daily rows into
+    weekly or monthly bars, intraday rows into wider intraday bars.
+
+    Each bucket is dated by its period start (Monday / first of the month /
+    interval boundary). Runs in a single pass and returns the bars
+    newest-first.
+    """
+    bars = []
+    for day, open_, high, low, close, volume in reversed(rows):
+        key = _bucket_start(day, resolution)
+        if bars and bars[-1][0] == key:
+            bar = bars[-1]
+            bar[2] = max(bar[2], high)
+            bar[3] = min(bar[3], low)
+            bar[4] = close
+            bar[5] += volume
+        else:
+            bars.append([key, open_, high, low, close, volume])
+    bars.reverse()
+    return bars
 
 
-def get_historical_data(stock_id):
+def get_history_columns(
+    stock_id, start=None, end=None, limit=None, resolution="daily"
+):
     """
-    Get historical data for a given stock ticker.
+    Get OHLCV history for a stock as parallel, newest-first column lists.
+
+    Reads plain column tuples (no ORM objects), optionally bounded by
+    `start`/`end` dates, downsampled to `resolution` and truncated to the
+    newest `limit` bars. Intraday resolutions are served from
+    `intraday_bars` by `get_intraday_columns`.
+
+    With `limit`, at most `limit + 1` buckets' worth of daily rows is read,
+    so the cost does not grow with years of history. Only the oldest bucket
+    read can be cut short, and it falls outside the newest `limit`.
     """
-    return (
-        db.session.query(TimeSeries)
-        .filter_by(stock_id=stock_id)
-        .order_by(TimeSeries.date.desc())
-        .all()
+    if resolution in INTRADAY_RESOLUTIONS:
+        return get_intraday_columns(
+            stock_id, resolution, start=start, end=end, limit=limit
+        )
+
+    query = db.select(
+        TimeSeries.date,
+        TimeSeries.open,
+        TimeSeries.high,
+        TimeSeries.low,
+        TimeSeries.close,
+        TimeSeries.volume,
+    ).where(TimeSeries.stock_id == stock_id)
+    if start is not None:
+        query = query.where(TimeSeries.date >= start)
+    if end is not None:
+        query = query.where(TimeSeries.date <= end)
+    query = query.order_by(TimeSeries.date.desc())
+    if limit is not None:
+        days = MAX_DAYS_PER_BUCKET[resolution]
+        query = query.limit(limit if days == 1 else (limit + 1) * days)
+
+    rows = db.session.execute(query).all()
+    if resolution != "daily":
+        rows = _downsample(rows, resolution)
+        if limit is not None:
+            rows = rows[:limit]
+
+    return _to_columns(rows, lambda day: day.isoformat())
+
+
+def get_intraday_columns(stock_id, resolution, start=None, end=None, limit=None):
+    """
+    Get intraday bars for a stock as parallel, newest-first column lists.
+
+    Reads every stored width that divides the requested one (retention keeps
+    recent data as 1-minute bars and older data as coarser bars) and merges
+    them into `resolution` buckets. `start`/`end` are inclusive dates; bar
+    times are returned as UTC ISO 8601 timestamps.
+    """
+    minutes = INTRADAY_RESOLUTIONS[resolution]
+    query = db.select(
+        IntradayBar.start,
+        IntradayBar.open,
+        IntradayBar.high,
+        IntradayBar.low,
+        IntradayBar.close,
+        IntradayBar.volume,
+    ).where(
+        IntradayBar.stock_id == stock_id,
+        IntradayBar.interval_minutes.in_(
+            [width for width in INTRADAY_INTERVALS if minutes % width == 0]
+        ),
+    )
+    if start is not None:
+        query = query.where(IntradayBar.start >= datetime.combine(start, time.min))
+    if end is not None:
+        query = query.where(
+            IntradayBar.start < datetime.combine(end + timedelta(days=1), time.min)
+        )
+    query = query.order_by(IntradayBar.start.desc())
+    if limit is not None:
+        # A bucket holds at most `minutes` stored bars
+        query = query.limit(limit * minutes)
+
+    rows = db.session.execute(query).all()
+    if minutes > 1:
+        rows = _downsample(rows, resolution)
+    if limit is not None:
+        rows = rows[:limit]
+    return _to_columns(
+        rows, lambda at: at.replace(tzinfo=timezone.utc).isoformat()
     )
 
 
+def _to_columns(rows, format_date):
+    if not rows:
+        return {name: [] for name in HISTORY_COLUMNS}
+    columns = dict(zip(HISTORY_COLUMNS, map(list, zip(*rows))))
+    columns["dates"] = [format_date(day) for day in columns["dates"]]
+    for name in PRICE_COLUMNS:
+        columns[name] = [float(price) for price in columns[name]]
+    return columns
+
+
+def latest_bars_subquery(stock_ids=None, columns=None):
+    """
+    Subquery ranking each stock's TimeSeries rows newest-first.
+
+    Rows with ``rn == 1`` are the latest bar per stock. The ranking walks the
+    ``(stock_id, date)`` index, so it stays a single set-based scan no matter
+    how many symbols are tracked. `stock_ids` (a list or a subquery)
+    restricts the ranking to those stocks; `columns` narrows the selected
+    TimeSeries columns (e.g. to those of a covering index) instead of
+    returning whole rows.
+    """
+    query = db.select(
+        *(columns or (TimeSeries,)),
+        func.row_number()
+        .over(partition_by=TimeSeries.stock_id, order_by=TimeSeries.date.desc())
+        .label("rn"),
+    )
+    if stock_ids is not None:
+        query = query.where(TimeSeries.stock_id.in_(stock_ids))
+    return query.subquery("latest_bars")
+
+
 def get_all_stocks_with_latest_ohlc():
     """
-    Get all stocks and their latest OHLC data.
+    Get all stocks and their latest OHLC data in a single query.
     """
-    stocks = db.session.query(Stock).all()
-    if not stocks:
-        return []
+    latest = latest_bars_subquery()
+    latest_ts = aliased(TimeSeries, latest)
 
-    results = []
-    for stock in stocks:
-        latest_timeseries = (
-            db.session.query(TimeSeries)
-            .filter_by(stock_id=stock.stock_id)
-            .order_by(desc(TimeSeries.date))
-            .first()
+    return db.session.execute(
+        db.select(Stock, latest_ts)
+        .outerjoin(
+            latest_ts,
+            and_(latest_ts.stock_id == Stock.stock_id, latest.c.rn == 1),
         )
-        results.append((stock, latest_timeseries))
+        .order_by(Stock.stock_id)
+    ).all()
+
 
+def get_all_stocks_with_latest_quotes(max_age=None):
+    """
+    Get all stocks paired with their latest quote.
+
+    Quotes come from the in-memory quote book when every stock has one no
+    older than `max_age` seconds; otherwise the latest bars are loaded in one
+    query and written back to the book.
+    """
+    stocks = db.session.scalars(db.select(Stock).order_by(Stock.stock_id)).all()
+    quotes = [quote_book.get(stock.symbol, max_age) for stock in stocks]
+    if all(quotes):
+        return list(zip(stocks, quotes))
+
+    results = []
+    read_at = datetime.now(timezone.utc).timestamp()
+    for stock, latest_ohlc in get_all_stocks_with_latest_ohlc():
+        quote = quote_book.get(stock.symbol, max_age)
+        if quote is None and latest_ohlc is not None:
+            quote = quote_book.put(quote_from_row(stock.symbol, latest_ohlc, read_at))
+        results.append((stock, quote))
     return results
@@ -89,8 +89,12 @@ def login_user_route() -> Tuple[Response, int]:
     if not user:
         raise ApiError("Invalid username or password", HTTPStatus.UNAUTHORIZED)
 
+    # The portfolio id rides along in the token so portfolio routes can skip
+    # looking it up by user.
+    claims = {"portfolio_id": user.portfolio.portfolio_id} if user.portfolio else {}
     access_token = create_access_token(
         identity=str(user.user_id),
+        additional_claims=claims,
         expires_delta=datetime.timedelta(hours=24),
     )
 
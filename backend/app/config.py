@@ -12,3 +12,133 @@ class Config:
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
     SECRET_KEY = os.environ.get("SECRET_KEY", "a-default-secret-key-for-dev")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool for web requests and Socket.IO handlers; the ingestion
+    # workers get a separate pool on the same database with the INGEST_DB_
+    # sizes. DB_STATEMENT_TIMEOUT_MS (0 = none) applies to PostgreSQL only.
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS = float(os.environ.get("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING = os.environ.get(
+        "DB_POOL_PRE_PING", "true"
+    ).lower() in ("1", "true", "yes")
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", "0"))
+    INGEST_DB_SEPARATE_POOL = os.environ.get(
+        "INGEST_DB_SEPARATE_POOL", "true"
+    ).lower() in ("1", "true", "yes")
+    INGEST_DB_POOL_SIZE = int(os.environ.get("INGEST_DB_POOL_SIZE", "2"))
+    INGEST_DB_MAX_OVERFLOW = int(os.environ.get("INGEST_DB_MAX_OVERFLOW", "2"))
+    INGEST_DB_STATEMENT_TIMEOUT_MS = int(
+        os.environ.get("INGEST_DB_STATEMENT_TIMEOUT_MS", "0")
+    )
+
+    # Maximum age (seconds) of an in-memory quote before reads fall back to the DB
+    QUOTE_MAX_AGE_SECONDS = float(os.environ.get("QUOTE_MAX_AGE_SECONDS", "60"))
+
+    # How often a web worker re-reads per-stock data versions (ETag source)
+    DATA_VERSION_TTL_SECONDS = float(
+        os.environ.get("DATA_VERSION_TTL_SECONDS", "1.0")
+    )
+    # Cache-Control max-age for live market data and for history ending before today
+    MARKET_DATA_MAX_AGE_SECONDS = int(
+        os.environ.get("MARKET_DATA_MAX_AGE_SECONDS", "5")
+    )
+    HISTORY_MAX_AGE_SECONDS = int(os.environ.get("HISTORY_MAX_AGE_SECONDS", "3600"))
+
+    # Write-behind settings for WebSocket ticks
+    TICK_FLUSH_INTERVAL_SECONDS = float(
+        os.environ.get("TICK_FLUSH_INTERVAL_SECONDS", "1.0")
+    )
+    TICK_FLUSH_BATCH_SIZE = int(os.environ.get("TICK_FLUSH_BATCH_SIZE", "500"))
+
+    # Intraday bars: flush cadence for closed 1-minute bars, and how many days
+    # each width is kept before being rolled into the next (15m bars are dropped)
+    INTRADAY_FLUSH_INTERVAL_SECONDS = float(
+        os.environ.get("INTRADAY_FLUSH_INTERVAL_SECONDS", "5")
+    )
+    INTRADAY_1M_RETENTION_DAYS = float(
+        os.environ.get("INTRADAY_1M_RETENTION_DAYS", "3")
+    )
+    INTRADAY_5M_RETENTION_DAYS = float(
+        os.environ.get("INTRADAY_5M_RETENTION_DAYS", "30")
+    )
+    INTRADAY_15M_RETENTION_DAYS = float(
+        os.environ.get("INTRADAY_15M_RETENTION_DAYS", "180")
+    )
+
+    # Interval at which batched price updates are pushed to Socket.IO rooms
+    PRICE_BATCH_INTERVAL_MS = int(os.environ.get("PRICE_BATCH_INTERVAL_MS", "250"))
+
+    # Historical backfill: default lookback for new symbols and fetch concurrency
+    BACKFILL_PERIOD = os.environ.get("BACKFILL_PERIOD", "1mo")
+    BACKFILL_MAX_WORKERS = int(os.environ.get("BACKFILL_MAX_WORKERS", "8"))
+
+    # Source of daily history and live ticks: "yfinance", or "replay" to stream
+    # a JSON-lines tick file (see `flask generate-ticks`) at REPLAY_SPEED times
+    # its recorded pace, 0 meaning as fast as ingestion keeps up
+    MARKET_DATA_PROVIDER = os.environ.get("MARKET_DATA_PROVIDER", "yfinance")
+    MARKET_DATA_REPLAY_PATH = os.environ.get("MARKET_DATA_REPLAY_PATH")
+    MARKET_DATA_REPLAY_SPEED = float(os.environ.get("MARKET_DATA_REPLAY_SPEED", "1.0"))
+    MARKET_DATA_REPLAY_LOOPS = int(os.environ.get("MARKET_DATA_REPLAY_LOOPS", "1"))
+    # Added to every replayed tick's recorded time, e.g. to replay a past session
+    # as today's
+    MARKET_DATA_REPLAY_OFFSET_SECONDS = float(
+        os.environ.get("MARKET_DATA_REPLAY_OFFSET_SECONDS", "0")
+    )
+    # Append every live tick to this JSON-lines file for later replay
+    MARKET_DATA_RECORD_PATH = os.environ.get("MARKET_DATA_RECORD_PATH")
+
+    # Start backfill and the live stream inside the web process (single-process dev)
+    RUN_INGESTION_IN_PROCESS = os.environ.get(
+        "RUN_INGESTION_IN_PROCESS", ""
+    ).lower() in ("1", "true", "yes")
+    # Message queue (e.g. redis://) shared by web workers and `flask run-ingest`
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get("SOCKETIO_MESSAGE_QUEUE")
+
+    # Attempts for a trade that hits a lock conflict before giving up
+    TRADE_MAX_ATTEMPTS = int(os.environ.get("TRADE_MAX_ATTEMPTS", "3"))
+
+    # How SELLs are matched against tax lots: FIFO, LIFO or AVERAGE (run
+    # `flask rebuild-tax-lots` after changing it)
+    TAX_LOT_METHOD = os.environ.get("TAX_LOT_METHOD", "FIFO").upper()
+
+    # How often the ingestion process picks up placed/cancelled limit and stop
+    # orders from the database (triggered orders execute immediately)
+    ORDER_SYNC_INTERVAL_SECONDS = float(
+        os.environ.get("ORDER_SYNC_INTERVAL_SECONDS", "1.0")
+    )
+
+    # Annual risk-free rate used for Sharpe ratios in /portfolio/analytics
+    ANALYTICS_RISK_FREE_RATE = float(os.environ.get("ANALYTICS_RISK_FREE_RATE", "0"))
+
+    # Calendar days of bars read when the screener first computes a stock's
+    # indicators (covers the 200-day SMA, 52-week range and EMA/RSI warm-up)
+    SCREENER_LOOKBACK_DAYS = int(os.environ.get("SCREENER_LOOKBACK_DAYS", "450"))
+
+    # Serves /metrics: connection pool checkout waits and saturation, the
+    # cache and writer counters and, with PROFILING_ENABLED, request metrics
+    METRICS_ENABLED = os.environ.get(
+        "METRICS_ENABLED", ""
+    ).lower() in ("1", "true", "yes")
+    # Bearer token /metrics requires; unset, it answers direct loopback only
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # Per-request wall time, SQL statement count and SQL time, exported at
+    # /metrics when METRICS_ENABLED is also set; a PROFILE_SAMPLE_RATE share of
+    # requests is also run under cProfile with stats dumped to PROFILE_DIR
+    PROFILING_ENABLED = os.environ.get(
+        "PROFILING_ENABLED", ""
+    ).lower() in ("1", "true", "yes")
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+    # Requests slower than this are logged with their query counts (0 = never)
+    PROFILING_SLOW_REQUEST_MS = float(
+        os.environ.get("PROFILING_SLOW_REQUEST_MS", "0")
+    )
+
+    # Per-process cache of JWT identities (user snapshot + portfolio id)
+    IDENTITY_CACHE_TTL_SECONDS = float(
+        os.environ.get("IDENTITY_CACHE_TTL_SECONDS", "60")
+    )
+    IDENTITY_CACHE_MAX_SIZE = int(os.environ.get("IDENTITY_CACHE_MAX_SIZE", "10000"))
@@ -0,0 +1,185 @@
+"""
+Database engine options, the ingestion engine and connection pool metrics.
+
+`configure_engines` turns the `DB_*` settings into `SQLALCHEMY_ENGINE_OPTIONS`
+and, with `INGEST_DB_SEPARATE_POOL`, adds an "ingest" bind to the same
+database with its own, smaller pool. Code running under `ingestion_context`
+(the tick writer, bar aggregator and order executor threads, and the backfill
+in `run_ingestion`) uses that engine, so a burst of flushes waits on its own
+connections rather than on the ones serving HTTP requests and Socket.IO
+handlers.
+
+Queue pools are `InstrumentedQueuePool`s: checkout wait times feed the
+`stockvault_db_pool_checkout_wait_seconds` histogram and each pool's size,
+connections in use and saturation are exported at `/metrics` (with
+`METRICS_ENABLED`).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from app.instrumentation import metrics, register_stats
+
+INGEST_BIND = "ingest"
+
+_bind_key: ContextVar[Optional[str]] = ContextVar("engine_bind_key", default=None)
+
+
+class RoutingSession(Session):
+    """
+    `db.session` class that sends statements to the bind chosen by the
+    enclosing `ingestion_context`, when the app configures that bind.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        key = _bind_key.get()
+        if bind is None and key is not None:
+            engine = self._db.engines.get(key)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def ingestion_context(app):
+    """An app context whose `db.session` uses the ingestion engine."""
+    with app.app_context():
+        token = _bind_key.set(INGEST_BIND)
+        try:
+            yield
+        finally:
+            _bind_key.reset(token)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """`QueuePool` that times checkouts and counts checkout timeouts."""
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.name = self.logging_name or "default"
+        self.max_overflow = max_overflow
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self._stats_lock = threading.Lock()
+        _pools[self.name] = self
+        register_stats(f"db_pool_{self.name}", lambda name=self.name: pool_stats(name))
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            metrics.observe_pool_wait(self.name, waited)
+
+    def stats(self) -> Dict[str, float]:
+        in_use = self.checkedout()
+        capacity = self.size() + max(self.max_overflow, 0)
+        with self._stats_lock:
+            return {
+                "size": self.size(),
+                "max_overflow": self.max_overflow,
+                "checked_out": in_use,
+                "overflow": max(self.overflow(), 0),
+                "saturation": in_use / capacity if capacity else 0.0,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds,
+                "max_wait_ms": self.max_wait_seconds * 1000,
+            }
+
+
+# Latest pool per engine name; `engine.dispose()` replaces an engine's pool
+_pools: Dict[str, InstrumentedQueuePool] = {}
+
+
+def pool_stats(name: str) -> Dict[str, float]:
+    pool = _pools.get(name)
+    return pool.stats() if pool is not None else {}
+
+
+def _is_memory_sqlite(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_options(
+    url, name: str, pool_size: int, max_overflow: int, statement_timeout_ms: int, config
+) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"pool_pre_ping": config.get("DB_POOL_PRE_PING", True)}
+    if _is_memory_sqlite(url):
+        # Flask-SQLAlchemy gives in-memory SQLite a StaticPool with one connection
+        return options
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=config.get("DB_POOL_TIMEOUT_SECONDS", 30.0),
+        pool_recycle=config.get("DB_POOL_RECYCLE_SECONDS", 1800),
+    )
+    if statement_timeout_ms and make_url(url).get_backend_name() == "postgresql":
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={statement_timeout_ms}"
+        }
+    return options
+
+
+def configure_engines(app) -> None:
+    """
+    Fills in engine options and the ingestion bind from the `DB_*` and
+    `INGEST_DB_*` settings. Call before `db.init_app`; options set explicitly
+    in `SQLALCHEMY_ENGINE_OPTIONS` or `SQLALCHEMY_BINDS` take precedence.
+    """
+    config = app.config
+    url = config.get("SQLALCHEMY_DATABASE_URI")
+    if not url:
+        return
+    config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **_engine_options(
+            url,
+            "web",
+            config.get("DB_POOL_SIZE", 5),
+            config.get("DB_MAX_OVERFLOW", 10),
+            config.get("DB_STATEMENT_TIMEOUT_MS", 0),
+            config,
+        ),
+        **(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}),
+    }
+    if not config.get("INGEST_DB_SEPARATE_POOL") or _is_memory_sqlite(url):
+        # A second engine on in-memory SQLite would be a second, empty database
+        return
+    binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+    binds.setdefault(
+        INGEST_BIND,
+        {
+            "url": url,
+            **_engine_options(
+                url,
+                INGEST_BIND,
+                config.get("INGEST_DB_POOL_SIZE", 2),
+                config.get("INGEST_DB_MAX_OVERFLOW", 2),
+                config.get("INGEST_DB_STATEMENT_TIMEOUT_MS", 0),
+                config,
+            ),
+        },
+    )
+    config["SQLALCHEMY_BINDS"] = binds
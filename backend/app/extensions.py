@@ -3,13 +3,14 @@ from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass
 from flask_jwt_extended import JWTManager
 from flask_socketio import SocketIO
 from flask_migrate import Migrate
+from app.engines import RoutingSession
 
 
 class Base(DeclarativeBase, MappedAsDataclass):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
 jwt = JWTManager()
 socketio = SocketIO(cors_allowed_origins="*")
 migrate = Migrate()
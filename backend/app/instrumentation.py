@@ -0,0 +1,439 @@
+"""
+Request profiling and SQL statement accounting.
+
+Every SQL statement is counted and timed through SQLAlchemy engine events,
+into whichever `QueryRecorder`s are active in the current thread or task.
+With `PROFILING_ENABLED`, each request runs under one: its wall time,
+statement count and SQL time feed per-blueprint histograms. A
+`PROFILE_SAMPLE_RATE` share of requests also runs under cProfile, with the
+stats dumped to `PROFILE_DIR`.
+
+With `METRICS_ENABLED`, `/metrics` serves those histograms in the Prometheus
+text format, along with the connection pool metrics and the counters of the
+in-process caches and background writers. The two flags are independent, so
+pool and cache metrics can be scraped without per-request profiling.
+Scrapers authenticate with `METRICS_TOKEN`; without one, only direct
+loopback requests are served.
+
+`assert_max_queries` and the `query_budget` route decorator turn the same
+counts into test failures when code starts issuing more statements than
+expected.
+"""
+
+import cProfile
+import hmac
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from http import HTTPStatus
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from flask import current_app, g, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_recorders: ContextVar[Tuple["QueryRecorder", ...]] = ContextVar(
+    "query_recorders", default=()
+)
+
+
+class QueryRecorder:
+    """
+    Counts and times the SQL statements run while it is entered. Recorders
+    nest; each sees every statement run inside it.
+    """
+
+    def __init__(self, keep_statements: bool = False):
+        self.keep_statements = keep_statements
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: List[str] = []
+
+    def __enter__(self) -> "QueryRecorder":
+        _recorders.set(_recorders.get() + (self,))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        _recorders.set(tuple(r for r in _recorders.get() if r is not self))
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if self.keep_statements:
+            self.statements.append(statement)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    if _recorders.get():
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    for recorder in _recorders.get():
+        recorder.record(statement, elapsed)
+
+
+def _listen_for_queries() -> None:
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Query budgets -----------------------------------------------------------
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when code runs more SQL statements than its budget allows. The
+    statements are listed when the recorder kept them.
+    """
+
+    def __init__(self, where: str, limit: int, recorder: QueryRecorder):
+        listing = "".join(
+            f"\n  {i}. {' '.join(s.split())[:200]}"
+            for i, s in enumerate(recorder.statements, 1)
+        )
+        super().__init__(
+            f"{where} ran {recorder.count} SQL statements, budget is {limit}"
+            f"{':' if listing else ''}{listing}"
+        )
+        self.count = recorder.count
+        self.limit = limit
+
+
+@contextmanager
+def assert_max_queries(limit: int, where: str = "block"):
+    """
+    Fails with `QueryBudgetExceeded` if the block runs more than `limit`
+    SQL statements; for example, around a test client request::
+
+        with assert_max_queries(3):
+            client.get("/portfolio/holdings", headers=auth)
+    """
+    with QueryRecorder(keep_statements=True) as recorder:
+        yield recorder
+    if recorder.count > limit:
+        raise QueryBudgetExceeded(where, limit, recorder)
+
+
+def query_budget(limit: int):
+    """
+    Declares how many SQL statements a view may run, including its auth
+    lookups on a cold cache. Over budget, the request fails with
+    `QueryBudgetExceeded` under `TESTING` and is logged otherwise; the
+    statement text is only kept under `TESTING`, so production requests
+    just count.
+
+    For read-only views: the count is checked after the view returns, when
+    a write would already be committed, and `run_in_transaction` retries
+    would count against it. Pin write paths with `assert_max_queries` in
+    tests instead.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            testing = current_app.config.get("TESTING", False)
+            with QueryRecorder(keep_statements=testing) as recorder:
+                response = view(*args, **kwargs)
+            if recorder.count > limit:
+                error = QueryBudgetExceeded(request.endpoint, limit, recorder)
+                if testing:
+                    raise error
+                print(f"Query budget exceeded: {error.args[0].splitlines()[0]}")
+            return response
+
+        wrapped.query_budget = limit
+        return wrapped
+
+    return decorator
+
+
+# --- Metrics -----------------------------------------------------------------
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """A labelled Prometheus histogram with fixed upper bounds."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # One count per bucket, then +Inf, sum
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for labels, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, labels + (bound,))} "
+                    f"{count:g}"
+                )
+            lines.append(
+                f"{self.name}_bucket{_format_labels(names, labels + ('+Inf',))} "
+                f"{series[-2]:g}"
+            )
+            label_text = _format_labels(self.labels, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{label_text} {series[-2]:g}")
+        return lines
+
+
+class Counter:
+    """A labelled Prometheus counter."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(
+                f"{self.name}{_format_labels(self.labels, labels)} {value:g}"
+            )
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Per-process request and connection pool metrics, plus registered
+    component stats.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter(
+            "stockvault_http_requests_total",
+            "HTTP requests by blueprint, method and status.",
+            ("blueprint", "method", "status"),
+        )
+        self.latency = Histogram(
+            "stockvault_http_request_duration_seconds",
+            "Wall time per request.",
+            ("blueprint", "method"),
+            LATENCY_BUCKETS,
+        )
+        self.sql_queries = Histogram(
+            "stockvault_http_request_sql_queries",
+            "SQL statements run per request.",
+            ("blueprint", "method"),
+            QUERY_COUNT_BUCKETS,
+        )
+        self.sql_seconds = Histogram(
+            "stockvault_http_request_sql_duration_seconds",
+            "Time spent in SQL per request.",
+            ("blueprint", "method"),
+            LATENCY_BUCKETS,
+        )
+        self.pool_wait = Histogram(
+            "stockvault_db_pool_checkout_wait_seconds",
+            "Time to check a connection out of the pool, including connecting.",
+            ("pool",),
+            POOL_WAIT_BUCKETS,
+        )
+        self._stats: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def observe(
+        self,
+        blueprint: str,
+        method: str,
+        status: int,
+        seconds: float,
+        queries: int,
+        sql_seconds: float,
+    ) -> None:
+        labels = (blueprint, method)
+        with self._lock:
+            self.requests.inc((blueprint, method, str(status)))
+            self.latency.observe(labels, seconds)
+            self.sql_queries.observe(labels, queries)
+            self.sql_seconds.observe(labels, sql_seconds)
+
+    def observe_pool_wait(self, pool: str, seconds: float) -> None:
+        with self._lock:
+            self.pool_wait.observe((pool,), seconds)
+
+    def register_stats(self, component: str, stats: Callable[[], Dict[str, float]]):
+        """Exposes `stats()` of a cache or background worker as gauges."""
+        self._stats[component] = stats
+
+    def render(self) -> str:
+        with self._lock:
+            lines = (
+                self.requests.render()
+                + self.latency.render()
+                + self.sql_queries.render()
+                + self.sql_seconds.render()
+                + self.pool_wait.render()
+            )
+        for component, stats in sorted(self._stats.items()):
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Error reading {component} stats: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"stockvault_{component}_{key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {float(value):g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+def register_stats(component: str, stats: Callable[[], Dict[str, float]]) -> None:
+    metrics.register_stats(component, stats)
+
+
+# --- Request hooks -----------------------------------------------------------
+
+
+def _start_request() -> None:
+    recorder = QueryRecorder().__enter__()
+    profiler = None
+    rate = current_app.config.get("PROFILE_SAMPLE_RATE", 0.0)
+    if rate and random.random() < rate:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    g._profiling = (time.perf_counter(), recorder, profiler)
+
+
+def _finish_request(response):
+    state = g.get("_profiling")
+    if state is None or request.endpoint == "metrics":
+        return response
+    started, recorder, _ = state
+    elapsed = time.perf_counter() - started
+    blueprint = request.blueprint or ("app" if request.url_rule else "unmatched")
+    metrics.observe(
+        blueprint,
+        request.method,
+        response.status_code,
+        elapsed,
+        recorder.count,
+        recorder.seconds,
+    )
+    response.headers.add(
+        "Server-Timing",
+        f'app;dur={elapsed * 1000:.1f}, '
+        f'db;dur={recorder.seconds * 1000:.1f};desc="{recorder.count} queries"',
+    )
+    slow_ms = current_app.config.get("PROFILING_SLOW_REQUEST_MS")
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        print(
+            f"Slow request: {request.method} {request.path} "
+            f"{elapsed * 1000:.0f} ms, {recorder.count} queries, "
+            f"{recorder.seconds * 1000:.0f} ms SQL"
+        )
+    return response
+
+
+def _end_request(exc) -> None:
+    state = g.pop("_profiling", None)
+    if state is None:
+        return
+    started, recorder, profiler = state
+    recorder.__exit__(None, None, None)
+    if profiler is None:
+        return
+    profiler.disable()
+    directory = current_app.config.get("PROFILE_DIR", "profiles")
+    os.makedirs(directory, exist_ok=True)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    name = re.sub(r"[^a-zA-Z0-9_.-]", "_", request.endpoint or "unmatched")
+    profiler.dump_stats(
+        os.path.join(
+            directory,
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{name}-{elapsed_ms:.0f}ms-"
+            f"{uuid.uuid4().hex[:8]}.prof",
+        )
+    )
+
+
+def _metrics_allowed() -> bool:
+    token = current_app.config.get("METRICS_TOKEN")
+    if token:
+        presented = request.headers.get("Authorization", "")
+        return hmac.compare_digest(presented.encode(), f"Bearer {token}".encode())
+    # Without a token, a request relayed by a local proxy is not trusted
+    return request.remote_addr in ("127.0.0.1", "::1") and not (
+        request.headers.get("X-Forwarded-For") or request.headers.get("Forwarded")
+    )
+
+
+def metrics_view():
+    if not _metrics_allowed():
+        return jsonify({"error": "Not allowed to read metrics"}), HTTPStatus.FORBIDDEN
+    return current_app.response_class(
+        metrics.render(), mimetype="text/plain; version=0.0.4"
+    )
+
+
+def init_instrumentation(app) -> None:
+    """
+    Starts counting SQL statements, installs the request hooks with
+    `PROFILING_ENABLED` and the `/metrics` endpoint with `METRICS_ENABLED`.
+    """
+    _listen_for_queries()
+    if app.config.get("PROFILING_ENABLED"):
+        app.before_request(_start_request)
+        app.after_request(_finish_request)
+        app.teardown_request(_end_request)
+    if not app.config.get("METRICS_ENABLED"):
+        return
+    from app.services.identity_cache import identity_cache
+    from app.services.screener import screener
+    from app.tasks.bar_aggregator import bar_aggregator
+    from app.tasks.order_executor import order_executor
+    from app.tasks.tick_writer import tick_writer
+
+    register_stats("identity_cache", identity_cache.stats)
+    register_stats("screener", screener.stats)
+    # Only move in the process running ingestion (in-process dev setups)
+    register_stats("tick_writer", tick_writer.stats)
+    register_stats("bar_aggregator", bar_aggregator.stats)
+    register_stats("order_executor", order_executor.stats)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
@@ -4,8 +4,15 @@ from .stock import Stock
 from .holding import Holding
 from .transaction import Transaction, TransactionTypeEnum
 from .time_series import TimeSeries
+from .idempotency_key import IdempotencyKey
+from .intraday_bar import IntradayBar, INTRADAY_INTERVALS, floor_to_interval
+from .portfolio_snapshot import PortfolioDailySnapshot
+from .tax_lot import TaxLot, RealizedGain
+from .pending_order import PendingOrder, OrderTypeEnum, OrderStatusEnum
 
 __all__ = [
     "User", "Portfolio", "Stock", "Holding", "Transaction", "TransactionTypeEnum",
-    "TimeSeries"
+    "TimeSeries", "IdempotencyKey", "IntradayBar", "INTRADAY_INTERVALS",
+    "floor_to_interval", "PortfolioDailySnapshot", "TaxLot", "RealizedGain",
+    "PendingOrder", "OrderTypeEnum", "OrderStatusEnum"
 ]
\ No newline at end of file
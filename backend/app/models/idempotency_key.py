@@ -0,0 +1,37 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import String, JSON, ForeignKey, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Remembers the response to a request sent with an `Idempotency-Key` header
+    so that client retries replay it instead of executing again.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint(
+            "portfolio_id", "key", name="uq_idempotency_keys_portfolio_key"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    portfolio_id: Mapped[int] = mapped_column(
+        ForeignKey("portfolios.portfolio_id", ondelete="CASCADE"), nullable=False
+    )
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    response_status: Mapped[int] = mapped_column(nullable=False)
+    response_body: Mapped[Any] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), init=False
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey(portfolio={self.portfolio_id}, key='{self.key}')>"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import TYPE_CHECKING
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Numeric, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.extensions import Base
+
+if TYPE_CHECKING:
+    from app.models import Stock
+
+
+# Bar widths, in minutes, that are stored in `intraday_bars`
+INTRADAY_INTERVALS = (1, 5, 15)
+
+
+def floor_to_interval(at: datetime, minutes: int) -> datetime:
+    """Start of the `minutes`-wide bar that `at` falls in."""
+    start = at.replace(second=0, microsecond=0)
+    return start - timedelta(minutes=start.minute % minutes)
+
+
+class IntradayBar(Base):
+    """
+    Represents an intraday OHLCV bar in the 'intraday_bars' table.
+
+    `start` is the UTC (naive) open time of the bar and `interval_minutes`
+    its width. Live ticks are stored as 1-minute bars; retention rolls older
+    ones up into 5- and 15-minute bars.
+    """
+
+    __tablename__ = "intraday_bars"
+    __table_args__ = (
+        Index(
+            "ix_intraday_bars_stock_id_interval_start",
+            "stock_id",
+            "interval_minutes",
+            "start",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.stock_id"), nullable=False)
+    interval_minutes: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    start: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    open: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    high: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    low: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    close: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    volume: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    # Relationships
+    stock: Mapped["Stock"] = relationship(init=False)
+
+    def __repr__(self):
+        return (
+            f"<IntradayBar(stock_id={self.stock_id}, "
+            f"interval={self.interval_minutes}m, start='{self.start}')>"
+        )
@@ -0,0 +1,90 @@
+from __future__ import annotations
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+import enum
+
+from sqlalchemy import Enum, ForeignKey, Index, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.extensions import Base
+from app.models.transaction import TransactionTypeEnum
+
+
+class OrderTypeEnum(enum.Enum):
+    """
+    LIMIT fills at `price` or better; STOP becomes a market order once the
+    price reaches `price` (a sell stop from above, a buy stop from below).
+    """
+
+    LIMIT = "LIMIT"
+    STOP = "STOP"
+
+
+class OrderStatusEnum(enum.Enum):
+    OPEN = "OPEN"
+    FILLED = "FILLED"
+    CANCELLED = "CANCELLED"
+    REJECTED = "REJECTED"
+
+
+class PendingOrder(Base):
+    """
+    A resting limit or stop order in the 'pending_orders' table.
+
+    Open orders are mirrored into the ingestion process's in-memory order
+    book and executed through the portfolio service when a tick crosses
+    their price. Timestamps are set in Python (UTC), like transaction dates,
+    so the ingestion process can poll for changes by time.
+    """
+
+    __tablename__ = "pending_orders"
+    __table_args__ = (
+        Index("ix_pending_orders_portfolio_id_status", "portfolio_id", "status"),
+        Index("ix_pending_orders_status_updated_at", "status", "updated_at"),
+    )
+
+    order_id: Mapped[int] = mapped_column(
+        primary_key=True, autoincrement=True, init=False
+    )
+    portfolio_id: Mapped[int] = mapped_column(
+        ForeignKey("portfolios.portfolio_id", ondelete="CASCADE"), nullable=False
+    )
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.stock_id"), nullable=False)
+    side: Mapped[TransactionTypeEnum] = mapped_column(
+        Enum(TransactionTypeEnum, name="order_side_enum"), nullable=False
+    )
+    order_type: Mapped[OrderTypeEnum] = mapped_column(
+        Enum(OrderTypeEnum, name="order_type_enum"), nullable=False
+    )
+    quantity: Mapped[Decimal] = mapped_column(Numeric(18, 8), nullable=False)
+    price: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    status: Mapped[OrderStatusEnum] = mapped_column(
+        Enum(OrderStatusEnum, name="order_status_enum"),
+        nullable=False,
+        default=OrderStatusEnum.OPEN,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow, init=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, init=False
+    )
+    filled_at: Mapped[Optional[datetime]] = mapped_column(
+        nullable=True, default=None, init=False
+    )
+    transaction_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("transactions.transaction_id", ondelete="SET NULL"),
+        nullable=True,
+        default=None,
+        init=False,
+    )
+    reject_reason: Mapped[Optional[str]] = mapped_column(
+        String(255), nullable=True, default=None, init=False
+    )
+
+    def __repr__(self):
+        return (
+            f"<PendingOrder(id={self.order_id}, {self.side.name} "
+            f"{self.order_type.name} @ {self.price}, status={self.status.name})>"
+        )
@@ -31,6 +31,13 @@ class Portfolio(Base):
         Numeric(18, 4), nullable=False, default=Decimal("100000.00")
     )
 
+    # Optimistic concurrency token: every UPDATE checks and bumps it, so a
+    # trade based on a stale balance fails instead of overwriting another.
+    version_id: Mapped[int] = mapped_column(
+        nullable=False, server_default="1", init=False
+    )
+    __mapper_args__ = {"version_id_col": version_id}
+
     created_at: Mapped[datetime] = mapped_column(
         server_default=func.now(), init=False
     )
@@ -0,0 +1,50 @@
+from __future__ import annotations
+import datetime
+from decimal import Decimal
+from typing import Any, Optional
+from sqlalchemy import JSON, Date, ForeignKey, Index, Numeric
+from sqlalchemy.orm import Mapped, mapped_column
+from app.extensions import Base
+
+
+class PortfolioDailySnapshot(Base):
+    """
+    End-of-day value of a portfolio in the 'portfolio_daily_snapshots' table.
+
+    Written incrementally by `flask snapshot-portfolios`. Trades dated after
+    `watermark` may not be reflected yet; the next run picks them up.
+    `positions` holds the day's open positions as
+    {stock_id: [quantity, cost_basis, price]} (decimal strings) so the next
+    run can resume from it instead of replaying the whole ledger.
+    """
+
+    __tablename__ = "portfolio_daily_snapshots"
+    __table_args__ = (
+        Index(
+            "ix_portfolio_daily_snapshots_portfolio_id_date",
+            "portfolio_id",
+            "date",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    portfolio_id: Mapped[int] = mapped_column(
+        ForeignKey("portfolios.portfolio_id", ondelete="CASCADE"), nullable=False
+    )
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    cash_balance: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    market_value: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    cost_basis: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    watermark: Mapped[datetime.datetime] = mapped_column(nullable=False)
+    positions: Mapped[Optional[Any]] = mapped_column(JSON, nullable=True, default=None)
+
+    @property
+    def total_value(self) -> Decimal:
+        return self.cash_balance + self.market_value
+
+    def __repr__(self):
+        return (
+            f"<PortfolioDailySnapshot(portfolio_id={self.portfolio_id}, "
+            f"date='{self.date}')>"
+        )
@@ -23,6 +23,12 @@ class Stock(Base):
     company_name: Mapped[str] = mapped_column(String(255), nullable=False)
     sector: Mapped[str] = mapped_column(String(100), nullable=True)
 
+    # Bumped by the ingest path whenever this stock's bars change; web workers
+    # derive ETags for market-data responses from it.
+    data_version: Mapped[int] = mapped_column(
+        nullable=False, server_default="0", init=False
+    )
+
     # Relationships
     holdings: Mapped[List["Holding"]] = relationship(
         back_populates="stock", init=False, default_factory=list
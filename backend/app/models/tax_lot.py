@@ -0,0 +1,107 @@
+from __future__ import annotations
+from datetime import datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy import ForeignKey, Index, Numeric, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from app.extensions import Base
+
+if TYPE_CHECKING:
+    from app.models import Transaction
+
+
+class TaxLot(Base):
+    """
+    An open purchase lot in the 'tax_lots' table.
+
+    Each BUY opens a lot; SELLs draw lots down in the configured matching
+    order and delete them once empty, so the table only ever holds open
+    positions.
+    """
+
+    __tablename__ = "tax_lots"
+    __table_args__ = (
+        Index(
+            "ix_tax_lots_portfolio_id_stock_id_opened_at",
+            "portfolio_id",
+            "stock_id",
+            "opened_at",
+        ),
+    )
+
+    lot_id: Mapped[int] = mapped_column(
+        primary_key=True, autoincrement=True, init=False
+    )
+    portfolio_id: Mapped[int] = mapped_column(
+        ForeignKey("portfolios.portfolio_id", ondelete="CASCADE"), nullable=False
+    )
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.stock_id"), nullable=False)
+    opened_at: Mapped[datetime] = mapped_column(nullable=False)
+    quantity: Mapped[Decimal] = mapped_column(Numeric(18, 8), nullable=False)
+    remaining_quantity: Mapped[Decimal] = mapped_column(Numeric(18, 8), nullable=False)
+    cost_per_share: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    transaction_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("transactions.transaction_id", ondelete="CASCADE"),
+        nullable=True,
+        default=None,
+    )
+    transaction: Mapped[Optional["Transaction"]] = relationship(
+        default=None, repr=False
+    )
+
+    @property
+    def cost_basis(self) -> Decimal:
+        return self.remaining_quantity * self.cost_per_share
+
+    def __repr__(self):
+        return (
+            f"<TaxLot(id={self.lot_id}, portfolio={self.portfolio_id}, "
+            f"stock={self.stock_id}, remaining={self.remaining_quantity})>"
+        )
+
+
+class RealizedGain(Base):
+    """
+    Running realized P&L per portfolio and stock in the 'realized_gains'
+    table, updated by every SELL as lots are matched.
+    """
+
+    __tablename__ = "realized_gains"
+    __table_args__ = (
+        UniqueConstraint(
+            "portfolio_id", "stock_id", name="uq_realized_gains_portfolio_stock"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
+    portfolio_id: Mapped[int] = mapped_column(
+        ForeignKey("portfolios.portfolio_id", ondelete="CASCADE"), nullable=False
+    )
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.stock_id"), nullable=False)
+    quantity_sold: Mapped[Decimal] = mapped_column(
+        Numeric(18, 8), nullable=False, default=Decimal("0")
+    )
+    proceeds: Mapped[Decimal] = mapped_column(
+        Numeric(18, 4), nullable=False, default=Decimal("0")
+    )
+    cost_basis: Mapped[Decimal] = mapped_column(
+        Numeric(18, 4), nullable=False, default=Decimal("0")
+    )
+    # Shares sold with no open lot to match (no cost known); left out of the
+    # quantity, proceeds and cost above
+    unmatched_quantity: Mapped[Decimal] = mapped_column(
+        Numeric(18, 8), nullable=False, default=Decimal("0"), server_default="0"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=func.now(), onupdate=func.now(), init=False
+    )
+
+    @property
+    def realized_pnl(self) -> Decimal:
+        return self.proceeds - self.cost_basis
+
+    def __repr__(self):
+        return (
+            f"<RealizedGain(portfolio={self.portfolio_id}, stock={self.stock_id}, "
+            f"pnl={self.realized_pnl})>"
+        )
@@ -1,6 +1,8 @@
 from __future__ import annotations
+import datetime
+from decimal import Decimal
 from typing import TYPE_CHECKING
-from sqlalchemy import ForeignKey, Date, Float
+from sqlalchemy import ForeignKey, Date, Index, Numeric
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.extensions import Base
 
@@ -14,14 +16,21 @@ class TimeSeries(Base):
     """
 
     __tablename__ = "time_series"
+    __table_args__ = (
+        # One bar per stock and day; backfill and the tick writer rely on it
+        # to skip rows that already exist.
+        Index("ix_time_series_stock_id_date", "stock_id", "date", unique=True),
+        # Covers latest/previous-close lookups so they never touch the heap.
+        Index("ix_time_series_stock_id_date_close", "stock_id", "date", "close"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, init=False)
     stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.stock_id"), nullable=False)
-    date: Mapped[Date] = mapped_column(Date, nullable=False)
-    open: Mapped[float] = mapped_column(Float, nullable=False)
-    high: Mapped[float] = mapped_column(Float, nullable=False)
-    low: Mapped[float] = mapped_column(Float, nullable=False)
-    close: Mapped[float] = mapped_column(Float, nullable=False)
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    open: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    high: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    low: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    close: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
     volume: Mapped[int] = mapped_column(nullable=False)
 
     # Relationships
@@ -32,10 +41,10 @@ class TimeSeries(Base):
 
     def to_dict(self):
         return {
-            "date": self.date.isoformat(),  # type: ignore
-            "open": self.open,
-            "high": self.high,
-            "low": self.low,
-            "close": self.close,
+            "date": self.date.isoformat(),
+            "open": float(self.open),
+            "high": float(self.high),
+            "low": float(self.low),
+            "close": float(self.close),
             "volume": self.volume,
         }
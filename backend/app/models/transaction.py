@@ -4,7 +4,7 @@ from datetime import datetime
 from decimal import Decimal
 import enum
 
-from sqlalchemy import Numeric, Enum, ForeignKey
+from sqlalchemy import Numeric, Enum, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.extensions import Base
@@ -26,6 +26,13 @@ class Transaction(Base):
     """
 
     __tablename__ = "transactions"
+    __table_args__ = (
+        Index(
+            "ix_transactions_portfolio_id_transaction_date",
+            "portfolio_id",
+            "transaction_date",
+        ),
+    )
 
     transaction_id: Mapped[int] = mapped_column(
         primary_key=True, autoincrement=True, init=False
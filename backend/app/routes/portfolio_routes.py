@@ -1,15 +1,35 @@
 # backend/app/routes/portfolio_routes.py
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from http import HTTPStatus
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from app.extensions import db
 from app.models import Portfolio, Holding, Transaction, TransactionTypeEnum, Stock
+from app.models import PortfolioDailySnapshot, RealizedGain, TaxLot
+from app.models import OrderStatusEnum, OrderTypeEnum, PendingOrder
 from decimal import Decimal
-from app.services.portfolio_service import execute_transaction, PortfolioServiceError
-from datetime import datetime
+from app.services.portfolio_service import (
+    execute_batch,
+    execute_transaction,
+    find_idempotent_response,
+    lock_portfolio,
+    request_fingerprint,
+    run_in_transaction,
+    save_idempotent_response,
+    BatchRejectedError,
+    IdempotencyKeyReuseError,
+    OrderRequest,
+    PortfolioServiceError,
+)
+from app.services.valuation import value_portfolio
+from app.serialization import model_serializer
+from app.instrumentation import query_budget
+from app.services.identity_cache import invalidate_identity, load_portfolio
+from datetime import date, datetime, time, timedelta
 from dataclasses import asdict, is_dataclass
 from functools import wraps
+from sqlalchemy import tuple_
 from sqlalchemy.exc import IntegrityError
+import base64
 import enum
 
 import traceback
@@ -37,11 +57,9 @@ def model_to_dict(obj):
     Handles both legacy and dataclass-mapped models.
     """
     # For SQLAlchemy models, only serialize columns to avoid circular recursion.
-    # This works for both traditional and dataclass-based models.
+    # The per-class serializer is compiled once and reused for every instance.
     if hasattr(obj, "__table__"):
-        return {
-            c.name: sanitize_value(getattr(obj, c.name)) for c in obj.__table__.columns
-        }
+        return model_serializer(type(obj))(obj)
     # For non-SQLAlchemy dataclasses.
     if is_dataclass(obj):
         return {k: sanitize_value(v) for k, v in asdict(obj).items()}  # type: ignore
@@ -57,10 +75,7 @@ def portfolio_required(f):
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        portfolio = db.session.execute(
-            db.select(Portfolio).filter_by(user_id=user_id)
-        ).scalar_one_or_none()
+        portfolio = load_portfolio(get_jwt_identity(), get_jwt().get("portfolio_id"))
         if not portfolio:
             return jsonify({"message": "Portfolio not found"}), HTTPStatus.NOT_FOUND
         return f(portfolio, *args, **kwargs)
@@ -109,6 +124,7 @@ def create_portfolio():
     db.session.add(new_portfolio)
     try:
         db.session.commit()
+        invalidate_identity(user_id)
     except IntegrityError:
         db.session.rollback()
         return (
@@ -123,83 +139,401 @@ def create_portfolio():
 @portfolio_required
 def delete_portfolio(portfolio: Portfolio):
     """Deletes the current user's portfolio."""
+    user_id = portfolio.user_id
     db.session.delete(portfolio)
     db.session.commit()
+    invalidate_identity(user_id)
     return "", HTTPStatus.NO_CONTENT
 
 
 # GET /portfolio/holdings
 @portfolio_bp_single.route("/holdings", methods=["GET"])
+@query_budget(3)
 @portfolio_required
 def get_holdings(portfolio: Portfolio):
     """Gets all holdings for the current user's portfolio."""
-    holdings = (
-        db.session.execute(
-            db.select(Holding).filter_by(portfolio_id=portfolio.portfolio_id)
-        )
-        .scalars()
-        .all()
-    )
-    data = [model_to_dict(h) for h in holdings]
+    serializer = model_serializer(Holding)
+    rows = db.session.execute(
+        db.select(*serializer.columns).filter_by(portfolio_id=portfolio.portfolio_id)
+    ).all()
+    data = serializer.rows(rows)
     return jsonify(data), HTTPStatus.OK
 
 
-# GET /portfolio/transactions
-@portfolio_bp_single.route("/transactions", methods=["GET"])
+def _percent(numerator, denominator):
+    if numerator is None or not denominator:
+        return None
+    return sanitize_value(numerator / denominator * 100)
+
+
+# GET /portfolio/summary
+@portfolio_bp_single.route("/summary", methods=["GET"])
+@query_budget(3)
 @portfolio_required
-def get_transactions(portfolio: Portfolio):
-    """Gets all transactions for the current user's portfolio."""
-    txs = (
-        db.session.execute(
-            db.select(Transaction).filter_by(portfolio_id=portfolio.portfolio_id)
+def get_summary(portfolio: Portfolio):
+    """
+    Values the current user's holdings at the latest prices. Holdings with
+    no price are reported with `priced: false` and null values and are left
+    out of the totals.
+    """
+    valuation = value_portfolio(db.session, portfolio)  # type: ignore
+
+    holdings = [
+        {
+            "stock_id": h.stock_id,
+            "symbol": h.symbol,
+            "quantity": sanitize_value(h.quantity),
+            "average_cost_per_share": sanitize_value(h.average_cost_per_share),
+            "price": sanitize_value(h.price),
+            "previous_close": sanitize_value(h.previous_close),
+            "market_value": sanitize_value(h.market_value),
+            "cost_basis": sanitize_value(h.cost_basis),
+            "unrealized_pnl": sanitize_value(h.unrealized_pnl),
+            "unrealized_pnl_pct": _percent(h.unrealized_pnl, h.cost_basis),
+            "day_change": sanitize_value(h.day_change),
+            "day_change_pct": _percent(
+                h.day_change, h.market_value - h.day_change if h.priced else None
+            ),
+            "weight": sanitize_value(h.weight),
+            "priced": h.priced,
+        }
+        for h in valuation.holdings
+    ]
+    totals = {
+        "cash_balance": sanitize_value(valuation.cash_balance),
+        "market_value": sanitize_value(valuation.market_value),
+        "cost_basis": sanitize_value(valuation.cost_basis),
+        "unrealized_pnl": sanitize_value(valuation.unrealized_pnl),
+        "unrealized_pnl_pct": _percent(valuation.unrealized_pnl, valuation.cost_basis),
+        "day_change": sanitize_value(valuation.day_change),
+        "day_change_pct": _percent(
+            valuation.day_change, valuation.market_value - valuation.day_change
+        ),
+        "total_value": sanitize_value(valuation.total_value),
+        "unpriced_holdings": valuation.unpriced_holdings,
+    }
+    return jsonify({"holdings": holdings, "totals": totals}), HTTPStatus.OK
+
+
+# GET /portfolio/realized
+@portfolio_bp_single.route("/realized", methods=["GET"])
+@query_budget(4)
+@portfolio_required
+def get_realized(portfolio: Portfolio):
+    """
+    Realized P&L per stock plus the open tax lots behind current holdings.
+
+    Reads the running `realized_gains` totals and the open `tax_lots`, so
+    the cost is proportional to open positions, not to trade history.
+    `unmatched_quantity` counts shares sold with no open lot behind them;
+    they are left out of proceeds and cost until `flask rebuild-tax-lots`
+    finds their lots.
+    """
+    realized = db.session.execute(
+        db.select(
+            RealizedGain.stock_id,
+            Stock.symbol,
+            RealizedGain.quantity_sold,
+            RealizedGain.proceeds,
+            RealizedGain.cost_basis,
+            RealizedGain.unmatched_quantity,
         )
-        .scalars()
-        .all()
-    )
-    data = [model_to_dict(t) for t in txs]
-    for tx in data:
-        tx["symbol"] = (
-            db.session.execute(
-                db.select(Stock.symbol).filter_by(stock_id=tx["stock_id"])
-            )
-            .one()
-            .symbol[:-3]
+        .join(Stock, Stock.stock_id == RealizedGain.stock_id)
+        .where(RealizedGain.portfolio_id == portfolio.portfolio_id)
+        .order_by(Stock.symbol)
+    ).all()
+    lots = db.session.execute(
+        db.select(
+            TaxLot.lot_id,
+            TaxLot.stock_id,
+            Stock.symbol,
+            TaxLot.opened_at,
+            TaxLot.quantity,
+            TaxLot.remaining_quantity,
+            TaxLot.cost_per_share,
         )
-    return jsonify(data), HTTPStatus.OK
+        .join(Stock, Stock.stock_id == TaxLot.stock_id)
+        .where(TaxLot.portfolio_id == portfolio.portfolio_id)
+        .order_by(Stock.symbol, TaxLot.opened_at, TaxLot.lot_id)
+    ).all()
+
+    proceeds = sum((row.proceeds for row in realized), Decimal(0))
+    cost_basis = sum((row.cost_basis for row in realized), Decimal(0))
+    return jsonify(
+        {
+            "method": current_app.config.get("TAX_LOT_METHOD", "FIFO"),
+            "realized": [
+                {
+                    "stock_id": row.stock_id,
+                    "symbol": row.symbol,
+                    "quantity_sold": sanitize_value(row.quantity_sold),
+                    "proceeds": sanitize_value(row.proceeds),
+                    "cost_basis": sanitize_value(row.cost_basis),
+                    "realized_pnl": sanitize_value(row.proceeds - row.cost_basis),
+                    "unmatched_quantity": sanitize_value(row.unmatched_quantity),
+                }
+                for row in realized
+            ],
+            "open_lots": [
+                {
+                    "lot_id": lot.lot_id,
+                    "stock_id": lot.stock_id,
+                    "symbol": lot.symbol,
+                    "opened_at": sanitize_value(lot.opened_at),
+                    "quantity": sanitize_value(lot.quantity),
+                    "remaining_quantity": sanitize_value(lot.remaining_quantity),
+                    "cost_per_share": sanitize_value(lot.cost_per_share),
+                    "cost_basis": sanitize_value(
+                        lot.remaining_quantity * lot.cost_per_share
+                    ),
+                }
+                for lot in lots
+            ],
+            "totals": {
+                "proceeds": sanitize_value(proceeds),
+                "cost_basis": sanitize_value(cost_basis),
+                "realized_pnl": sanitize_value(proceeds - cost_basis),
+                "open_cost_basis": sanitize_value(
+                    sum(
+                        (lot.remaining_quantity * lot.cost_per_share for lot in lots),
+                        Decimal(0),
+                    )
+                ),
+            },
+        }
+    ), HTTPStatus.OK
 
 
-# POST /portfolio/transactions -> execute a buy or sell transaction
-@portfolio_bp_single.route("/transactions", methods=["POST"])
+# GET /portfolio/analytics
+@portfolio_bp_single.route("/analytics", methods=["GET"])
+@query_budget(7)
 @portfolio_required
-def post_transaction(portfolio: Portfolio):
-    """Executes a buy or sell transaction for the current user."""
-    data = request.get_json()
+def get_analytics(portfolio: Portfolio):
+    """
+    Risk and performance metrics for the current holdings over `period`
+    (3m, 6m, 1y, 3y, 5y or max; default 1y).
 
-    # --- Input Validation ---
-    symbol = data.get("symbol")
-    quantity_str = data.get("quantity")
-    tx_type_str = data.get("transaction_type", "").upper()
+    Results are memoized until new bars arrive or the holdings change.
+    """
+    # Imported here so web workers only load NumPy/pandas when analytics is used
+    from app.services.analytics import PERIODS, portfolio_analytics
 
-    if not all([symbol, quantity_str, tx_type_str]):
+    period = request.args.get("period", "1y").lower()
+    if period not in PERIODS:
         return jsonify(
-            {"message": "Missing required fields: symbol, quantity, transaction_type"}
+            {"message": f"'period' must be one of: {', '.join(PERIODS)}."}
         ), HTTPStatus.BAD_REQUEST
 
+    return jsonify(portfolio_analytics(db.session, portfolio, period)), HTTPStatus.OK
+
+
+# GET /portfolio/history
+@portfolio_bp_single.route("/history", methods=["GET"])
+@query_budget(3)
+@portfolio_required
+def get_history(portfolio: Portfolio):
+    """
+    Daily value series for the current user's portfolio, oldest first.
+
+    Served from the precomputed `portfolio_daily_snapshots` with one range
+    scan; optional `from`/`to` ISO dates bound the series. Values are
+    returned as parallel arrays for charting.
+    """
     try:
-        quantity = Decimal(quantity_str)
-        if quantity <= 0:
+        start = request.args.get("from")
+        end = request.args.get("to")
+        start = date.fromisoformat(start) if start else None
+        end = date.fromisoformat(end) if end else None
+    except ValueError:
+        return jsonify(
+            {"message": "'from' and 'to' must be ISO dates (YYYY-MM-DD)."}
+        ), HTTPStatus.BAD_REQUEST
+
+    query = db.select(
+        PortfolioDailySnapshot.date,
+        PortfolioDailySnapshot.cash_balance,
+        PortfolioDailySnapshot.market_value,
+        PortfolioDailySnapshot.cost_basis,
+    ).where(PortfolioDailySnapshot.portfolio_id == portfolio.portfolio_id)
+    if start is not None:
+        query = query.where(PortfolioDailySnapshot.date >= start)
+    if end is not None:
+        query = query.where(PortfolioDailySnapshot.date <= end)
+    rows = db.session.execute(query.order_by(PortfolioDailySnapshot.date)).all()
+
+    return jsonify(
+        {
+            "dates": [row.date.isoformat() for row in rows],
+            "cash_balance": [float(row.cash_balance) for row in rows],
+            "market_value": [float(row.market_value) for row in rows],
+            "cost_basis": [float(row.cost_basis) for row in rows],
+            "total_value": [
+                float(row.cash_balance + row.market_value) for row in rows
+            ],
+        }
+    ), HTTPStatus.OK
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(tx_date: datetime, tx_id: int) -> str:
+    """Opaque keyset cursor pointing just past (transaction_date, transaction_id)."""
+    raw = f"{tx_date.isoformat()}|{tx_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str):
+    try:
+        tx_date, tx_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(tx_date), int(tx_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor.")
+
+
+def _parse_date_bound(value: str):
+    """Parses an ISO date or datetime. Returns (datetime, is_date_only)."""
+    try:
+        if len(value) == 10:
+            return datetime.combine(date.fromisoformat(value), time.min), True
+        return datetime.fromisoformat(value), False
+    except ValueError:
+        raise ValueError("'from' and 'to' must be ISO dates or datetimes.")
+
+
+def _transaction_filters(portfolio: Portfolio, args):
+    """Builds WHERE clauses for the transaction list from the query string."""
+    filters = [Transaction.portfolio_id == portfolio.portfolio_id]
+
+    symbol = args.get("symbol")
+    if symbol:
+        filters.append(Stock.symbol.in_((symbol, f"{symbol}.NS")))
+
+    tx_type = args.get("type")
+    if tx_type:
+        try:
+            filters.append(
+                Transaction.transaction_type == TransactionTypeEnum[tx_type.upper()]
+            )
+        except KeyError:
+            raise ValueError("Invalid type. Must be 'BUY' or 'SELL'.")
+
+    if args.get("from"):
+        start, _ = _parse_date_bound(args["from"])
+        filters.append(Transaction.transaction_date >= start)
+    if args.get("to"):
+        end, date_only = _parse_date_bound(args["to"])
+        if date_only:
+            # A bare date includes the whole day
+            filters.append(Transaction.transaction_date < end + timedelta(days=1))
+        else:
+            filters.append(Transaction.transaction_date <= end)
+
+    if args.get("cursor"):
+        cursor_date, cursor_id = decode_cursor(args["cursor"])
+        filters.append(
+            tuple_(Transaction.transaction_date, Transaction.transaction_id)
+            < tuple_(cursor_date, cursor_id)
+        )
+    return filters
+
+
+# GET /portfolio/transactions
+@portfolio_bp_single.route("/transactions", methods=["GET"])
+@query_budget(3)
+@portfolio_required
+def get_transactions(portfolio: Portfolio):
+    """
+    Gets one page of transactions for the current user's portfolio, newest first.
+
+    Supports `limit`, `cursor` (the previous page's `next_cursor`), `symbol`,
+    `type` (BUY/SELL) and `from`/`to` date filters.
+    """
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        if not 0 < limit <= MAX_PAGE_SIZE:
             raise ValueError
-    except (ValueError, TypeError):
+    except ValueError:
         return jsonify(
-            {"message": "Invalid quantity provided."}
+            {"message": f"limit must be between 1 and {MAX_PAGE_SIZE}."}
         ), HTTPStatus.BAD_REQUEST
 
+    try:
+        filters = _transaction_filters(portfolio, request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    serializer = model_serializer(Transaction)
+    rows = db.session.execute(
+        db.select(*serializer.columns, Stock.symbol)
+        .join(Stock, Stock.stock_id == Transaction.stock_id)
+        .where(*filters)
+        .order_by(
+            Transaction.transaction_date.desc(), Transaction.transaction_id.desc()
+        )
+        .limit(limit + 1)
+    ).all()
+
+    page = rows[:limit]
+    data = []
+    for row in page:
+        tx_data = serializer.row(row)
+        tx_data["symbol"] = row.symbol[:-3]
+        data.append(tx_data)
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.transaction_date, last.transaction_id)
+
+    return jsonify(
+        {"transactions": data, "next_cursor": next_cursor}
+    ), HTTPStatus.OK
+
+
+def parse_order(data) -> OrderRequest:
+    """Validates a single order payload. Raises ValueError with a client message."""
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be JSON.")
+
+    symbol = data.get("symbol")
+    quantity_str = data.get("quantity")
+    tx_type_str = str(data.get("transaction_type") or "").upper()
+
+    if not all([symbol, quantity_str, tx_type_str]):
+        raise ValueError("Missing required fields: symbol, quantity, transaction_type")
+
+    try:
+        quantity = Decimal(str(quantity_str))
+        if not quantity.is_finite() or quantity <= 0:
+            raise ValueError
+    except (ArithmeticError, ValueError, TypeError):
+        raise ValueError("Invalid quantity provided.")
+
     try:
         tx_type = TransactionTypeEnum[tx_type_str]
     except KeyError:
-        return jsonify(
-            {"message": "Invalid transaction_type. Must be 'BUY' or 'SELL'."}
-        ), HTTPStatus.BAD_REQUEST
+        raise ValueError("Invalid transaction_type. Must be 'BUY' or 'SELL'.")
+
+    return OrderRequest(symbol, quantity, tx_type)
+
+
+# POST /portfolio/transactions -> execute a buy or sell transaction
+# No @query_budget: retries add statements and the check would run after the
+# commit; tests/test_query_budgets.py pins one attempt instead.
+@portfolio_bp_single.route("/transactions", methods=["POST"])
+@portfolio_required
+def post_transaction(portfolio: Portfolio):
+    """Executes a buy or sell transaction for the current user."""
+    data = request.get_json()
+
+    # --- Input Validation ---
+    try:
+        order = parse_order(data)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+    symbol, quantity, tx_type = order.symbol, order.quantity, order.transaction_type
 
     # --- Database Operations ---
     stock = db.session.execute(
@@ -210,7 +544,18 @@ def post_transaction(portfolio: Portfolio):
             {"message": f"Stock with symbol '{symbol}' not found."}
         ), HTTPStatus.NOT_FOUND
 
-    try:
+    idempotency_key = request.headers.get("Idempotency-Key")
+    fingerprint = request_fingerprint(data) if idempotency_key else ""
+
+    def place_order():
+        lock_portfolio(db.session, portfolio)  # type: ignore
+        if idempotency_key:
+            stored = find_idempotent_response(
+                db.session, portfolio, idempotency_key, fingerprint  # type: ignore
+            )
+            if stored:
+                return stored
+
         # Use the service to execute the transaction
         transaction = execute_transaction(
             db.session,  # type: ignore
@@ -218,16 +563,234 @@ def post_transaction(portfolio: Portfolio):
             stock,
             quantity,
             tx_type,
+            locked=True,
         )
-        db.session.commit()
-        return jsonify(model_to_dict(transaction)), HTTPStatus.CREATED
+        db.session.flush()
+        body = model_to_dict(transaction)
+        if idempotency_key:
+            save_idempotent_response(
+                db.session,  # type: ignore
+                portfolio,
+                idempotency_key,
+                fingerprint,
+                body,
+                HTTPStatus.CREATED,
+            )
+        return body, HTTPStatus.CREATED
+
+    try:
+        body, status = run_in_transaction(
+            db.session,  # type: ignore
+            place_order,
+            max_attempts=current_app.config.get("TRADE_MAX_ATTEMPTS", 3),
+        )
+        return jsonify(body), status
+    except IdempotencyKeyReuseError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.UNPROCESSABLE_ENTITY
     except PortfolioServiceError as e:
-        db.session.rollback()
         return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+    except IntegrityError:
+        # A concurrent request with the same Idempotency-Key committed first
+        stored = idempotency_key and find_idempotent_response(
+            db.session, portfolio, idempotency_key, fingerprint  # type: ignore
+        )
+        if stored:
+            return jsonify(stored[0]), stored[1]
+        traceback.print_exc()
+        return jsonify(
+            {"message": "An unexpected error occurred."}
+        ), HTTPStatus.INTERNAL_SERVER_ERROR
     except Exception:
-        db.session.rollback()
         # Log the full exception here in a real application
         traceback.print_exc()
         return jsonify(
             {"message": "An unexpected error occurred."}
         ), HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+MAX_BATCH_ORDERS = 100
+
+
+# POST /portfolio/orders:batch -> execute many buy/sell orders atomically
+@portfolio_bp_single.route("/orders:batch", methods=["POST"])
+@portfolio_required
+def post_order_batch(portfolio: Portfolio):
+    """
+    Executes a list of orders in one database transaction.
+
+    Body: {"orders": [{"symbol", "quantity", "transaction_type"}, ...]}.
+    Either every order fills or none do; the response lists a result per
+    order, in request order.
+    """
+    data = request.get_json(silent=True) or {}
+    raw_orders = data.get("orders")
+    if not isinstance(raw_orders, list) or not raw_orders:
+        return jsonify(
+            {"message": "orders must be a non-empty list."}
+        ), HTTPStatus.BAD_REQUEST
+    if len(raw_orders) > MAX_BATCH_ORDERS:
+        return jsonify(
+            {"message": f"A batch may contain at most {MAX_BATCH_ORDERS} orders."}
+        ), HTTPStatus.BAD_REQUEST
+
+    orders, errors = [], {}
+    for index, raw in enumerate(raw_orders):
+        try:
+            orders.append(parse_order(raw))
+        except ValueError as e:
+            errors[index] = str(e)
+    if errors:
+        return _batch_rejection("Invalid orders.", errors, len(raw_orders))
+
+    def place_orders():
+        transactions = execute_batch(db.session, portfolio, orders)  # type: ignore
+        db.session.flush()
+        return [model_to_dict(tx) for tx in transactions]
+
+    try:
+        filled = run_in_transaction(
+            db.session,  # type: ignore
+            place_orders,
+            max_attempts=current_app.config.get("TRADE_MAX_ATTEMPTS", 3),
+        )
+    except BatchRejectedError as e:
+        return _batch_rejection(str(e), e.errors, len(orders))
+    except Exception:
+        traceback.print_exc()
+        return jsonify(
+            {"message": "An unexpected error occurred."}
+        ), HTTPStatus.INTERNAL_SERVER_ERROR
+
+    results = [
+        {"index": index, "status": "filled", "transaction": tx}
+        for index, tx in enumerate(filled)
+    ]
+    return jsonify({"results": results}), HTTPStatus.CREATED
+
+
+def _batch_rejection(message, errors, count):
+    results = [
+        {"index": index, "status": "rejected", "message": errors[index]}
+        if index in errors
+        else {"index": index, "status": "not_executed"}
+        for index in range(count)
+    ]
+    return jsonify({"message": message, "results": results}), HTTPStatus.BAD_REQUEST
+
+
+def _order_to_dict(order: PendingOrder, symbol: str):
+    return {**model_to_dict(order), "symbol": symbol}
+
+
+# POST /portfolio/orders -> place a limit or stop order
+@portfolio_bp_single.route("/orders", methods=["POST"])
+@portfolio_required
+def post_pending_order(portfolio: Portfolio):
+    """
+    Places a resting order that fills when the live price reaches `price`.
+
+    Body: {"symbol", "quantity", "transaction_type", "order_type", "price"}
+    with order_type LIMIT (fill at `price` or better) or STOP (fill at market
+    once `price` is crossed). Cash and holdings are checked when the order
+    fills, not when it is placed.
+    """
+    data = request.get_json(silent=True)
+    try:
+        order = parse_order(data)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), HTTPStatus.BAD_REQUEST
+
+    try:
+        order_type = OrderTypeEnum[str(data.get("order_type") or "").upper()]
+    except KeyError:
+        return jsonify(
+            {"message": "Invalid order_type. Must be 'LIMIT' or 'STOP'."}
+        ), HTTPStatus.BAD_REQUEST
+    try:
+        price = Decimal(str(data.get("price")))
+        if not price.is_finite() or price <= 0:
+            raise ValueError
+    except (ArithmeticError, ValueError, TypeError):
+        return jsonify({"message": "Invalid price provided."}), HTTPStatus.BAD_REQUEST
+
+    stock = db.session.execute(
+        db.select(Stock).filter_by(symbol=order.symbol)
+    ).scalar_one_or_none()
+    if not stock:
+        return jsonify(
+            {"message": f"Stock with symbol '{order.symbol}' not found."}
+        ), HTTPStatus.NOT_FOUND
+
+    pending = PendingOrder(
+        portfolio_id=portfolio.portfolio_id,
+        stock_id=stock.stock_id,
+        side=order.transaction_type,
+        order_type=order_type,
+        quantity=order.quantity,
+        price=price,
+    )
+    db.session.add(pending)
+    db.session.commit()
+    return jsonify(_order_to_dict(pending, stock.symbol)), HTTPStatus.CREATED
+
+
+# GET /portfolio/orders?status=OPEN -> list limit and stop orders, newest first
+@portfolio_bp_single.route("/orders", methods=["GET"])
+@query_budget(3)
+@portfolio_required
+def get_pending_orders(portfolio: Portfolio):
+    query = (
+        db.select(PendingOrder, Stock.symbol)
+        .join(Stock, Stock.stock_id == PendingOrder.stock_id)
+        .where(PendingOrder.portfolio_id == portfolio.portfolio_id)
+        .order_by(PendingOrder.created_at.desc(), PendingOrder.order_id.desc())
+    )
+    status = request.args.get("status")
+    if status:
+        try:
+            query = query.where(PendingOrder.status == OrderStatusEnum[status.upper()])
+        except KeyError:
+            return jsonify({"message": "Invalid status."}), HTTPStatus.BAD_REQUEST
+
+    return jsonify(
+        {
+            "orders": [
+                _order_to_dict(order, symbol)
+                for order, symbol in db.session.execute(query)
+            ]
+        }
+    ), HTTPStatus.OK
+
+
+# DELETE /portfolio/orders/<order_id> -> cancel an open order
+@portfolio_bp_single.route("/orders/<int:order_id>", methods=["DELETE"])
+@portfolio_required
+def cancel_pending_order(portfolio: Portfolio, order_id: int):
+    """
+    Cancels an OPEN order. The ingestion process drops it from its order
+    book on its next sync; an order that fires before then is skipped at
+    execution because it is no longer OPEN.
+    """
+    result = db.session.execute(
+        db.update(PendingOrder)
+        .where(
+            PendingOrder.order_id == order_id,
+            PendingOrder.portfolio_id == portfolio.portfolio_id,
+            PendingOrder.status == OrderStatusEnum.OPEN,
+        )
+        .values(status=OrderStatusEnum.CANCELLED)
+    )
+    db.session.commit()
+    if result.rowcount:
+        return jsonify({"message": "Order cancelled."}), HTTPStatus.OK
+
+    status = db.session.scalar(
+        db.select(PendingOrder.status).filter_by(
+            order_id=order_id, portfolio_id=portfolio.portfolio_id
+        )
+    )
+    if status is None:
+        return jsonify({"message": "Order not found."}), HTTPStatus.NOT_FOUND
+    return jsonify(
+        {"message": f"Order is already {status.value.lower()}."}
+    ), HTTPStatus.CONFLICT
@@ -0,0 +1,144 @@
+"""
+Fast JSON serialization for API responses.
+
+`model_serializer` compiles, once per mapped class, a function that turns an
+instance (or a row of its columns) into a JSON-ready dict using per-column
+converters chosen from the column types. `OrjsonProvider` plugs orjson into
+Flask's `app.json` when it is installed.
+"""
+
+import enum
+from datetime import date, datetime
+from decimal import Decimal
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime, Enum, Float, Numeric, inspect
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def _to_float(value):
+    return None if value is None else float(value)
+
+
+def _to_isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+def _to_enum_value(value):
+    return None if value is None else value.value
+
+
+def _column_converter(column) -> Optional[Callable[[Any], Any]]:
+    """Picks the converter for a column; None means the value is already JSON-safe."""
+    column_type = column.type
+    if isinstance(column_type, Enum):
+        return _to_enum_value if column_type.enum_class is not None else None
+    if isinstance(column_type, Float):
+        return None
+    if isinstance(column_type, Numeric):
+        return _to_float
+    if isinstance(column_type, (DateTime, Date)):
+        return _to_isoformat
+    return None
+
+
+class ModelSerializer:
+    """Precompiled column-to-dict serializer for one mapped class."""
+
+    def __init__(self, model):
+        mapper = inspect(model)
+        attrs = [
+            prop
+            for prop in mapper.column_attrs
+            if prop.columns[0].table is mapper.local_table
+        ]
+        self.model = model
+        self.keys: Tuple[str, ...] = tuple(prop.key for prop in attrs)
+        self.names: Tuple[str, ...] = tuple(prop.columns[0].name for prop in attrs)
+        self.columns = tuple(getattr(model, key) for key in self.keys)
+        self.converters = tuple(_column_converter(prop.columns[0]) for prop in attrs)
+        self._getter = attrgetter(*self.keys)
+        self._plain = [
+            i for i, converter in enumerate(self.converters) if converter is None
+        ]
+        self._converted = [
+            (i, converter)
+            for i, converter in enumerate(self.converters)
+            if converter is not None
+        ]
+
+    def row(self, values) -> Dict[str, Any]:
+        """Serializes a tuple of column values in `self.columns` order."""
+        names = self.names
+        data = {names[i]: values[i] for i in self._plain}
+        for i, converter in self._converted:
+            data[names[i]] = converter(values[i])
+        return data
+
+    def rows(self, rows: Iterable) -> List[Dict[str, Any]]:
+        row = self.row
+        return [row(values) for values in rows]
+
+    def __call__(self, obj) -> Dict[str, Any]:
+        values = self._getter(obj)
+        if len(self.keys) == 1:
+            values = (values,)
+        return self.row(values)
+
+
+_serializers: Dict[type, ModelSerializer] = {}
+
+
+def model_serializer(model) -> ModelSerializer:
+    """Returns the cached serializer for a mapped class, building it on first use."""
+    serializer = _serializers.get(model)
+    if serializer is None:
+        serializer = _serializers[model] = ModelSerializer(model)
+    return serializer
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Decimals are emitted as floats and enums as their values, matching the
+    existing API responses; datetimes use ISO 8601.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=_default).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=option),
+            mimetype=self.mimetype,
+        )
+
+
+def init_json(app) -> None:
+    """Installs the orjson provider on `app` when orjson is available."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
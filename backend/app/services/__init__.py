@@ -1,5 +1,6 @@
 from .portfolio_service import execute_transaction, PortfolioServiceError
+from .quote_book import Quote, QuoteBook, quote_book
 
 __all__ = [
-    "execute_transaction", "PortfolioServiceError"
+    "execute_transaction", "PortfolioServiceError", "Quote", "QuoteBook", "quote_book"
 ]
\ No newline at end of file
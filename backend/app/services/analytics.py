@@ -0,0 +1,204 @@
+"""
+Risk and performance analytics for a portfolio's current holdings.
+
+Closes for the holdings and the benchmark basket are read in one query and
+pivoted into a date x stock matrix; every metric is then computed with
+vectorized NumPy/pandas operations over that matrix.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import Float, cast
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Holding, Portfolio, Stock, TimeSeries
+from ..tasks.universe import TOP_50_STOCKS
+from .data_versions import data_versions
+from .identity_cache import TTLCache
+
+TRADING_DAYS = 252
+
+PERIODS = {"3m": 91, "6m": 182, "1y": 365, "3y": 3 * 365, "5y": 5 * 365, "max": None}
+
+METRICS = ("annualized_return", "volatility", "max_drawdown", "sharpe_ratio", "beta")
+
+# Keys carry the data versions, so stale entries are never hit; the TTL and
+# LRU bound only reclaim memory.
+analytics_cache = TTLCache(maxsize=1000, ttl=24 * 3600.0)
+
+
+def load_close_matrix(
+    db_session: Session, stock_ids: List[int], start: Optional[date] = None
+) -> pd.DataFrame:
+    """
+    Returns closes as a DataFrame indexed by date with one float column per
+    stock id, aligned on the union of trading days and forward-filled over
+    gaps. Reads every series with a single query; closes are cast to float
+    in SQL so no Decimal objects are built per row.
+    """
+    query = db.select(
+        TimeSeries.date, TimeSeries.stock_id, cast(TimeSeries.close, Float)
+    ).where(TimeSeries.stock_id.in_(stock_ids))
+    if start is not None:
+        query = query.where(TimeSeries.date >= start)
+    # A Core read on the session's connection skips ORM row processing
+    rows = db_session.connection().execute(query).fetchall()
+    if not rows:
+        return pd.DataFrame(columns=stock_ids, dtype=float)
+
+    frame = pd.DataFrame.from_records(rows, columns=["date", "stock_id", "close"])
+    matrix = frame.pivot(index="date", columns="stock_id", values="close")
+    return matrix.sort_index().ffill().reindex(columns=stock_ids)
+
+
+def _max_drawdown(returns: pd.DataFrame) -> pd.Series:
+    wealth = (1 + returns.fillna(0)).cumprod()
+    return (wealth / wealth.cummax() - 1).min()
+
+
+def _metrics(
+    returns: pd.DataFrame, market: pd.Series, risk_free_rate: float
+) -> pd.DataFrame:
+    """Per-column metrics for a matrix of daily returns, all vectorized."""
+    mean = returns.mean()
+    std = returns.std()
+    excess = mean - risk_free_rate / TRADING_DAYS
+
+    market_dev = market - market.mean()
+    beta = (returns.sub(returns.mean()).mul(market_dev, axis=0)).sum() / (
+        market_dev.pow(2).sum()
+    )
+
+    return pd.DataFrame(
+        {
+            "annualized_return": mean * TRADING_DAYS,
+            "volatility": std * np.sqrt(TRADING_DAYS),
+            "max_drawdown": _max_drawdown(returns),
+            "sharpe_ratio": excess / std.replace(0, np.nan) * np.sqrt(TRADING_DAYS),
+            "beta": beta,
+        }
+    )
+
+
+def _clean(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) or np.isinf(value) else value
+
+
+def _metrics_dict(row) -> dict:
+    return {name: _clean(row[name]) for name in METRICS}
+
+
+def compute_analytics(
+    db_session: Session, portfolio: Portfolio, period: str, risk_free_rate: float
+) -> dict:
+    """
+    Computes risk metrics for the portfolio's current holdings over `period`.
+
+    The portfolio series applies today's market-value weights to the
+    holdings' daily returns. Beta is measured against an equal-weight
+    basket of `TOP_50_STOCKS` (a NIFTY 50 proxy).
+    """
+    holdings = db_session.execute(
+        db.select(Holding.stock_id, Stock.symbol, Holding.quantity)
+        .join(Stock, Stock.stock_id == Holding.stock_id)
+        .where(Holding.portfolio_id == portfolio.portfolio_id, Holding.quantity > 0)
+        .order_by(Stock.symbol)
+    ).all()
+    basket = list(
+        db_session.scalars(
+            db.select(Stock.stock_id).where(Stock.symbol.in_(TOP_50_STOCKS))
+        )
+    )
+
+    days = PERIODS[period]
+    start = date.today() - timedelta(days=days) if days else None
+    held_ids = [h.stock_id for h in holdings]
+    all_ids = list(dict.fromkeys(held_ids + basket))
+    closes = load_close_matrix(db_session, all_ids, start) if all_ids else None
+
+    result = {
+        "period": period,
+        "as_of": None,
+        "observations": 0,
+        "benchmark": {"name": "NIFTY 50 equal-weight", "constituents": len(basket)},
+        "portfolio": dict.fromkeys(METRICS),
+        "holdings": [],
+        "correlation": {"symbols": [h.symbol for h in holdings], "matrix": []},
+    }
+    if not holdings or closes is None or len(closes) < 2:
+        return result
+
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    if basket:
+        market = returns[basket].mean(axis=1).fillna(0)
+    else:
+        market = pd.Series(np.nan, index=returns.index)
+    held = returns[held_ids]
+
+    last_close = closes[held_ids].iloc[-1].to_numpy()
+    quantities = np.asarray([float(h.quantity) for h in holdings])
+    values = np.nan_to_num(last_close * quantities)
+    weights = values / values.sum() if values.sum() else values
+    portfolio_returns = held.fillna(0).to_numpy() @ weights
+
+    table = _metrics(held, market, risk_free_rate)
+    overall = _metrics(
+        pd.DataFrame({"portfolio": portfolio_returns}, index=held.index),
+        market,
+        risk_free_rate,
+    ).loc["portfolio"]
+
+    result["as_of"] = closes.index[-1].isoformat()
+    result["observations"] = len(returns)
+    result["portfolio"] = _metrics_dict(overall)
+    result["holdings"] = [
+        {
+            "stock_id": h.stock_id,
+            "symbol": h.symbol,
+            "weight": _clean(weight),
+            **_metrics_dict(table.loc[h.stock_id]),
+        }
+        for h, weight in zip(holdings, weights)
+    ]
+    result["correlation"]["matrix"] = [
+        [_clean(v) for v in row] for row in held.corr().to_numpy()
+    ]
+    return result
+
+
+def portfolio_analytics(
+    db_session: Session, portfolio: Portfolio, period: str
+) -> dict:
+    """
+    Memoized `compute_analytics`.
+
+    Entries are keyed on the holdings and on the per-stock data versions, so
+    a cached result is served until the next bar is written for any stock
+    (or the portfolio trades).
+    """
+    holdings_key = tuple(
+        db_session.execute(
+            db.select(Holding.stock_id, Holding.quantity)
+            .where(Holding.portfolio_id == portfolio.portfolio_id)
+            .order_by(Holding.stock_id)
+        ).all()
+    )
+    key = (portfolio.portfolio_id, period, holdings_key, data_versions.universe_tag())
+    cached = analytics_cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = compute_analytics(
+        db_session,
+        portfolio,
+        period,
+        current_app.config.get("ANALYTICS_RISK_FREE_RATE", 0.0),
+    )
+    analytics_cache.set(key, result)
+    return result
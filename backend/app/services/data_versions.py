@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import update
+
+from ..extensions import db
+from ..models import Stock
+
+
+class DataVersions:
+    """
+    Per-process snapshot of every stock's `data_version`.
+
+    The ingest path bumps `stocks.data_version` in the same transaction that
+    writes bars; web workers re-read the whole map at most once per `ttl`
+    seconds, so conditional requests can be answered without a query.
+    """
+
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions: Dict[int, int] = {}
+        self._universe_tag = ""
+        self._expires = 0.0
+        self.refreshes = 0
+
+    def _refresh(self) -> None:
+        versions = dict(
+            db.session.execute(db.select(Stock.stock_id, Stock.data_version)).all()
+        )
+        digest = hashlib.blake2b(digest_size=12)
+        for stock_id in sorted(versions):
+            digest.update(f"{stock_id}:{versions[stock_id]};".encode())
+        self._versions = versions
+        self._universe_tag = digest.hexdigest()
+        self._expires = time.monotonic() + self.ttl
+        self.refreshes += 1
+
+    def _current(self) -> None:
+        if self._expires < time.monotonic():
+            with self._lock:
+                if self._expires < time.monotonic():
+                    self._refresh()
+
+    def get(self, stock_id: int) -> Optional[int]:
+        """Returns the data version of one stock, or None if it is unknown."""
+        self._current()
+        return self._versions.get(stock_id)
+
+    def universe_tag(self) -> str:
+        """Digest of all (stock_id, data_version) pairs; changes with any stock."""
+        self._current()
+        return self._universe_tag
+
+    def versions(self) -> Dict[int, int]:
+        """The stock_id -> data_version map; treat it as read-only."""
+        self._current()
+        return self._versions
+
+    def clear(self) -> None:
+        """Forgets the snapshot so the next read queries the database."""
+        with self._lock:
+            self._versions = {}
+            self._universe_tag = ""
+            self._expires = 0.0
+
+
+data_versions = DataVersions()
+
+
+def init_data_versions(app) -> None:
+    data_versions.ttl = app.config.get("DATA_VERSION_TTL_SECONDS", 1.0)
+
+
+def bump_data_versions(stock_ids: Iterable[int]) -> None:
+    """
+    Increments `data_version` for `stock_ids` in the current transaction.
+
+    Call it next to the write that changes a stock's bars, before committing;
+    web workers see the new version within `DATA_VERSION_TTL_SECONDS`.
+    """
+    stock_ids = sorted(set(stock_ids))
+    if not stock_ids:
+        return
+    db.session.execute(
+        update(Stock)
+        .where(Stock.stock_id.in_(stock_ids))
+        .values(data_version=Stock.data_version + 1)
+        .execution_options(synchronize_session=False)
+    )
@@ -0,0 +1,162 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..extensions import db
+from ..models import Portfolio, User
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire after `ttl` seconds.
+
+    Tracks hits, misses and invalidations for the metrics endpoint.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def peek(self, key):
+        """Like `get`, but not counted as a lookup and not marking `key` as used."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                return None
+            return item[0]
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+@dataclass(frozen=True)
+class CachedIdentity:
+    """Column snapshot of a user plus the id of their portfolio, if known."""
+
+    user_id: int
+    username: str
+    email: str
+    password_hash: str
+    created_at: datetime
+    portfolio_id: Optional[int] = None
+
+
+identity_cache = TTLCache()
+
+
+def init_identity_cache(app) -> None:
+    identity_cache.ttl = app.config.get("IDENTITY_CACHE_TTL_SECONDS", 60.0)
+    identity_cache.maxsize = app.config.get("IDENTITY_CACHE_MAX_SIZE", 10000)
+
+
+def _snapshot(user: User, portfolio_id: Optional[int] = None) -> CachedIdentity:
+    return CachedIdentity(
+        user_id=user.user_id,
+        username=user.username,
+        email=user.email,
+        password_hash=user.password_hash,
+        created_at=user.created_at,
+        portfolio_id=portfolio_id,
+    )
+
+
+def _attach_user(entry: CachedIdentity) -> User:
+    """Attaches a cached user to the current session without emitting SQL."""
+    user = User(
+        username=entry.username,
+        email=entry.email,
+        password_hash=entry.password_hash,
+    )
+    user.user_id = entry.user_id
+    user.created_at = entry.created_at
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+
+def load_user(identity: str) -> Optional[User]:
+    """JWT user loader: serves the user from the cache when possible."""
+    entry = identity_cache.get(identity)
+    if entry is not None:
+        return _attach_user(entry)
+
+    user = db.session.scalar(db.select(User).filter_by(user_id=identity))
+    if user is not None:
+        identity_cache.set(identity, _snapshot(user))
+    return user
+
+
+def load_portfolio(identity: str, claimed_id: Optional[int] = None):
+    """
+    Resolves the portfolio for a JWT identity.
+
+    Uses the cached or token-claimed portfolio id for a primary-key lookup
+    (served from the session identity map when already loaded) and only
+    falls back to searching by user when the id is unknown or stale. The
+    entry is peeked: `load_user` already counted this request's lookup.
+    """
+    entry = identity_cache.peek(identity)
+    portfolio_id = (entry and entry.portfolio_id) or claimed_id
+    if portfolio_id is not None:
+        portfolio = db.session.get(Portfolio, portfolio_id)
+        if portfolio is not None and str(portfolio.user_id) == str(identity):
+            return portfolio
+
+    portfolio = db.session.execute(
+        db.select(Portfolio).filter_by(user_id=identity)
+    ).scalar_one_or_none()
+    if portfolio is not None and entry is not None:
+        identity_cache.set(
+            identity, replace(entry, portfolio_id=portfolio.portfolio_id)
+        )
+    return portfolio
+
+
+def invalidate_identity(identity) -> None:
+    """Drops cached data for a user; call after creating or deleting a portfolio."""
+    identity_cache.invalidate(str(identity))
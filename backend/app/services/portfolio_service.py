@@ -1,14 +1,24 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass
 from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+from flask import current_app
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 from ..models import (
     Portfolio,
     Stock,
     Holding,
     Transaction,
     TransactionTypeEnum,
-    TimeSeries,
+    IdempotencyKey,
 )
 from ..extensions import db
+from .quote_book import lookup_quote, lookup_quotes
+from .tax_lots import lot_method_from_config, record_trade
 
 
 class PortfolioServiceError(Exception):
@@ -17,17 +27,116 @@ class PortfolioServiceError(Exception):
     pass
 
 
-def get_latest_stock_price(db_session: Session, stock_id: int) -> Decimal:
-    """Fetches the most recent closing price for a stock."""
-    latest_price_entry = db_session.execute(
-        db.select(TimeSeries.close)
-        .filter(TimeSeries.stock_id == stock_id)
-        .order_by(TimeSeries.date.desc())
-        .limit(1)
+class IdempotencyKeyReuseError(PortfolioServiceError):
+    """Raised when an Idempotency-Key is reused with a different request body."""
+
+    pass
+
+
+T = TypeVar("T")
+
+
+def lock_portfolio(db_session: Session, portfolio: Portfolio) -> Portfolio:
+    """
+    Re-reads the portfolio row with SELECT ... FOR UPDATE.
+
+    Concurrent trades on the same portfolio queue behind this lock until the
+    current transaction ends, and `portfolio` is refreshed with the committed
+    balance.
+    """
+    return db_session.execute(
+        db.select(Portfolio)
+        .filter_by(portfolio_id=portfolio.portfolio_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).scalar_one()
+
+
+def run_in_transaction(
+    db_session: Session,
+    work: Callable[[], T],
+    max_attempts: int = 3,
+    backoff: float = 0.05,
+) -> T:
+    """
+    Runs `work` and commits, retrying on lock conflicts.
+
+    Deadlocks, serialization failures, "database is locked" errors and
+    optimistic version conflicts roll back and retry with exponential
+    backoff, up to `max_attempts` times. Any other exception rolls back and
+    propagates.
+    """
+    for attempt in range(max_attempts):
+        try:
+            result = work()
+            db_session.commit()
+            return result
+        except (OperationalError, StaleDataError):
+            db_session.rollback()
+            if attempt == max_attempts - 1:
+                raise
+            time.sleep(backoff * 2**attempt)
+        except Exception:
+            db_session.rollback()
+            raise
+    raise RuntimeError("unreachable")
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a JSON request body, used to detect key reuse."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def find_idempotent_response(
+    db_session: Session, portfolio: Portfolio, key: str, fingerprint: str
+) -> Optional[Tuple[Any, int]]:
+    """Returns the stored (body, status) for `key`, or None if it is new."""
+    stored = db_session.execute(
+        db.select(IdempotencyKey).filter_by(
+            portfolio_id=portfolio.portfolio_id, key=key
+        )
     ).scalar_one_or_none()
-    if not latest_price_entry:
+    if stored is None:
+        return None
+    if stored.request_hash != fingerprint:
+        raise IdempotencyKeyReuseError(
+            "Idempotency-Key was already used with a different request."
+        )
+    return stored.response_body, stored.response_status
+
+
+def save_idempotent_response(
+    db_session: Session,
+    portfolio: Portfolio,
+    key: str,
+    fingerprint: str,
+    body: Any,
+    status: int,
+) -> None:
+    """Records a response in the current transaction so it commits with the trade."""
+    db_session.add(
+        IdempotencyKey(
+            portfolio_id=portfolio.portfolio_id,
+            key=key,
+            request_hash=fingerprint,
+            response_status=int(status),
+            response_body=body,
+        )
+    )
+
+
+def get_latest_stock_price(db_session: Session, stock: Stock) -> Decimal:
+    """
+    Fetches the most recent price for a stock from the quote book, falling
+    back to the latest stored close when the cached quote is stale.
+    """
+    quote = lookup_quote(
+        db_session, stock, current_app.config.get("QUOTE_MAX_AGE_SECONDS")
+    )
+    if not quote:
         raise PortfolioServiceError("No price data available for this stock.")
-    return Decimal(str(latest_price_entry))
+    return Decimal(str(quote.price))
 
 
 def execute_transaction(
@@ -36,17 +145,26 @@ def execute_transaction(
     stock: Stock,
     quantity: Decimal,
     transaction_type: TransactionTypeEnum,
+    locked: bool = False,
 ):
     """
     Executes a buy or sell transaction, ensuring atomicity.
+
+    The portfolio and holding rows are locked for the rest of the caller's
+    transaction, so concurrent orders cannot both pass the balance or
+    quantity checks. Callers that already hold the portfolio lock from
+    `lock_portfolio` pass `locked=True` to skip taking it again.
     """
-    price_per_share = get_latest_stock_price(db_session, stock.stock_id)
+    price_per_share = get_latest_stock_price(db_session, stock)
     total_cost = quantity * price_per_share
 
+    if not locked:
+        lock_portfolio(db_session, portfolio)
     holding = db_session.execute(
-        db.select(Holding).filter_by(
-            portfolio_id=portfolio.portfolio_id, stock_id=stock.stock_id
-        )
+        db.select(Holding)
+        .filter_by(portfolio_id=portfolio.portfolio_id, stock_id=stock.stock_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
     ).scalar_one_or_none()
 
     if transaction_type == TransactionTypeEnum.BUY:
@@ -93,6 +211,177 @@ def execute_transaction(
         price_per_share=price_per_share,
     )
     db_session.add(new_transaction)
+    record_trade(
+        db_session, new_transaction, lot_method_from_config(current_app.config)
+    )
 
     # The caller is responsible for committing the session
     return new_transaction
+
+
+LIMIT_NOT_REACHED = "Limit price not reached."
+
+
+@dataclass
+class OrderRequest:
+    """
+    A single validated order inside a batch. With `limit_price` set, the
+    order is rejected unless it fills at that price or better.
+    """
+
+    symbol: str
+    quantity: Decimal
+    transaction_type: TransactionTypeEnum
+    limit_price: Optional[Decimal] = None
+
+
+class BatchRejectedError(PortfolioServiceError):
+    """Raised when any order in a batch fails; carries per-order reasons."""
+
+    def __init__(self, message: str, errors: Dict[int, str]):
+        super().__init__(message)
+        self.errors = errors
+
+
+def execute_batch(
+    db_session: Session, portfolio: Portfolio, orders: List[OrderRequest]
+) -> List[Transaction]:
+    """
+    Executes many orders against one portfolio as a single unit.
+
+    Stocks, prices and holdings are loaded with one bulk query each. Cash and
+    per-stock quantities are validated on the net effect of the whole batch
+    (buys are applied before sells), and either every order is applied or
+    `BatchRejectedError` is raised with the reason for each failing order.
+    The caller is responsible for committing.
+    """
+    symbols = {order.symbol for order in orders}
+    stocks = {
+        stock.symbol: stock
+        for stock in db_session.scalars(
+            db.select(Stock).where(Stock.symbol.in_(symbols))
+        )
+    }
+    quotes = lookup_quotes(
+        db_session, stocks.values(), current_app.config.get("QUOTE_MAX_AGE_SECONDS")
+    )
+
+    errors: Dict[int, str] = {}
+    prices: Dict[int, Decimal] = {}
+    for index, order in enumerate(orders):
+        stock = stocks.get(order.symbol)
+        if stock is None:
+            errors[index] = f"Stock with symbol '{order.symbol}' not found."
+        elif stock.stock_id not in quotes:
+            errors[index] = "No price data available for this stock."
+        else:
+            prices[index] = Decimal(str(quotes[stock.stock_id].price))
+            if order.limit_price is not None and (
+                prices[index] > order.limit_price
+                if order.transaction_type == TransactionTypeEnum.BUY
+                else prices[index] < order.limit_price
+            ):
+                errors[index] = LIMIT_NOT_REACHED
+    if errors:
+        if all(error == LIMIT_NOT_REACHED for error in errors.values()):
+            raise BatchRejectedError("Some limit prices were not reached.", errors)
+        raise BatchRejectedError(
+            "Some orders reference unknown or unpriced stocks.", errors
+        )
+
+    lock_portfolio(db_session, portfolio)
+    holdings = {
+        holding.stock_id: holding
+        for holding in db_session.scalars(
+            db.select(Holding)
+            .where(
+                Holding.portfolio_id == portfolio.portfolio_id,
+                Holding.stock_id.in_([stock.stock_id for stock in stocks.values()]),
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    }
+
+    # Net validation across the batch
+    net_cash = Decimal(0)
+    net_quantity: Dict[int, Decimal] = {}
+    for index, order in enumerate(orders):
+        stock_id = stocks[order.symbol].stock_id
+        amount = order.quantity * prices[index]
+        if order.transaction_type == TransactionTypeEnum.BUY:
+            net_cash -= amount
+            delta = order.quantity
+        else:
+            net_cash += amount
+            delta = -order.quantity
+        net_quantity[stock_id] = net_quantity.get(stock_id, Decimal(0)) + delta
+
+    if portfolio.cash_balance + net_cash < 0:
+        errors.update(
+            (index, "Insufficient balance for batch.")
+            for index, order in enumerate(orders)
+            if order.transaction_type == TransactionTypeEnum.BUY
+        )
+    for index, order in enumerate(orders):
+        if order.transaction_type != TransactionTypeEnum.SELL:
+            continue
+        stock_id = stocks[order.symbol].stock_id
+        held = holdings[stock_id].quantity if stock_id in holdings else Decimal(0)
+        if held + net_quantity[stock_id] < 0:
+            errors[index] = "Insufficient holdings to sell."
+    if errors:
+        raise BatchRejectedError("Batch rejected.", errors)
+
+    # Apply: buys first so sells in the same batch can draw on them
+    method = lot_method_from_config(current_app.config)
+    transactions: List[Optional[Transaction]] = [None] * len(orders)
+    ordered = sorted(
+        range(len(orders)),
+        key=lambda i: orders[i].transaction_type != TransactionTypeEnum.BUY,
+    )
+    for index in ordered:
+        order = orders[index]
+        stock_id = stocks[order.symbol].stock_id
+        price = prices[index]
+        amount = order.quantity * price
+        holding = holdings.get(stock_id)
+
+        if order.transaction_type == TransactionTypeEnum.BUY:
+            portfolio.cash_balance -= amount
+            if holding is None:
+                holding = Holding(
+                    portfolio_id=portfolio.portfolio_id,
+                    stock_id=stock_id,
+                    quantity=order.quantity,
+                    average_cost_per_share=price,
+                )
+                db_session.add(holding)
+                holdings[stock_id] = holding
+            else:
+                old_total_value = holding.quantity * holding.average_cost_per_share
+                holding.quantity += order.quantity
+                holding.average_cost_per_share = (
+                    old_total_value + amount
+                ) / holding.quantity
+        else:
+            portfolio.cash_balance += amount
+            holding.quantity -= order.quantity
+
+        transactions[index] = Transaction(
+            portfolio_id=portfolio.portfolio_id,
+            stock_id=stock_id,
+            transaction_type=order.transaction_type,
+            quantity=order.quantity,
+            price_per_share=price,
+        )
+        db_session.add(transactions[index])
+        record_trade(db_session, transactions[index], method)
+
+    for holding in holdings.values():
+        if holding.quantity == 0:
+            if holding in db_session.new:
+                db_session.expunge(holding)
+            else:
+                db_session.delete(holding)
+    return transactions  # type: ignore
@@ -0,0 +1,223 @@
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session, aliased
+
+from ..extensions import db
+from ..models import Stock, TimeSeries
+
+
+@dataclass(frozen=True)
+class Quote:
+    """Latest known price and day bar for a single symbol."""
+
+    symbol: str
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    updated_at: float
+
+    @property
+    def price(self) -> float:
+        return self.close
+
+    def is_fresh(self, max_age: Optional[float]) -> bool:
+        if max_age is None:
+            return True
+        return time.time() - self.updated_at <= max_age
+
+    def to_ohlc_dict(self):
+        return {
+            "date": self.date.isoformat(),
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+        }
+
+
+class QuoteBook:
+    """
+    Thread-safe in-memory map of symbol -> latest Quote.
+
+    Fed by the WebSocket tick handler and read by the trade and /stocks
+    paths so that quote lookups are O(1) dictionary reads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._quotes: Dict[str, Quote] = {}
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def get(self, symbol: str, max_age: Optional[float] = None) -> Optional[Quote]:
+        """Returns the quote for `symbol`, or None if missing or older than `max_age`."""
+        with self._lock:
+            quote = self._quotes.get(symbol)
+        if quote is None or not quote.is_fresh(max_age):
+            return None
+        return quote
+
+    def put(self, quote: Quote) -> Quote:
+        """
+        Stores `quote` unless the book already holds a newer one for the
+        symbol, so a database read racing a live tick cannot roll the price
+        back. Returns whichever quote is kept.
+        """
+        with self._lock:
+            return self._put(quote)
+
+    def load(self, quotes: Iterable[Quote]) -> None:
+        with self._lock:
+            for quote in quotes:
+                self._put(quote)
+
+    def _put(self, quote: Quote) -> Quote:
+        current = self._quotes.get(quote.symbol)
+        if current is not None and (current.date, current.updated_at) >= (
+            quote.date,
+            quote.updated_at,
+        ):
+            return current
+        self._quotes[quote.symbol] = quote
+        return quote
+
+    def apply_tick(
+        self,
+        symbol: str,
+        price: float,
+        day_volume: Optional[int] = None,
+        today: Optional[date] = None,
+    ) -> Quote:
+        """Merges a live tick into the symbol's day bar and returns the new quote."""
+        today = today or date.today()
+        now = time.time()
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            if quote is None or quote.date != today:
+                quote = Quote(
+                    symbol=symbol,
+                    date=today,
+                    open=price,
+                    high=price,
+                    low=price,
+                    close=price,
+                    volume=day_volume or 0,
+                    updated_at=now,
+                )
+            else:
+                quote = replace(
+                    quote,
+                    high=max(quote.high, price),
+                    low=min(quote.low, price),
+                    close=price,
+                    volume=day_volume if day_volume is not None else quote.volume,
+                    updated_at=now,
+                )
+            self._quotes[symbol] = quote
+        return quote
+
+    def clear(self) -> None:
+        with self._lock:
+            self._quotes.clear()
+
+
+quote_book = QuoteBook()
+
+
+def quote_from_row(symbol: str, ts, read_at: Optional[float] = None) -> Quote:
+    """
+    Builds a Quote from a TimeSeries row read at `read_at` (default now).
+
+    Today's bar is stamped with the time the read started, so a tick that
+    lands while the query runs is newer and `QuoteBook.put` keeps it; a bar
+    from an earlier day is stamped with the end of that day and is never
+    fresh.
+    """
+    read_at = time.time() if read_at is None else read_at
+    day_end = datetime.combine(ts.date + timedelta(days=1), datetime.min.time())
+    return Quote(
+        symbol=symbol,
+        date=ts.date,
+        open=float(ts.open),
+        high=float(ts.high),
+        low=float(ts.low),
+        close=float(ts.close),
+        volume=ts.volume,
+        updated_at=min(read_at, day_end.timestamp()),
+    )
+
+
+def warm_quote_book(book: QuoteBook = quote_book) -> int:
+    """Loads the latest bar of every stock into the quote book."""
+    from ..api.stocks.services import get_all_stocks_with_latest_ohlc
+
+    read_at = time.time()
+    book.load(
+        quote_from_row(stock.symbol, ts, read_at)
+        for stock, ts in get_all_stocks_with_latest_ohlc()
+        if ts is not None
+    )
+    return len(book)
+
+
+def lookup_quote(
+    db_session: Session, stock: Stock, max_age: Optional[float]
+) -> Optional[Quote]:
+    """
+    Reads a quote from the book, falling back to the database when the cached
+    entry is missing or older than `max_age` seconds. DB reads are written
+    back to the book unless a newer tick has arrived meanwhile, in which case
+    the tick is returned.
+    """
+    quote = quote_book.get(stock.symbol, max_age)
+    if quote is not None:
+        return quote
+
+    read_at = time.time()
+    ts = db_session.scalar(
+        db.select(TimeSeries)
+        .filter_by(stock_id=stock.stock_id)
+        .order_by(TimeSeries.date.desc())
+        .limit(1)
+    )
+    if ts is None:
+        return None
+    return quote_book.put(quote_from_row(stock.symbol, ts, read_at))
+
+
+def lookup_quotes(
+    db_session: Session, stocks: Iterable[Stock], max_age: Optional[float]
+) -> Dict[int, Quote]:
+    """
+    Bulk form of `lookup_quote`: returns stock_id -> Quote for `stocks`,
+    loading every stale or missing entry from the database in one query.
+    """
+    from ..api.stocks.services import latest_bars_subquery
+
+    quotes: Dict[int, Quote] = {}
+    missing: Dict[int, Stock] = {}
+    for stock in stocks:
+        quote = quote_book.get(stock.symbol, max_age)
+        if quote is None:
+            missing[stock.stock_id] = stock
+        else:
+            quotes[stock.stock_id] = quote
+
+    if missing:
+        read_at = time.time()
+        bars = latest_bars_subquery(list(missing))
+        latest = aliased(TimeSeries, bars)
+        for ts in db_session.scalars(db.select(latest).where(bars.c.rn == 1)):
+            quotes[ts.stock_id] = quote_book.put(
+                quote_from_row(missing[ts.stock_id].symbol, ts, read_at)
+            )
+    return quotes
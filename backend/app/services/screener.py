@@ -0,0 +1,440 @@
+"""
+Universe-wide stock screener over precomputed technical indicators.
+
+Each web worker keeps an `IndicatorState` per stock (rolling windows plus
+EMA/RSI state as of the stock's last completed bar) and a columnar table
+holding the latest value of every indicator: one float64 array per field,
+one slot per stock. When a stock's data version changes only its new bars
+are read and folded in, so requests never recompute indicators; a screen
+is a handful of vectorized comparisons and one argsort over the arrays.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import Float, cast
+
+from ..extensions import db
+from ..models import Stock, TimeSeries
+from .data_versions import data_versions
+
+SMA_WINDOWS = (20, 50, 200)
+EMA_WINDOWS = (12, 26)
+RSI_WINDOW = 14
+VOLUME_WINDOW = 20
+YEAR_BARS = 252
+
+FIELDS = (
+    "close",
+    "change_pct",
+    "volume",
+    "avg_volume_20",
+    "sma_20",
+    "sma_50",
+    "sma_200",
+    "ema_12",
+    "ema_26",
+    "rsi_14",
+    "high_52w",
+    "low_52w",
+    "pct_from_52w_high",
+    "pct_from_52w_low",
+)
+
+FIELD_INDEX = {name: i for i, name in enumerate(FIELDS)}
+
+NAN = float("nan")
+
+
+def _ema_step(ema: Optional[float], close: float, window: int) -> float:
+    # Seeded with the first close, like pandas' ewm(span=window, adjust=False)
+    if ema is None:
+        return close
+    return ema + 2.0 / (window + 1) * (close - ema)
+
+
+def _rsi_step(average: float, value: float, changes: int) -> float:
+    # A plain mean over the first RSI_WINDOW changes, then Wilder smoothing
+    return average + (value - average) / min(changes, RSI_WINDOW)
+
+
+def _tail_mean(completed: deque, current: float, window: int) -> float:
+    if len(completed) + 1 < window:
+        return NAN
+    return (sum(islice(reversed(completed), window - 1)) + current) / window
+
+
+def _pct(value: float, base: float) -> float:
+    return (value / base - 1) * 100 if base else NAN
+
+
+class IndicatorState:
+    """
+    Incremental indicator inputs for one stock.
+
+    Completed bars are folded into bounded windows and the EMA/RSI
+    accumulators exactly once. The latest bar is kept apart because the
+    tick writer keeps revising it during the session; `values()` combines
+    it with the completed state without mutating it.
+    """
+
+    def __init__(self):
+        self.closes: deque = deque(maxlen=YEAR_BARS)
+        self.highs: deque = deque(maxlen=YEAR_BARS)
+        self.lows: deque = deque(maxlen=YEAR_BARS)
+        self.volumes: deque = deque(maxlen=YEAR_BARS)
+        self.emas: Dict[int, Optional[float]] = dict.fromkeys(EMA_WINDOWS)
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.changes = 0
+        self.current: Optional[Tuple[date, float, float, float, int]] = None
+
+    @property
+    def date(self) -> Optional[date]:
+        return self.current[0] if self.current else None
+
+    @property
+    def date_iso(self) -> Optional[str]:
+        return self.current[0].isoformat() if self.current else None
+
+    def add(self, bars: Sequence[Tuple[date, float, float, float, int]]) -> None:
+        """
+        Adds date-ordered (date, high, low, close, volume) bars. A bar for the
+        latest known date revises it; bars older than that are ignored.
+        """
+        latest = self.current
+        bars = [bar for bar in bars if latest is None or bar[0] >= latest[0]]
+        if not bars:
+            return
+        if latest is not None and bars[0][0] > latest[0]:
+            bars.insert(0, latest)
+        self._fold(bars[:-1])
+        self.current = tuple(bars[-1])
+
+    def _fold(self, bars) -> None:
+        # Runs once per stored bar on a cold start, so it works on locals
+        if not bars:
+            return
+        previous = self.closes[-1] if self.closes else None
+        gain, loss, changes = self.avg_gain, self.avg_loss, self.changes
+        alphas = [2.0 / (window + 1) for window in EMA_WINDOWS]
+        emas = [self.emas[window] for window in EMA_WINDOWS]
+        for _, _, _, close, _ in bars:
+            if previous is not None:
+                change = close - previous
+                changes += 1
+                k = changes if changes < RSI_WINDOW else RSI_WINDOW
+                gain += ((change if change > 0 else 0.0) - gain) / k
+                loss += ((-change if change < 0 else 0.0) - loss) / k
+            emas = [
+                close if ema is None else ema + alpha * (close - ema)
+                for ema, alpha in zip(emas, alphas)
+            ]
+            previous = close
+        self.avg_gain, self.avg_loss, self.changes = gain, loss, changes
+        self.emas = dict(zip(EMA_WINDOWS, emas))
+        self.highs.extend(bar[1] for bar in bars)
+        self.lows.extend(bar[2] for bar in bars)
+        self.closes.extend(bar[3] for bar in bars)
+        self.volumes.extend(bar[4] for bar in bars)
+
+    def _rsi(self, close: float) -> float:
+        if not self.closes or self.changes + 1 < RSI_WINDOW:
+            return NAN
+        change = close - self.closes[-1]
+        gain = _rsi_step(self.avg_gain, max(change, 0.0), self.changes + 1)
+        loss = _rsi_step(self.avg_loss, max(-change, 0.0), self.changes + 1)
+        if not loss:
+            return 100.0 if gain else 50.0
+        return 100 - 100 / (1 + gain / loss)
+
+    def values(self) -> List[float]:
+        """Indicator values in `FIELDS` order, NaN where history is too short."""
+        if self.current is None:
+            return [NAN] * len(FIELDS)
+        _, high, low, close, volume = self.current
+        previous = self.closes[-1] if self.closes else NAN
+        high_52w = max(islice(reversed(self.highs), YEAR_BARS - 1), default=high)
+        low_52w = min(islice(reversed(self.lows), YEAR_BARS - 1), default=low)
+        high_52w, low_52w = max(high_52w, high), min(low_52w, low)
+        return [
+            close,
+            _pct(close, previous),
+            float(volume),
+            _tail_mean(self.volumes, volume, VOLUME_WINDOW),
+            *(_tail_mean(self.closes, close, window) for window in SMA_WINDOWS),
+            *(_ema_step(self.emas[window], close, window) for window in EMA_WINDOWS),
+            self._rsi(close),
+            high_52w,
+            low_52w,
+            _pct(close, high_52w),
+            _pct(close, low_52w),
+        ]
+
+
+@dataclass(frozen=True)
+class ScreenerTable:
+    """
+    Column-oriented snapshot of the screener: `values[FIELD_INDEX[f]]` is
+    the float64 column of field `f`, with one slot per stock. Sectors are
+    stored as small integer codes so they can be filtered with an array
+    comparison.
+    """
+
+    stock_ids: List[int]
+    symbols: List[str]
+    company_names: List[str]
+    sector_codes: np.ndarray
+    sectors: List[str]
+    dates: List[Optional[str]]
+    values: np.ndarray
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @classmethod
+    def empty(cls) -> "ScreenerTable":
+        return cls(
+            [],
+            [],
+            [],
+            np.empty(0, dtype=np.int32),
+            [],
+            [],
+            np.empty((len(FIELDS), 0)),
+        )
+
+    def screen(
+        self,
+        ranges: Sequence[Tuple[str, Optional[float], Optional[float]]] = (),
+        sector: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        limit: Optional[int] = None,
+    ) -> Tuple[int, np.ndarray]:
+        """
+        Returns (match count, positions of the first `limit` matches).
+
+        `ranges` holds inclusive (field, min, max) bounds, either of which
+        may be None; stocks whose value is missing never match a bound.
+        Matches are ordered by `sort` (missing values last), or by stock id.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for field, low, high in ranges:
+            column = self.values[FIELD_INDEX[field]]
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        if sector is not None:
+            if sector not in self.sectors:
+                return 0, np.empty(0, dtype=np.intp)
+            mask &= self.sector_codes == self.sectors.index(sector)
+
+        positions = np.flatnonzero(mask)
+        count = len(positions)
+        if sort is not None:
+            keys = self.values[FIELD_INDEX[sort], positions]
+            if descending:
+                keys = -keys
+            if limit is not None and limit < count:
+                # Only keys up to the limit-th smallest (found in linear time)
+                # can be returned, so only those are sorted
+                kth = np.partition(keys, limit - 1)[limit - 1]
+                if not np.isnan(kth):
+                    keep = keys <= kth
+                    positions, keys = positions[keep], keys[keep]
+            # Positions are ascending, so a stable sort breaks ties by stock id
+            positions = positions[np.argsort(keys, kind="stable")]
+        return count, positions[:limit]
+
+    def rows(self, positions: Iterable[int]) -> List[dict]:
+        positions = np.asarray(positions, dtype=np.intp)
+        block = self.values[:, positions].T
+        values = block.astype(object)
+        values[np.isnan(block)] = None
+        return [
+            {
+                "stock_id": self.stock_ids[i],
+                "symbol": self.symbols[i],
+                "company_name": self.company_names[i],
+                "sector": self.sectors[self.sector_codes[i]],
+                "date": self.dates[i],
+                **dict(zip(FIELDS, row)),
+            }
+            for i, row in zip(positions.tolist(), values.tolist())
+        ]
+
+
+class Screener:
+    """
+    Keeps a `ScreenerTable` in step with the stored daily bars.
+
+    `table()` compares every stock's data version with the one its
+    indicators were computed at. Stocks seen for the first time load the
+    last `SCREENER_LOOKBACK_DAYS` of bars; changed stocks read only bars from
+    their latest known date on. Readers get an immutable snapshot, so a
+    refresh never blocks a screen in progress.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[int, IndicatorState] = {}
+        self._versions: Dict[int, int] = {}
+        self._tag: Optional[str] = None
+        self._table = ScreenerTable.empty()
+        self.refreshes = 0
+        self.stocks_recomputed = 0
+        self.last_refresh_ms = 0.0
+
+    def clear(self) -> None:
+        """Drops every computed indicator; the next `table()` recomputes all."""
+        with self._lock:
+            self._states.clear()
+            self._versions.clear()
+            self._tag = None
+            self._table = ScreenerTable.empty()
+
+    def table(self) -> ScreenerTable:
+        tag = data_versions.universe_tag()
+        if tag != self._tag:
+            with self._lock:
+                if tag != self._tag:
+                    self._refresh(tag)
+        return self._table
+
+    def _refresh(self, tag: str) -> None:
+        start = time.perf_counter()
+        versions = dict(data_versions.versions())
+        stale = [
+            stock_id
+            for stock_id, version in versions.items()
+            if self._versions.get(stock_id) != version
+        ]
+        new = [stock_id for stock_id in stale if stock_id not in self._states]
+        changed = [stock_id for stock_id in stale if stock_id in self._states]
+
+        for stock_id in new:
+            self._states[stock_id] = IndicatorState()
+        for stock_id in set(self._states) - set(versions):
+            del self._states[stock_id]
+        self._load_history(new)
+        self._load_updates(changed)
+
+        if new or len(self._states) != len(self._table):
+            table = self._build_table()
+        else:
+            table = self._update_table(changed)
+
+        self._table = table
+        self._versions = versions
+        self._tag = tag
+        self.refreshes += 1
+        self.stocks_recomputed += len(stale)
+        self.last_refresh_ms = (time.perf_counter() - start) * 1000
+
+    @staticmethod
+    def _bar_columns():
+        return (
+            TimeSeries.stock_id,
+            TimeSeries.date,
+            cast(TimeSeries.high, Float).label("high"),
+            cast(TimeSeries.low, Float).label("low"),
+            cast(TimeSeries.close, Float).label("close"),
+            TimeSeries.volume,
+        )
+
+    def _fold_rows(self, query) -> None:
+        # A Core read on the session's connection skips ORM row processing
+        rows = db.session.connection().execute(query).fetchall()
+        for stock_id, bars in groupby(rows, key=itemgetter(0)):
+            self._states[stock_id].add([bar[1:] for bar in bars])
+
+    def _load_history(self, stock_ids: List[int]) -> None:
+        if not stock_ids:
+            return
+        # A calendar-day bound keeps this a plain range scan of the
+        # (stock_id, date) index rather than a per-stock ranking
+        days = current_app.config.get("SCREENER_LOOKBACK_DAYS", 450)
+        self._fold_rows(
+            db.select(*self._bar_columns())
+            .where(
+                TimeSeries.stock_id.in_(stock_ids),
+                TimeSeries.date >= date.today() - timedelta(days=days),
+            )
+            .order_by(TimeSeries.stock_id, TimeSeries.date)
+        )
+
+    def _load_updates(self, stock_ids: List[int]) -> None:
+        if not stock_ids:
+            return
+        known = [self._states[i].date for i in stock_ids if self._states[i].date]
+        query = db.select(*self._bar_columns()).where(
+            TimeSeries.stock_id.in_(stock_ids)
+        )
+        if len(known) == len(stock_ids):
+            query = query.where(TimeSeries.date >= min(known))
+        self._fold_rows(query.order_by(TimeSeries.stock_id, TimeSeries.date))
+
+    def _build_table(self) -> ScreenerTable:
+        stocks = db.session.execute(
+            db.select(Stock.stock_id, Stock.symbol, Stock.company_name, Stock.sector)
+            .where(Stock.stock_id.in_(list(self._states)))
+            .order_by(Stock.stock_id)
+        ).all()
+        sectors = sorted({stock.sector or "" for stock in stocks})
+        states = [self._states[stock.stock_id] for stock in stocks]
+        return ScreenerTable(
+            stock_ids=[s.stock_id for s in stocks],
+            symbols=[s.symbol for s in stocks],
+            company_names=[s.company_name for s in stocks],
+            sector_codes=np.array(
+                [sectors.index(s.sector or "") for s in stocks], dtype=np.int32
+            ),
+            sectors=sectors,
+            dates=[state.date_iso for state in states],
+            # One contiguous row per field, so each filter scans a single column
+            values=np.array(
+                [state.values() for state in states], dtype=np.float64
+            )
+            .reshape(len(states), len(FIELDS))
+            .T.copy(),
+        )
+
+    def _update_table(self, stock_ids: List[int]) -> ScreenerTable:
+        table = self._table
+        values = table.values.copy()
+        dates = list(table.dates)
+        positions = np.searchsorted(table.stock_ids, stock_ids)
+        for stock_id, position in zip(stock_ids, positions.tolist()):
+            state = self._states[stock_id]
+            values[:, position] = state.values()
+            dates[position] = state.date_iso
+        return ScreenerTable(
+            table.stock_ids,
+            table.symbols,
+            table.company_names,
+            table.sector_codes,
+            table.sectors,
+            dates,
+            values,
+        )
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "stocks": len(self._table),
+            "refreshes": self.refreshes,
+            "stocks_recomputed": self.stocks_recomputed,
+            "last_refresh_ms": self.last_refresh_ms,
+        }
+
+
+screener = Screener()
@@ -0,0 +1,133 @@
+import enum
+from decimal import Decimal
+from typing import List, Sequence
+
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import RealizedGain, TaxLot, Transaction, TransactionTypeEnum
+
+ZERO = Decimal("0")
+
+
+class LotMethod(enum.Enum):
+    """Order in which a SELL draws down open lots."""
+
+    FIFO = "FIFO"
+    LIFO = "LIFO"
+    AVERAGE = "AVERAGE"
+
+
+def lot_method_from_config(config) -> LotMethod:
+    return LotMethod[str(config.get("TAX_LOT_METHOD", "FIFO")).upper()]
+
+
+def consume_lots(lots: Sequence, quantity: Decimal, method: LotMethod) -> Decimal:
+    """
+    Draws `quantity` shares from `lots` (oldest first, each with
+    `remaining_quantity` and `cost_per_share`) and returns their cost.
+
+    FIFO and LIFO take whole lots in date order. AVERAGE charges the pooled
+    average cost, draws quantities oldest first and re-prices the lots left
+    open at that average so the pool's cost stays consistent. Returns the
+    cost of the shares actually matched, which is less than asked for only
+    when the lots run out.
+    """
+    if method == LotMethod.AVERAGE:
+        held = open_quantity(lots)
+        if not held:
+            return ZERO
+        average = (
+            sum((lot.remaining_quantity * lot.cost_per_share for lot in lots), ZERO)
+            / held
+        )
+        matched = min(quantity, held)
+        left = matched
+        for lot in lots:
+            take = min(lot.remaining_quantity, left)
+            lot.remaining_quantity -= take
+            left -= take
+            if lot.remaining_quantity:
+                lot.cost_per_share = average
+        return matched * average
+
+    cost = ZERO
+    left = quantity
+    for lot in lots if method == LotMethod.FIFO else reversed(lots):
+        if not left:
+            break
+        take = min(lot.remaining_quantity, left)
+        cost += take * lot.cost_per_share
+        lot.remaining_quantity -= take
+        left -= take
+    return cost
+
+
+def open_quantity(lots: Sequence) -> Decimal:
+    """Shares left in `lots`; a SELL beyond this is unmatched."""
+    return sum((lot.remaining_quantity for lot in lots), ZERO)
+
+
+def _open_lots(db_session: Session, portfolio_id: int, stock_id: int) -> List[TaxLot]:
+    return list(
+        db_session.scalars(
+            db.select(TaxLot)
+            .filter_by(portfolio_id=portfolio_id, stock_id=stock_id)
+            .order_by(TaxLot.opened_at, TaxLot.lot_id)
+            .with_for_update()
+        )
+    )
+
+
+def record_trade(
+    db_session: Session, transaction: Transaction, method: LotMethod
+) -> None:
+    """
+    Updates tax lots and realized gains for a trade in the caller's
+    transaction.
+
+    A BUY opens a lot dated with the transaction, as the rebuild does. A
+    SELL matches the stock's open lots in `method` order, deletes the lots
+    it empties and adds the matched shares' quantity, proceeds and cost to
+    the stock's `RealizedGain` row. Shares sold beyond the open lots (bought
+    before lots were kept, until `flask rebuild-tax-lots` is run) have no
+    cost, so they are counted in `unmatched_quantity` instead of being
+    booked as gains. Only the open lots of one stock are read, never the
+    trade history.
+    """
+    if transaction.transaction_type == TransactionTypeEnum.BUY:
+        db_session.flush()
+        db_session.add(
+            TaxLot(
+                portfolio_id=transaction.portfolio_id,
+                stock_id=transaction.stock_id,
+                opened_at=transaction.transaction_date,
+                quantity=transaction.quantity,
+                remaining_quantity=transaction.quantity,
+                cost_per_share=transaction.price_per_share,
+                transaction=transaction,
+            )
+        )
+        return
+
+    lots = _open_lots(db_session, transaction.portfolio_id, transaction.stock_id)
+    matched = min(transaction.quantity, open_quantity(lots))
+    cost = consume_lots(lots, matched, method)
+    for lot in lots:
+        if not lot.remaining_quantity:
+            db_session.delete(lot)
+
+    realized = db_session.execute(
+        db.select(RealizedGain).filter_by(
+            portfolio_id=transaction.portfolio_id, stock_id=transaction.stock_id
+        )
+    ).scalar_one_or_none()
+    if realized is None:
+        realized = RealizedGain(
+            portfolio_id=transaction.portfolio_id, stock_id=transaction.stock_id
+        )
+        db_session.add(realized)
+    realized.quantity_sold += matched
+    realized.proceeds += matched * transaction.price_per_share
+    realized.cost_basis += cost
+    realized.unmatched_quantity += transaction.quantity - matched
@@ -0,0 +1,167 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional
+
+from flask import current_app
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models import Holding, Portfolio, Stock, TimeSeries
+from .quote_book import quote_book
+
+ZERO = Decimal("0")
+
+
+def _to_decimal(value) -> Optional[Decimal]:
+    if value is None:
+        return None
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+@dataclass
+class HoldingValuation:
+    stock_id: int
+    symbol: str
+    quantity: Decimal
+    average_cost_per_share: Decimal
+    price: Optional[Decimal]
+    previous_close: Optional[Decimal]
+    cost_basis: Decimal = ZERO
+    # None while the stock has no price at all
+    market_value: Optional[Decimal] = None
+    unrealized_pnl: Optional[Decimal] = None
+    day_change: Optional[Decimal] = None
+    weight: Optional[Decimal] = None
+
+    @property
+    def priced(self) -> bool:
+        return self.price is not None
+
+
+@dataclass
+class PortfolioValuation:
+    cash_balance: Decimal
+    holdings: List[HoldingValuation]
+    market_value: Decimal = ZERO
+    cost_basis: Decimal = ZERO
+    unrealized_pnl: Decimal = ZERO
+    day_change: Decimal = ZERO
+    # Holdings without a price are left out of every total above
+    unpriced_holdings: int = 0
+
+    @property
+    def total_value(self) -> Decimal:
+        return self.cash_balance + self.market_value
+
+
+def _holding_price_rows(db_session: Session, portfolio_id: int):
+    """
+    Loads every holding with its latest and previous close in one query.
+
+    The window-ranked bars are restricted to the portfolio's stocks and the
+    two newest bars are pivoted into columns with conditional aggregation.
+    """
+    from ..api.stocks.services import latest_bars_subquery
+
+    held = db.select(Holding.stock_id).where(Holding.portfolio_id == portfolio_id)
+    bars = latest_bars_subquery(
+        held, columns=(TimeSeries.stock_id, TimeSeries.date, TimeSeries.close)
+    )
+
+    return db_session.execute(
+        db.select(
+            Holding.stock_id,
+            Stock.symbol,
+            Holding.quantity,
+            Holding.average_cost_per_share,
+            func.max(case((bars.c.rn == 1, bars.c.date))).label("latest_date"),
+            func.max(case((bars.c.rn == 1, bars.c.close))).label("latest_close"),
+            func.max(case((bars.c.rn == 2, bars.c.close))).label("previous_close"),
+        )
+        .join(Stock, Stock.stock_id == Holding.stock_id)
+        .outerjoin(
+            bars, and_(bars.c.stock_id == Holding.stock_id, bars.c.rn <= 2)
+        )
+        .where(Holding.portfolio_id == portfolio_id)
+        .group_by(
+            Holding.holding_id,
+            Holding.stock_id,
+            Stock.symbol,
+            Holding.quantity,
+            Holding.average_cost_per_share,
+        )
+        .order_by(Stock.symbol)
+    ).all()
+
+
+def _current_prices(row, max_age: Optional[float]):
+    """
+    Returns (price, previous close) for a holding row, preferring a fresh
+    quote from the quote book over the stored close.
+    """
+    latest_close = _to_decimal(row.latest_close)
+    previous_close = _to_decimal(row.previous_close)
+
+    quote = quote_book.get(row.symbol, max_age)
+    if quote is None or row.latest_date is None:
+        return latest_close, previous_close
+
+    if quote.date > row.latest_date:
+        # The quote is a newer day than anything persisted yet
+        previous_close = latest_close
+    return _to_decimal(quote.price), previous_close
+
+
+def value_portfolio(db_session: Session, portfolio: Portfolio) -> PortfolioValuation:
+    """
+    Values a portfolio's holdings at current prices in a single pass.
+
+    Market value, cost basis, unrealized P&L, day change and weight are
+    computed per holding with Decimal arithmetic, together with totals. A
+    holding with no price has no market value, P&L or weight and is left out
+    of the totals, so they keep `market_value - cost_basis == unrealized_pnl`.
+    """
+    max_age = current_app.config.get("QUOTE_MAX_AGE_SECONDS")
+    valuation = PortfolioValuation(
+        cash_balance=_to_decimal(portfolio.cash_balance), holdings=[]
+    )
+
+    for row in _holding_price_rows(db_session, portfolio.portfolio_id):
+        price, previous_close = _current_prices(row, max_age)
+        item = HoldingValuation(
+            stock_id=row.stock_id,
+            symbol=row.symbol,
+            quantity=_to_decimal(row.quantity),
+            average_cost_per_share=_to_decimal(row.average_cost_per_share),
+            price=price,
+            previous_close=previous_close,
+        )
+        item.cost_basis = item.quantity * item.average_cost_per_share
+        valuation.holdings.append(item)
+        if price is None:
+            valuation.unpriced_holdings += 1
+            continue
+
+        item.market_value = item.quantity * price
+        item.unrealized_pnl = item.market_value - item.cost_basis
+        item.day_change = ZERO
+        if previous_close is not None:
+            item.day_change = item.quantity * (price - previous_close)
+
+        valuation.market_value += item.market_value
+        valuation.cost_basis += item.cost_basis
+        valuation.unrealized_pnl += item.unrealized_pnl
+        valuation.day_change += item.day_change
+
+    for item in valuation.holdings:
+        if item.priced:
+            item.weight = (
+                item.market_value / valuation.market_value
+                if valuation.market_value
+                else ZERO
+            )
+
+    return valuation
@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Protocol
+
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.services.data_versions import bump_data_versions
+from app.tasks.bulk import insert_ignore_duplicates, upsert
+
+
+@dataclass
+class Bar:
+    """A single daily OHLCV bar."""
+
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+
+
+@dataclass
+class SymbolHistory:
+    """Bars fetched for one symbol, plus metadata when it was requested."""
+
+    symbol: str
+    bars: List[Bar] = field(default_factory=list)
+    company_name: Optional[str] = None
+    sector: Optional[str] = None
+
+
+class HistorySource(Protocol):
+    """Anything that can return daily bars for a symbol."""
+
+    def fetch(
+        self, symbol: str, start: Optional[date], with_info: bool
+    ) -> SymbolHistory:
+        """
+        Returns bars for `symbol` from `start` (inclusive) up to today, or the
+        source's default lookback when `start` is None. Company metadata is
+        only required when `with_info` is set.
+        """
+        ...
+
+
+class YFinanceHistorySource:
+    """HistorySource backed by Yahoo Finance via yfinance."""
+
+    def __init__(self, default_period: str = "1mo"):
+        self.default_period = default_period
+
+    def fetch(
+        self, symbol: str, start: Optional[date], with_info: bool
+    ) -> SymbolHistory:
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is None:
+            hist = ticker.history(period=self.default_period)
+        else:
+            hist = ticker.history(start=start)
+
+        history = SymbolHistory(symbol=symbol)
+        if with_info:
+            info = ticker.info
+            history.company_name = info.get("longName", "")
+            history.sector = info.get("sector", "")
+        history.bars = [
+            Bar(
+                date=ts.date(),
+                open=float(row.Open),
+                high=float(row.High),
+                low=float(row.Low),
+                close=float(row.Close),
+                volume=int(row.Volume),
+            )
+            for ts, row in hist.iterrows()
+        ]
+        return history
+
+
+@dataclass
+class BackfillResult:
+    symbols_fetched: int = 0
+    symbols_skipped: int = 0
+    symbols_failed: int = 0
+    bars_inserted: int = 0
+    bars_refreshed: int = 0
+
+
+def _replace_bar(excluded):
+    """Upsert values: the provider's daily bar replaces the stored one."""
+    return {
+        "open": excluded.open,
+        "high": excluded.high,
+        "low": excluded.low,
+        "close": excluded.close,
+        "volume": excluded.volume,
+    }
+
+
+def _last_stored_dates() -> Dict[str, date]:
+    """Returns symbol -> most recent stored bar date, in one grouped query."""
+    return dict(
+        db.session.execute(
+            db.select(Stock.symbol, func.max(TimeSeries.date))
+            .join(TimeSeries, TimeSeries.stock_id == Stock.stock_id)
+            .group_by(Stock.symbol)
+        ).all()
+    )
+
+
+def backfill(
+    symbols: Iterable[str],
+    source: Optional[HistorySource] = None,
+    max_workers: int = 8,
+    today: Optional[date] = None,
+) -> BackfillResult:
+    """
+    Brings stored daily history up to date for `symbols`.
+
+    Each symbol is fetched from its last stored day onwards, and fetches run
+    concurrently on a bounded thread pool. The last stored day may be a
+    partial bar written by the tick writer before the close, so it is
+    replaced with the provider's bar; later days are bulk-inserted, skipping
+    any (stock_id, date) that already exists. Database writes stay on the
+    calling thread.
+    """
+    source = source or YFinanceHistorySource()
+    today = today or date.today()
+    result = BackfillResult()
+
+    stocks = {
+        stock.symbol: stock
+        for stock in db.session.scalars(
+            db.select(Stock).where(Stock.symbol.in_(list(symbols)))
+        )
+    }
+    last_dates = _last_stored_dates()
+
+    jobs = {}
+    for symbol in symbols:
+        last = last_dates.get(symbol)
+        # Today's bar is still moving; it is refreshed once the day is over
+        if last is not None and last >= today:
+            result.symbols_skipped += 1
+            continue
+        jobs[symbol] = (last, symbol not in stocks)
+
+    if not jobs:
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(source.fetch, symbol, start, with_info): symbol
+            for symbol, (start, with_info) in jobs.items()
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                history = future.result()
+                stock = stocks.get(symbol)
+                if stock is None:
+                    stock = Stock(
+                        symbol=symbol,
+                        company_name=history.company_name or "",
+                        sector=history.sector or "",
+                    )
+                    db.session.add(stock)
+                    db.session.flush()
+
+                last = jobs[symbol][0]
+                rows: Dict[date, dict] = {}
+                for bar in history.bars:
+                    if last is None or bar.date >= last:
+                        rows.setdefault(
+                            bar.date,
+                            {
+                                "stock_id": stock.stock_id,
+                                "date": bar.date,
+                                "open": bar.open,
+                                "high": bar.high,
+                                "low": bar.low,
+                                "close": bar.close,
+                                "volume": bar.volume,
+                            },
+                        )
+                refreshed = upsert(
+                    TimeSeries,
+                    [row for day, row in rows.items() if day == last],
+                    [TimeSeries.stock_id, TimeSeries.date],
+                    _replace_bar,
+                )
+                inserted = insert_ignore_duplicates(
+                    TimeSeries, [row for day, row in rows.items() if day != last]
+                )
+                if refreshed or inserted:
+                    bump_data_versions([stock.stock_id])
+                db.session.commit()
+                stocks[symbol] = stock
+                result.symbols_fetched += 1
+                result.bars_inserted += inserted
+                result.bars_refreshed += refreshed
+                print(f"Successfully updated data for {symbol} ({inserted} new bars)")
+            except Exception as e:
+                db.session.rollback()
+                result.symbols_failed += 1
+                print(f"Failed to fetch data for {symbol}: {e}")
+
+    return result
@@ -0,0 +1,229 @@
+import atexit
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case
+
+from app.engines import ingestion_context
+from app.extensions import db
+from app.models import IntradayBar, Stock
+from app.services.data_versions import bump_data_versions
+from app.tasks.bulk import upsert
+
+BAR_WIDTH = timedelta(minutes=1)
+
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive datetime, the form stored in `intraday_bars`."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def minute_start(at: datetime) -> datetime:
+    return at.replace(second=0, microsecond=0)
+
+
+def _merge_bar(excluded) -> Dict[str, Any]:
+    """Upsert values folding the rest of a minute into its stored partial bar."""
+    return {
+        "high": case(
+            (excluded.high > IntradayBar.high, excluded.high), else_=IntradayBar.high
+        ),
+        "low": case(
+            (excluded.low < IntradayBar.low, excluded.low), else_=IntradayBar.low
+        ),
+        "close": excluded.close,
+        "volume": IntradayBar.volume + excluded.volume,
+    }
+
+
+@dataclass
+class OpenBar:
+    """The 1-minute bar currently being built for one symbol."""
+
+    symbol: str
+    start: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int = 0
+
+    def merge(self, price: float, volume: int) -> None:
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        self.volume += volume
+
+
+class BarAggregator:
+    """
+    Rolls live ticks into 1-minute intraday bars.
+
+    Each symbol has one open bar in memory; a tick for a later minute closes
+    it. Closed bars, and open bars whose minute has passed, are bulk-written
+    every `INTRADAY_FLUSH_INTERVAL_SECONDS`. Bar volume is the increase in
+    the feed's cumulative day volume over the minute.
+
+    Stopping writes the open bars too, unfinished. If ticks for the same
+    minute arrive after a restart, they are merged into the stored bar
+    rather than dropped.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.flush_interval = 5.0
+        self._lock = threading.Lock()
+        self._open: Dict[str, OpenBar] = {}
+        self._closed: List[OpenBar] = []
+        self._day_volumes: Dict[str, int] = {}
+        self._stock_ids: Dict[str, int] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.ticks_received = 0
+        self.late_ticks = 0
+        self.bars_written = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.flush_interval = app.config.get("INTRADAY_FLUSH_INTERVAL_SECONDS", 5.0)
+
+    def _volume_delta(self, symbol: str, day_volume: Optional[int]) -> int:
+        if day_volume is None:
+            return 0
+        previous = self._day_volumes.get(symbol)
+        self._day_volumes[symbol] = day_volume
+        if previous is None:
+            return 0
+        # A smaller cumulative volume means the feed started a new session
+        return day_volume - previous if day_volume >= previous else day_volume
+
+    def add(
+        self, symbol: str, price: float, day_volume: Optional[int], at: datetime
+    ) -> None:
+        """Adds a tick received at `at` (naive UTC) to the symbol's open bar."""
+        start = minute_start(at)
+        with self._lock:
+            self.ticks_received += 1
+            volume = self._volume_delta(symbol, day_volume)
+            bar = self._open.get(symbol)
+            if bar is not None and start < bar.start:
+                self.late_ticks += 1
+                return
+            if bar is not None and start == bar.start:
+                bar.merge(price, volume)
+                return
+            if bar is not None:
+                self._closed.append(bar)
+            self._open[symbol] = OpenBar(
+                symbol, start, price, price, price, price, volume
+            )
+
+    def _close_elapsed(self, now: datetime) -> None:
+        for symbol, bar in list(self._open.items()):
+            if bar.start + BAR_WIDTH <= now:
+                self._closed.append(bar)
+                del self._open[symbol]
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="bar-aggregator", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stops the flush thread and writes every bar, open ones included."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush(close_open=True)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing intraday bars: {e}")
+
+    def flush(self, now: Optional[datetime] = None, close_open: bool = False) -> int:
+        """
+        Writes all closed bars in one transaction. Returns bars written.
+
+        With `close_open`, bars still in progress are closed and written too.
+        """
+        with self._lock:
+            self._close_elapsed(now or utcnow())
+            if close_open:
+                self._closed.extend(self._open.values())
+                self._open.clear()
+            closed = self._closed
+            self._closed = []
+        if not closed:
+            return 0
+
+        with ingestion_context(self.app):
+            written = self._write(closed)
+        with self._lock:
+            self.bars_written += written
+        return written
+
+    def _resolve_stock_ids(self, symbols) -> Dict[str, int]:
+        missing = [s for s in symbols if s not in self._stock_ids]
+        if missing:
+            self._stock_ids.update(
+                db.session.execute(
+                    db.select(Stock.symbol, Stock.stock_id).where(
+                        Stock.symbol.in_(missing)
+                    )
+                ).all()
+            )
+        return self._stock_ids
+
+    def _write(self, bars) -> int:
+        stock_ids = self._resolve_stock_ids({bar.symbol for bar in bars})
+        rows = [
+            {
+                "stock_id": stock_ids[bar.symbol],
+                "interval_minutes": 1,
+                "start": bar.start,
+                "open": bar.open,
+                "high": bar.high,
+                "low": bar.low,
+                "close": bar.close,
+                "volume": bar.volume,
+            }
+            for bar in bars
+            if bar.symbol in stock_ids
+        ]
+        if not rows:
+            return 0
+        upsert(
+            IntradayBar,
+            rows,
+            ["stock_id", "interval_minutes", "start"],
+            _merge_bar,
+        )
+        bump_data_versions(row["stock_id"] for row in rows)
+        db.session.commit()
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "ticks_received": self.ticks_received,
+                "late_ticks": self.late_ticks,
+                "bars_open": len(self._open),
+                "bars_pending": len(self._closed),
+                "bars_written": self.bars_written,
+            }
+
+
+bar_aggregator = BarAggregator()
@@ -0,0 +1,84 @@
+import threading
+from typing import Dict
+
+from app.extensions import socketio
+
+# Room joined by clients that want every symbol rather than a watchlist
+ALL_SYMBOLS_ROOM = "*"
+
+
+class PriceBroadcaster:
+    """
+    Aggregates live prices and fans them out to Socket.IO rooms.
+
+    Each symbol has its own room on the /stocks namespace. Every
+    `PRICE_BATCH_INTERVAL_MS` milliseconds the latest price of every symbol
+    that changed is sent as a single `price_batch` frame to that symbol's
+    room, and one combined frame goes to the all-symbols room. Clients only
+    receive what they subscribed to, at most once per interval.
+    """
+
+    def __init__(self, app=None, namespace: str = "/stocks"):
+        self.namespace = namespace
+        self.interval = 0.25
+        self._lock = threading.Lock()
+        self._latest: Dict[str, float] = {}
+        self._running = False
+        self.frames_sent = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.interval = app.config.get("PRICE_BATCH_INTERVAL_MS", 250) / 1000
+
+    def publish(self, symbol: str, price: float) -> None:
+        """Records the latest price for `symbol`; sent on the next flush."""
+        with self._lock:
+            self._latest[symbol] = price
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        socketio.start_background_task(self._run)
+
+    def stop(self) -> None:
+        self._running = False
+
+    def _run(self) -> None:
+        while self._running:
+            socketio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error broadcasting prices: {e}")
+
+    def flush(self) -> int:
+        """Emits one `price_batch` frame per room with pending prices."""
+        with self._lock:
+            latest = self._latest
+            self._latest = {}
+        if not latest:
+            return 0
+
+        frames = 0
+        for symbol, price in latest.items():
+            socketio.emit(
+                "price_batch",
+                [{"symbol": symbol, "price": price}],
+                namespace=self.namespace,
+                to=symbol,
+            )
+            frames += 1
+        socketio.emit(
+            "price_batch",
+            [{"symbol": symbol, "price": price} for symbol, price in latest.items()],
+            namespace=self.namespace,
+            to=ALL_SYMBOLS_ROOM,
+        )
+        frames += 1
+        self.frames_sent += frames
+        return frames
+
+
+price_broadcaster = PriceBroadcaster()
@@ -0,0 +1,60 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+_DIALECT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(model, session=None):
+    """
+    Returns an INSERT for `model` built with the bound dialect's construct,
+    so callers can use `on_conflict_do_nothing` / `on_conflict_do_update`.
+    Falls back to a plain INSERT on other backends.
+    """
+    session = session or db.session
+    name = session.get_bind().dialect.name
+    return _DIALECT_INSERTS.get(name, insert)(model)
+
+
+def _execute_counted(session, stmt, rows) -> int:
+    # A Core execute on the session's connection returns the driver's
+    # rowcount (the ORM bulk path does not); drivers that cannot count an
+    # executemany report -1
+    rowcount = session.connection().execute(stmt, rows).rowcount
+    return rowcount if rowcount >= 0 else len(rows)
+
+
+def insert_ignore_duplicates(model, rows, session=None) -> int:
+    """
+    Bulk-inserts `rows`, skipping any that violate a unique constraint.
+    Returns the number of rows actually inserted.
+    """
+    if not rows:
+        return 0
+    session = session or db.session
+    stmt = dialect_insert(model, session)
+    if hasattr(stmt, "on_conflict_do_nothing"):
+        stmt = stmt.on_conflict_do_nothing()
+    return _execute_counted(session, stmt, rows)
+
+
+def upsert(model, rows, index_elements, set_, session=None) -> int:
+    """
+    Bulk-inserts `rows`; a row that conflicts with an existing one on
+    `index_elements` updates it instead. `set_(excluded)` returns the values
+    to update, where `excluded` holds the row that failed to insert. Other
+    backends get a plain INSERT. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+    session = session or db.session
+    stmt = dialect_insert(model, session)
+    if hasattr(stmt, "on_conflict_do_update"):
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements, set_=set_(stmt.excluded)
+        )
+    return _execute_counted(session, stmt, rows)
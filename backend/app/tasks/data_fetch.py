@@ -1,156 +1,126 @@
-import yfinance as yf
-from app.extensions import db, socketio
-from app.models import Stock, TimeSeries
+from typing import Optional
 
-import pandas as pd
+from flask import current_app
+from app.engines import ingestion_context
+from app.services.quote_book import quote_book, warm_quote_book
+from app.tasks.backfill import backfill
+from app.tasks.tick_writer import tick_writer
+from app.tasks.bar_aggregator import bar_aggregator, utcnow
+from app.tasks.snapshots import snapshot_portfolios
+from app.tasks.intraday_retention import (
+    apply_intraday_retention,
+    retention_days_from_config,
+)
+from app.tasks.broadcaster import price_broadcaster
+from app.tasks.market_data import (
+    MarketDataProvider,
+    Tick,
+    TickRecorder,
+    provider_from_config,
+)
+from app.tasks.order_book import order_book
+from app.tasks.order_executor import order_executor
+from app.tasks.universe import TOP_50_STOCKS
 
 
-TOP_50_STOCKS = [
-    "ADANIENT.NS",
-    "ADANIPORTS.NS",
-    "APOLLOHOSP.NS",
-    "ASIANPAINT.NS",
-    "AXISBANK.NS",
-    "BAJAJ-AUTO.NS",
-    "BAJFINANCE.NS",
-    "BAJAJFINSV.NS",
-    "BPCL.NS",
-    "BHARTIARTL.NS",
-    "BRITANNIA.NS",
-    "CIPLA.NS",
-    "COALINDIA.NS",
-    "DIVISLAB.NS",
-    "DRREDDY.NS",
-    "EICHERMOT.NS",
-    "GRASIM.NS",
-    "HCLTECH.NS",
-    "HDFCBANK.NS",
-    "HDFCLIFE.NS",
-    "HEROMOTOCO.NS",
-    "HINDALCO.NS",
-    "HINDUNILVR.NS",
-    "ICICIBANK.NS",
-    "ITC.NS",
-    "INDUSINDBK.NS",
-    "INFY.NS",
-    "JSWSTEEL.NS",
-    "KOTAKBANK.NS",
-    "LTIM.NS",
-    "LT.NS",
-    "M&M.NS",
-    "MARUTI.NS",
-    "NTPC.NS",
-    "NESTLEIND.NS",
-    "ONGC.NS",
-    "POWERGRID.NS",
-    "RELIANCE.NS",
-    "SBILIFE.NS",
-    "SBIN.NS",
-    "SUNPHARMA.NS",
-    "TATAMOTORS.NS",
-    "TATACONSUM.NS",
-    "TATASTEEL.NS",
-    "TCS.NS",
-    "TECHM.NS",
-    "TITAN.NS",
-    "ULTRACEMCO.NS",
-    "UPL.NS",
-    "WIPRO.NS",
-]
-
-
-def fetch_and_update_stock_data():
-    """
-    Fetches historical data for the top 50 US stocks and updates the database.
+def fetch_and_update_stock_data(source=None):
     """
+    Backfills daily history for the top 50 stocks up to today.
 
-    if db.session.query(TimeSeries).first() is not None:
-        return
+    Only the days missing since each symbol's last stored bar are fetched,
+    concurrently across `BACKFILL_MAX_WORKERS` threads. `source` defaults to
+    the configured market-data provider and can be any `HistorySource`.
+    """
+    config = current_app.config
+    if source is None:
+        source = provider_from_config(config)
     try:
-        tickers = yf.Tickers(TOP_50_STOCKS)
-        for symbol in TOP_50_STOCKS:
-            try:
-                stock_data = tickers.tickers[symbol]
-                info = stock_data.info
-                hist = stock_data.history(period="1mo")
-
-                stock = db.session.scalar(db.select(Stock).filter_by(symbol=symbol))
-                if not stock:
-                    stock = Stock(
-                        symbol=symbol,
-                        company_name=info.get("longName", ""),
-                        sector=info.get("sector", ""),
-                    )
-                    db.session.add(stock)
-                    db.session.commit()
-                for date, *row in hist.itertuples():
-                    time_series_entry = TimeSeries(
-                        stock_id=stock.stock_id,
-                        date=pd.to_datetime(date),
-                        open=row[0],
-                        high=row[1],
-                        low=row[2],
-                        close=row[3],
-                        volume=row[4],
-                    )
-                    db.session.add(time_series_entry)
-                db.session.commit()
-                print(f"Successfully updated data for {symbol}")
-            except Exception as e:
-                print(f"Failed to fetch data for {symbol}: {e}")
+        result = backfill(
+            TOP_50_STOCKS,
+            source=source,
+            max_workers=config.get("BACKFILL_MAX_WORKERS", 8),
+        )
+        print(
+            f"Backfill complete: {result.symbols_fetched} fetched, "
+            f"{result.symbols_skipped} up to date, {result.symbols_failed} failed, "
+            f"{result.bars_inserted} bars inserted, "
+            f"{result.bars_refreshed} refreshed"
+        )
+        return result
     except Exception as e:
         print(f"Failed to fetch data for tickers: {e}")
 
 
-def start_websocket(app):
+def start_websocket(app, provider: Optional[MarketDataProvider] = None):
     """
-    Starts the WebSocket client to listen for real-time stock updates.
+    Streams live ticks from `provider` (by default the configured one) until
+    the feed ends.
+
+    Ticks update the in-memory quote book immediately, are handed to the
+    tick writer, which persists coalesced day bars in batches, to the bar
+    aggregator, which builds 1-minute intraday bars, and to the price
+    broadcaster, which fans out batched updates to subscribed clients. Each
+    tick is also matched against the resting limit and stop orders for its
+    symbol; triggered orders are handed to the order executor. With
+    `MARKET_DATA_RECORD_PATH` set, every tick is also appended to that file
+    for later replay.
     """
-    ws = yf.WebSocket()
+    if provider is None:
+        provider = provider_from_config(app.config)
+    tick_writer.init_app(app)
+    tick_writer.start()
+    bar_aggregator.init_app(app)
+    bar_aggregator.start()
+    price_broadcaster.init_app(app)
+    price_broadcaster.start()
+    order_executor.init_app(app)
+    order_executor.start()
+
+    def on_tick(tick: Tick):
+        try:
+            symbol, price, day_volume = tick.symbol, tick.price, tick.day_volume
+            at = tick.time or utcnow()
+            # The tick's own (UTC) day, which is the trading day during NSE hours
+            day = at.date()
+            previous = quote_book.get(symbol)
+            quote_book.apply_tick(symbol, price, day_volume, day)
+            tick_writer.add(symbol, price, day_volume, day)
+            bar_aggregator.add(symbol, price, day_volume, at)
+            fired = order_book.match(symbol, price)
+            if fired:
+                order_executor.submit(fired)
 
-    def message_handler(msg):
-        with app.app_context():
-            try:
-                symbol = msg.get("id")
-                price = msg.get("price")
-                if not symbol or not price:
-                    return
+            if previous is None or previous.close != price:
+                price_broadcaster.publish(symbol, price)
+        except Exception as e:
+            print(f"Error processing message: {e}")
 
-                stock = db.session.scalar(db.select(Stock).filter_by(symbol=symbol))
-                if not stock:
-                    return
+    record_path = app.config.get("MARKET_DATA_RECORD_PATH")
+    if not record_path:
+        provider.stream(TOP_50_STOCKS, on_tick)
+        return
+    recorder = TickRecorder(record_path, on_tick)
+    try:
+        provider.stream(TOP_50_STOCKS, recorder)
+    finally:
+        recorder.close()
 
-                today = pd.to_datetime("today").date()
-                todays_ts = db.session.scalar(
-                    db.select(TimeSeries).filter_by(stock_id=stock.stock_id, date=today)
-                )
 
-                if todays_ts:
-                    if todays_ts.close != price:
-                        todays_ts.close = price
-                        todays_ts.high = max(todays_ts.high, price)
-                        todays_ts.low = min(todays_ts.low, price)
-                        db.session.commit()
-                        socketio.emit(
-                            "price_update",
-                            {"symbol": symbol, "price": price},
-                            namespace="/stocks",
-                        )
-                else:
-                    print(f"First price update for {symbol} today: {price}")
-                    new_ts = TimeSeries(
-                        stock_id=stock.stock_id,
-                        date=today,  # type: ignore
-                        open=price,
-                        high=price,
-                        low=price,
-                        close=price,
-                        volume=msg.get("day_volume", 0),
-                    )
-                    db.session.add(new_ts)
-                    db.session.commit()
-            except Exception as e:
-                print(f"Error processing message: {e}")
+def run_ingestion(app, provider: Optional[MarketDataProvider] = None):
+    """
+    Entry point for the ingestion process.
 
-    ws.subscribe(TOP_50_STOCKS)
-    ws.listen(message_handler)
+    Brings history up to date, warms the quote book, applies intraday
+    retention and catches up portfolio snapshots, then blocks streaming live
+    ticks. History and ticks both come from `provider`, by default the one
+    named by `MARKET_DATA_PROVIDER`. Price broadcasts reach web workers in
+    other processes through `SOCKETIO_MESSAGE_QUEUE`.
+    """
+    if provider is None:
+        provider = provider_from_config(app.config)
+    with ingestion_context(app):
+        fetch_and_update_stock_data(provider)
+        warm_quote_book()
+        apply_intraday_retention(retention_days_from_config(app.config))
+        snapshot_portfolios()
+    start_websocket(app, provider)
@@ -0,0 +1,114 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete
+
+from app.extensions import db
+from app.models import IntradayBar, floor_to_interval
+from app.services.data_versions import bump_data_versions
+from app.tasks.bar_aggregator import utcnow
+from app.tasks.bulk import insert_ignore_duplicates
+
+# Each stored width is rolled into the next coarser one once it ages out;
+# bars of the coarsest width are dropped (daily TimeSeries bars remain).
+ROLLUPS = ((1, 5), (5, 15), (15, None))
+
+
+@dataclass
+class RetentionResult:
+    rolled_up: Dict[int, int] = field(default_factory=dict)
+    deleted: Dict[int, int] = field(default_factory=dict)
+
+
+def _aggregate(rows, minutes: int):
+    """Merges `(stock_id, start)`-ordered bars into bars `minutes` wide."""
+    bars = []
+    for row in rows:
+        key = (row.stock_id, floor_to_interval(row.start, minutes))
+        if bars and (bars[-1]["stock_id"], bars[-1]["start"]) == key:
+            bar = bars[-1]
+            bar["high"] = max(bar["high"], row.high)
+            bar["low"] = min(bar["low"], row.low)
+            bar["close"] = row.close
+            bar["volume"] += row.volume
+        else:
+            bars.append(
+                {
+                    "stock_id": row.stock_id,
+                    "interval_minutes": minutes,
+                    "start": key[1],
+                    "open": row.open,
+                    "high": row.high,
+                    "low": row.low,
+                    "close": row.close,
+                    "volume": row.volume,
+                }
+            )
+    return bars
+
+
+def apply_intraday_retention(
+    retention_days: Dict[int, float], now: Optional[datetime] = None
+) -> RetentionResult:
+    """
+    Bounds `intraday_bars` growth.
+
+    Bars of width `w` older than `retention_days[w]` are merged into bars of
+    the next coarser width and deleted, in one transaction per width. The
+    cutoff is aligned to the coarser width so only whole buckets are rolled.
+    """
+    now = now or utcnow()
+    result = RetentionResult()
+    for minutes, coarser in ROLLUPS:
+        days = retention_days.get(minutes)
+        if days is None:
+            continue
+        cutoff = now - timedelta(days=days)
+        if coarser is not None:
+            cutoff = floor_to_interval(cutoff, coarser)
+        old = (IntradayBar.interval_minutes == minutes, IntradayBar.start < cutoff)
+
+        stock_ids = set()
+        if coarser is not None:
+            rows = db.session.execute(
+                db.select(
+                    IntradayBar.stock_id,
+                    IntradayBar.start,
+                    IntradayBar.open,
+                    IntradayBar.high,
+                    IntradayBar.low,
+                    IntradayBar.close,
+                    IntradayBar.volume,
+                )
+                .where(*old)
+                .order_by(IntradayBar.stock_id, IntradayBar.start)
+            ).all()
+            bars = _aggregate(rows, coarser)
+            insert_ignore_duplicates(IntradayBar, bars)
+            result.rolled_up[minutes] = len(bars)
+            stock_ids.update(bar["stock_id"] for bar in bars)
+        else:
+            stock_ids.update(
+                db.session.scalars(
+                    db.select(IntradayBar.stock_id).where(*old).distinct()
+                )
+            )
+
+        deleted = db.session.execute(
+            delete(IntradayBar)
+            .where(*old)
+            .execution_options(synchronize_session=False)
+        )
+        result.deleted[minutes] = deleted.rowcount
+        bump_data_versions(stock_ids)
+        db.session.commit()
+    return result
+
+
+def retention_days_from_config(config) -> Dict[int, float]:
+    return {
+        1: config.get("INTRADAY_1M_RETENTION_DAYS", 3),
+        5: config.get("INTRADAY_5M_RETENTION_DAYS", 30),
+        15: config.get("INTRADAY_15M_RETENTION_DAYS", 180),
+    }
@@ -0,0 +1,265 @@
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Protocol
+
+import orjson
+
+from app.tasks.backfill import Bar, HistorySource, SymbolHistory, YFinanceHistorySource
+from app.tasks.bar_aggregator import utcnow
+
+
+@dataclass
+class Tick:
+    """One live price update. `time` is naive UTC, or None for "now"."""
+
+    symbol: str
+    price: float
+    day_volume: Optional[int] = None
+    time: Optional[datetime] = None
+
+
+def _epoch_ms_to_utc(value) -> datetime:
+    return datetime.fromtimestamp(int(value) / 1000, tz=timezone.utc).replace(
+        tzinfo=None
+    )
+
+
+def tick_from_message(msg: dict) -> Optional[Tick]:
+    """
+    Parses a Yahoo Finance WebSocket message (`id`, `price`, `day_volume`,
+    `time` in epoch milliseconds). Returns None for messages without a
+    symbol or price.
+    """
+    symbol = msg.get("id")
+    price = msg.get("price")
+    if not symbol or not price:
+        return None
+    day_volume = msg.get("day_volume")
+    try:
+        at = _epoch_ms_to_utc(msg["time"])
+    except (KeyError, TypeError, ValueError, OverflowError, OSError):
+        at = None
+    return Tick(
+        symbol,
+        float(price),
+        int(day_volume) if day_volume is not None else None,
+        at,
+    )
+
+
+def tick_to_message(tick: Tick, at: datetime) -> dict:
+    """The inverse of `tick_from_message`, stamped with `at` (naive UTC)."""
+    msg = {"id": tick.symbol, "price": tick.price, "time": _epoch_ms(at)}
+    if tick.day_volume is not None:
+        msg["day_volume"] = tick.day_volume
+    return msg
+
+
+def _epoch_ms(at: datetime) -> int:
+    return int(at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+class MarketDataProvider(HistorySource, Protocol):
+    """A HistorySource that can also stream live ticks."""
+
+    def stream(self, symbols: List[str], on_tick: Callable[[Tick], None]) -> None:
+        """
+        Calls `on_tick` for every tick on `symbols` until the feed ends.
+        Live feeds block forever.
+        """
+        ...
+
+
+class YFinanceProvider(YFinanceHistorySource):
+    """Daily history and live ticks from Yahoo Finance."""
+
+    def stream(self, symbols: List[str], on_tick: Callable[[Tick], None]) -> None:
+        import yfinance as yf
+
+        def message_handler(msg):
+            tick = tick_from_message(msg)
+            if tick is not None:
+                on_tick(tick)
+
+        ws = yf.WebSocket()
+        ws.subscribe(symbols)
+        ws.listen(message_handler)
+
+
+class ReplayProvider:
+    """
+    Replays ticks from a JSON-lines file of WebSocket-shaped messages, such
+    as one written by `TickRecorder` or `write_synthetic_ticks`.
+
+    Ticks keep the file's spacing divided by `speed`; a `speed` of 0 sends
+    them back to back as fast as the consumer accepts them. Replayed ticks
+    carry their recorded time shifted by `offset`, and each further loop is
+    shifted on by the recording's span so time keeps moving forward.
+    Daily history for backfills is built from the same ticks, one bar per
+    symbol and recorded day; symbols missing from the file fail to fetch.
+    """
+
+    def __init__(
+        self,
+        path,
+        speed: float = 1.0,
+        loops: int = 1,
+        offset: timedelta = timedelta(0),
+    ):
+        self.path = Path(path)
+        self.speed = speed
+        self.loops = loops
+        self.offset = offset
+        self._ticks: Optional[List[Tick]] = None
+        self._lock = threading.Lock()
+        self.ticks_sent = 0
+        self.elapsed = 0.0
+
+    def ticks(self) -> List[Tick]:
+        """All ticks in the file, read once and kept in recorded order."""
+        with self._lock:
+            if self._ticks is None:
+                with self.path.open("rb") as f:
+                    parsed = (tick_from_message(orjson.loads(line)) for line in f)
+                    self._ticks = [tick for tick in parsed if tick is not None]
+            return self._ticks
+
+    def fetch(
+        self, symbol: str, start: Optional[date], with_info: bool
+    ) -> SymbolHistory:
+        bars: Dict[date, Bar] = {}
+        last_volume: Dict[date, int] = defaultdict(int)
+        recorded = False
+        for tick in self.ticks():
+            if tick.symbol != symbol or tick.time is None:
+                continue
+            recorded = True
+            day = tick.time.date()
+            if start is not None and day < start:
+                continue
+            bar = bars.get(day)
+            if bar is None:
+                bars[day] = Bar(day, tick.price, tick.price, tick.price, tick.price, 0)
+            else:
+                bar.high = max(bar.high, tick.price)
+                bar.low = min(bar.low, tick.price)
+                bar.close = tick.price
+            if tick.day_volume is not None:
+                last_volume[day] = tick.day_volume
+        if not recorded:
+            raise LookupError(f"No recorded ticks for {symbol} in {self.path}")
+        for day, bar in bars.items():
+            bar.volume = last_volume[day]
+        history = SymbolHistory(symbol, [bars[day] for day in sorted(bars)])
+        if with_info:
+            history.company_name = symbol
+            history.sector = "Replay"
+        return history
+
+    def stream(self, symbols: List[str], on_tick: Callable[[Tick], None]) -> None:
+        wanted = set(symbols)
+        ticks = [tick for tick in self.ticks() if tick.symbol in wanted]
+        if not ticks:
+            return
+        first = ticks[0].time
+        times = [tick.time for tick in ticks if tick.time is not None]
+        span = max(times) - min(times) if times else timedelta(0)
+        start = time.perf_counter()
+        for loop in range(self.loops):
+            loop_start = time.perf_counter()
+            shift = self.offset + loop * span
+            for tick in ticks:
+                if self.speed > 0 and tick.time is not None and first is not None:
+                    due = (tick.time - first).total_seconds() / self.speed
+                    delay = loop_start + due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                at = tick.time + shift if tick.time is not None else None
+                on_tick(Tick(tick.symbol, tick.price, tick.day_volume, at))
+                self.ticks_sent += 1
+        self.elapsed = time.perf_counter() - start
+
+
+class TickRecorder:
+    """Appends every tick it is called with to a JSON-lines file."""
+
+    def __init__(self, path, on_tick: Callable[[Tick], None]):
+        self.path = Path(path)
+        self.on_tick = on_tick
+        self._lock = threading.Lock()
+        self._file = self.path.open("ab")
+
+    def __call__(self, tick: Tick) -> None:
+        line = orjson.dumps(tick_to_message(tick, tick.time or utcnow()))
+        with self._lock:
+            self._file.write(line + b"\n")
+        self.on_tick(tick)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def write_synthetic_ticks(
+    path,
+    symbols: Iterable[str],
+    count: int,
+    seed: int = 0,
+    interval_ms: int = 100,
+    days: int = 1,
+) -> int:
+    """
+    Writes `count` random-walk ticks for `symbols` to a JSON-lines file for
+    `ReplayProvider`. Ticks are split evenly over the last `days` days,
+    ending today, `interval_ms` apart from each day's session open. The
+    same seed always produces the same ticks. Returns the number written.
+    """
+    rng = random.Random(seed)
+    symbols = list(symbols)
+    prices = {symbol: rng.uniform(100, 3000) for symbol in symbols}
+    per_day = -(-count // days)
+    today = datetime.combine(date.today(), datetime.min.time())
+    session_open = timedelta(hours=3, minutes=45)  # 09:15 IST
+
+    written = 0
+    with Path(path).open("wb") as f:
+        for day_index in range(days):
+            day = today - timedelta(days=days - 1 - day_index)
+            volumes = dict.fromkeys(symbols, 0)
+            for i in range(min(per_day, count - written)):
+                symbol = rng.choice(symbols)
+                prices[symbol] *= 1 + rng.gauss(0, 0.001)
+                volumes[symbol] += rng.randint(1, 500)
+                at = day + session_open + timedelta(milliseconds=i * interval_ms)
+                tick = Tick(symbol, round(prices[symbol], 2), volumes[symbol])
+                f.write(orjson.dumps(tick_to_message(tick, at)) + b"\n")
+                written += 1
+    return written
+
+
+def provider_from_config(config) -> MarketDataProvider:
+    """
+    Builds the provider named by `MARKET_DATA_PROVIDER`: "yfinance" (the
+    default) or "replay", which reads `MARKET_DATA_REPLAY_PATH`.
+    """
+    name = str(config.get("MARKET_DATA_PROVIDER") or "yfinance").lower()
+    if name == "yfinance":
+        return YFinanceProvider(config.get("BACKFILL_PERIOD", "1mo"))
+    if name == "replay":
+        path = config.get("MARKET_DATA_REPLAY_PATH")
+        if not path:
+            raise ValueError("MARKET_DATA_REPLAY_PATH is required for replay.")
+        return ReplayProvider(
+            path,
+            speed=config.get("MARKET_DATA_REPLAY_SPEED", 1.0),
+            loops=config.get("MARKET_DATA_REPLAY_LOOPS", 1),
+            offset=timedelta(
+                seconds=config.get("MARKET_DATA_REPLAY_OFFSET_SECONDS", 0.0)
+            ),
+        )
+    raise ValueError(f"Unknown MARKET_DATA_PROVIDER '{name}'.")
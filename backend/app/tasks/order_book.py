@@ -0,0 +1,156 @@
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, List, Tuple
+
+from app.models import OrderTypeEnum, TransactionTypeEnum
+
+
+@dataclass(frozen=True)
+class RestingOrder:
+    """An open limit or stop order waiting in the book."""
+
+    order_id: int
+    portfolio_id: int
+    symbol: str
+    side: TransactionTypeEnum
+    order_type: OrderTypeEnum
+    quantity: Decimal
+    price: Decimal
+
+    @property
+    def fires_on_fall(self) -> bool:
+        """True for orders triggered by the price falling to `price`."""
+        return (self.side == TransactionTypeEnum.BUY) == (
+            self.order_type == OrderTypeEnum.LIMIT
+        )
+
+
+@dataclass
+class SymbolBook:
+    """
+    Resting orders for one symbol, split by trigger direction.
+
+    `falling` holds BUY LIMIT and SELL STOP orders, which fire once a tick is
+    at or below their price; it is keyed on the negated price so the highest
+    trigger sits on top. `rising` holds SELL LIMIT and BUY STOP orders, which
+    fire at or above their price, keyed on the price itself. Ties go to the
+    order added first. A tick that fires nothing costs two heap peeks; each
+    fired order costs one pop.
+    """
+
+    falling: List[Tuple[float, int, RestingOrder]] = field(default_factory=list)
+    rising: List[Tuple[float, int, RestingOrder]] = field(default_factory=list)
+
+
+class OrderBook:
+    """
+    In-memory index of open orders, matched against every tick.
+
+    Cancellation is lazy: an order leaves `_live` immediately and its heap
+    entry is discarded when it reaches the top, or when dead entries
+    outnumber live ones and the symbol's heaps are rebuilt. An entry is live
+    only while `_live` maps its id to that same order object, so an id that
+    is cancelled and added again cannot fire at its old price.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._books: Dict[str, SymbolBook] = {}
+        self._live: Dict[int, RestingOrder] = {}
+        self._dead: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self.matched = 0
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._live
+
+    def add(self, order: RestingOrder) -> None:
+        with self._lock:
+            if order.order_id in self._live:
+                return
+            self._live[order.order_id] = order
+            book = self._books.get(order.symbol)
+            if book is None:
+                book = self._books[order.symbol] = SymbolBook()
+            sequence = next(self._sequence)
+            if order.fires_on_fall:
+                heapq.heappush(book.falling, (-float(order.price), sequence, order))
+            else:
+                heapq.heappush(book.rising, (float(order.price), sequence, order))
+
+    def cancel(self, order_id: int) -> bool:
+        """Removes an order from the book. Returns False if it was not resting."""
+        with self._lock:
+            order = self._live.pop(order_id, None)
+            if order is None:
+                return False
+            dead = self._dead.get(order.symbol, 0) + 1
+            book = self._books[order.symbol]
+            if dead > len(book.falling) + len(book.rising) - dead:
+                self._compact(order.symbol, book)
+            else:
+                self._dead[order.symbol] = dead
+            return True
+
+    def _compact(self, symbol: str, book: SymbolBook) -> None:
+        live = self._live
+        book.falling = [e for e in book.falling if live.get(e[2].order_id) is e[2]]
+        book.rising = [e for e in book.rising if live.get(e[2].order_id) is e[2]]
+        heapq.heapify(book.falling)
+        heapq.heapify(book.rising)
+        self._dead[symbol] = 0
+
+    def match(self, symbol: str, price: float) -> List[RestingOrder]:
+        """
+        Removes and returns every order on `symbol` triggered by a tick at
+        `price`, in trigger-price order.
+        """
+        book = self._books.get(symbol)
+        if book is None:
+            return []
+        fired: List[RestingOrder] = []
+        with self._lock:
+            live = self._live
+            falling, rising = book.falling, book.rising
+            dead = 0
+            while falling and -falling[0][0] >= price:
+                order = heapq.heappop(falling)[2]
+                if live.get(order.order_id) is order:
+                    del live[order.order_id]
+                    fired.append(order)
+                else:
+                    dead += 1
+            while rising and rising[0][0] <= price:
+                order = heapq.heappop(rising)[2]
+                if live.get(order.order_id) is order:
+                    del live[order.order_id]
+                    fired.append(order)
+                else:
+                    dead += 1
+            if dead:
+                self._dead[symbol] = self._dead.get(symbol, 0) - dead
+            self.matched += len(fired)
+        return fired
+
+    def clear(self) -> None:
+        with self._lock:
+            self._books.clear()
+            self._live.clear()
+            self._dead.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "resting": len(self._live),
+                "symbols": len(self._books),
+                "matched": self.matched,
+            }
+
+
+order_book = OrderBook()
@@ -0,0 +1,282 @@
+import atexit
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from app.engines import ingestion_context
+from app.extensions import db
+from app.models import (
+    OrderStatusEnum,
+    OrderTypeEnum,
+    PendingOrder,
+    Portfolio,
+    Stock,
+)
+from app.services.portfolio_service import (
+    LIMIT_NOT_REACHED,
+    BatchRejectedError,
+    OrderRequest,
+    execute_batch,
+    run_in_transaction,
+)
+from app.tasks.order_book import OrderBook, RestingOrder, order_book
+
+# Orders written by web workers are picked up by creation time; the overlap
+# covers clock skew between processes and commits that land late.
+SYNC_SLACK = timedelta(seconds=30)
+
+
+class OrderExecutor:
+    """
+    Keeps the order book in step with `pending_orders` and fills the orders
+    it triggers.
+
+    On start every OPEN order is loaded into the book. A background thread
+    then wakes every `ORDER_SYNC_INTERVAL_SECONDS`, or as soon as ticks fire
+    orders, to execute fired orders and to pick up orders placed or
+    cancelled since the last pass. Fired orders are executed through
+    `execute_batch`, one transaction per portfolio; limit orders whose
+    price has moved away again by then go back into the book.
+    """
+
+    def __init__(self, book: OrderBook = order_book, app=None):
+        self.book = book
+        self.app = None
+        self.sync_interval = 1.0
+        self.max_attempts = 3
+        self._lock = threading.Lock()
+        self._fired: Dict[int, RestingOrder] = {}
+        self._synced_at: Optional[datetime] = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.filled = 0
+        self.rejected = 0
+        self.requeued = 0
+        self.batches = 0
+        self.last_batch_ms = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.sync_interval = app.config.get("ORDER_SYNC_INTERVAL_SECONDS", 1.0)
+        self.max_attempts = app.config.get("TRADE_MAX_ATTEMPTS", 3)
+
+    def submit(self, fired: Iterable[RestingOrder]) -> None:
+        """Queues orders removed from the book by a tick for execution."""
+        with self._lock:
+            for order in fired:
+                self._fired[order.order_id] = order
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with ingestion_context(self.app):
+            loaded = self.load()
+        print(f"Order book loaded with {loaded} open orders")
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="order-executor", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stops the executor thread after executing anything already fired."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            with ingestion_context(self.app):
+                self.execute()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.sync_interval)
+            self._wakeup.clear()
+            try:
+                with ingestion_context(self.app):
+                    self.execute()
+                    self.sync()
+            except Exception as e:
+                print(f"Error executing pending orders: {e}")
+
+    def _resting_orders(self, *criteria) -> List[RestingOrder]:
+        rows = db.session.execute(
+            db.select(
+                PendingOrder.order_id,
+                PendingOrder.portfolio_id,
+                Stock.symbol,
+                PendingOrder.side,
+                PendingOrder.order_type,
+                PendingOrder.quantity,
+                PendingOrder.price,
+            )
+            .join(Stock, Stock.stock_id == PendingOrder.stock_id)
+            .where(PendingOrder.status == OrderStatusEnum.OPEN, *criteria)
+            .execution_options(yield_per=5000)
+        )
+        return [RestingOrder(*row) for row in rows]
+
+    def load(self) -> int:
+        """Rebuilds the book from every OPEN order. Returns the number loaded."""
+        self._synced_at = datetime.utcnow()
+        self.book.clear()
+        orders = self._resting_orders()
+        for order in orders:
+            self.book.add(order)
+        return len(orders)
+
+    def sync(self) -> None:
+        """Adds orders placed and drops orders closed since the last pass."""
+        now = datetime.utcnow()
+        since = self._synced_at - SYNC_SLACK
+        placed = self._resting_orders(PendingOrder.created_at >= since)
+        closed = db.session.scalars(
+            db.select(PendingOrder.order_id).where(
+                PendingOrder.status != OrderStatusEnum.OPEN,
+                PendingOrder.updated_at >= since,
+            )
+        ).all()
+        db.session.rollback()
+
+        with self._lock:
+            for order in placed:
+                if order.order_id not in self._fired:
+                    self.book.add(order)
+        for order_id in closed:
+            self.book.cancel(order_id)
+        self._synced_at = now
+
+    def execute(self) -> int:
+        """Fills every fired order, grouped by portfolio. Returns orders filled."""
+        with self._lock:
+            fired = self._fired
+            self._fired = {}
+        if not fired:
+            return 0
+
+        start = time.perf_counter()
+        by_portfolio: Dict[int, List[RestingOrder]] = defaultdict(list)
+        for order in fired.values():
+            by_portfolio[order.portfolio_id].append(order)
+        filled = 0
+        for portfolio_id, orders in by_portfolio.items():
+            try:
+                filled += self._execute_portfolio(portfolio_id, orders)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Error filling orders for portfolio {portfolio_id}: {e}")
+                for order in orders:
+                    self.book.add(order)
+        self.batches += 1
+        self.last_batch_ms = (time.perf_counter() - start) * 1000
+        return filled
+
+    def _execute_portfolio(self, portfolio_id: int, orders: List[RestingOrder]) -> int:
+        """
+        Fills `orders` as one batch. If the batch is rejected each order is
+        retried alone, so one unaffordable order does not hold back the
+        rest; an order that fails alone is rejected, or requeued when its
+        limit price was not reached.
+        """
+        try:
+            return len(self._fill(portfolio_id, orders))
+        except BatchRejectedError as e:
+            if len(orders) == 1:
+                self._reject(orders[0], next(iter(e.errors.values())))
+                return 0
+        return sum(self._execute_portfolio(portfolio_id, [o]) for o in orders)
+
+    def _fill(self, portfolio_id: int, orders: List[RestingOrder]) -> List[int]:
+        def work():
+            rows = {
+                row.order_id: row
+                for row in db.session.scalars(
+                    db.select(PendingOrder)
+                    .where(
+                        PendingOrder.order_id.in_([o.order_id for o in orders]),
+                        PendingOrder.status == OrderStatusEnum.OPEN,
+                    )
+                    .with_for_update()
+                )
+            }
+            # Orders cancelled, or already filled, after they fired drop out here
+            live = [order for order in orders if order.order_id in rows]
+            portfolio = db.session.get(Portfolio, portfolio_id)
+            if not live or portfolio is None:
+                return []
+
+            transactions = execute_batch(
+                db.session,  # type: ignore
+                portfolio,
+                [
+                    OrderRequest(
+                        order.symbol,
+                        order.quantity,
+                        order.side,
+                        limit_price=order.price
+                        if order.order_type == OrderTypeEnum.LIMIT
+                        else None,
+                    )
+                    for order in live
+                ],
+            )
+            db.session.flush()
+            now = datetime.utcnow()
+            for order, transaction in zip(live, transactions):
+                row = rows[order.order_id]
+                row.status = OrderStatusEnum.FILLED
+                row.transaction_id = transaction.transaction_id
+                row.filled_at = now
+            return [order.order_id for order in live]
+
+        filled = run_in_transaction(
+            db.session, work, max_attempts=self.max_attempts  # type: ignore
+        )
+        self.filled += len(filled)
+        return filled
+
+    def _reject(self, order: RestingOrder, reason: str) -> None:
+        if reason == LIMIT_NOT_REACHED:
+            self.requeued += 1
+            self.book.add(order)
+            return
+
+        def work():
+            db.session.execute(
+                db.update(PendingOrder)
+                .where(
+                    PendingOrder.order_id == order.order_id,
+                    PendingOrder.status == OrderStatusEnum.OPEN,
+                )
+                .values(
+                    status=OrderStatusEnum.REJECTED,
+                    reject_reason=reason[:255],
+                    updated_at=datetime.utcnow(),
+                )
+            )
+
+        run_in_transaction(db.session, work)  # type: ignore
+        self.rejected += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            fired = len(self._fired)
+        return {
+            **self.book.stats(),
+            "fired_pending": fired,
+            "filled": self.filled,
+            "rejected": self.rejected,
+            "requeued": self.requeued,
+            "batches": self.batches,
+            "last_batch_ms": self.last_batch_ms,
+        }
+
+
+order_executor = OrderExecutor()
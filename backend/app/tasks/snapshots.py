@@ -0,0 +1,290 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert
+
+from app.extensions import db
+from app.models import (
+    Portfolio,
+    PortfolioDailySnapshot,
+    TimeSeries,
+    Transaction,
+    TransactionTypeEnum,
+)
+from app.services.portfolio_service import lock_portfolio
+from app.tasks.bar_aggregator import utcnow
+
+ZERO = Decimal("0")
+
+# Trades committed while a run is reading may carry a timestamp from just
+# before it started, so a run's watermark is set this far back.
+WATERMARK_SLACK = timedelta(minutes=1)
+
+
+@dataclass
+class SnapshotResult:
+    portfolios_processed: int = 0
+    portfolios_skipped: int = 0
+    rows_written: int = 0
+
+
+def _dirty_portfolios(through: date) -> List[Tuple[int, date]]:
+    """
+    Returns (portfolio_id, first day to recompute) for every portfolio with
+    missing days up to `through` or trades newer than its last snapshot.
+
+    The last snapshot day is recomputed when it was written before that day
+    had ended, since its close and trades may have changed since.
+    """
+    S = PortfolioDailySnapshot
+    ranked = db.select(
+        S.portfolio_id,
+        S.date,
+        S.watermark,
+        func.row_number()
+        .over(partition_by=S.portfolio_id, order_by=S.date.desc())
+        .label("rn"),
+    ).subquery("last_snapshots")
+    first_new_trade = (
+        db.select(func.min(Transaction.transaction_date))
+        .where(
+            Transaction.portfolio_id == Portfolio.portfolio_id,
+            Transaction.transaction_date > ranked.c.watermark,
+        )
+        .scalar_subquery()
+    )
+    rows = db.session.execute(
+        db.select(
+            Portfolio.portfolio_id,
+            Portfolio.created_at,
+            ranked.c.date,
+            ranked.c.watermark,
+            first_new_trade.label("first_new_trade"),
+        ).outerjoin(
+            ranked,
+            and_(ranked.c.portfolio_id == Portfolio.portfolio_id, ranked.c.rn == 1),
+        )
+    ).all()
+
+    dirty = []
+    for portfolio_id, created_at, last_day, watermark, first_trade in rows:
+        if last_day is None:
+            start = created_at.date()
+        elif watermark.date() <= last_day:
+            start = last_day
+        else:
+            start = last_day + timedelta(days=1)
+        if first_trade is not None:
+            start = min(start, first_trade.date())
+        if start <= through:
+            dirty.append((portfolio_id, start))
+    return dirty
+
+
+def _closes(
+    stock_ids: Iterable[int], start: date, through: date
+) -> Dict[int, List[Tuple[date, Decimal]]]:
+    """
+    Date-ordered closes per stock from the last bar before `start` through
+    `through`, read with one range scan per stock on (stock_id, date).
+    """
+    stock_ids = list(stock_ids)
+    if not stock_ids:
+        return {}
+    before = (
+        db.select(TimeSeries.stock_id, func.max(TimeSeries.date).label("date"))
+        .where(TimeSeries.stock_id.in_(stock_ids), TimeSeries.date < start)
+        .group_by(TimeSeries.stock_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        db.select(TimeSeries.stock_id, TimeSeries.date, TimeSeries.close)
+        .outerjoin(
+            before,
+            and_(
+                before.c.stock_id == TimeSeries.stock_id,
+                before.c.date == TimeSeries.date,
+            ),
+        )
+        .where(
+            TimeSeries.stock_id.in_(stock_ids),
+            TimeSeries.date <= through,
+            (TimeSeries.date >= start) | (before.c.date.is_not(None)),
+        )
+        .order_by(TimeSeries.stock_id, TimeSeries.date)
+    ).all()
+    closes = defaultdict(list)
+    for stock_id, day, close in rows:
+        closes[stock_id].append((day, close))
+    return closes
+
+
+def _replay(
+    portfolio: Portfolio, start: date, through: date, watermark: datetime
+) -> List[dict]:
+    """
+    Rebuilds end-of-day cash, market value, cost basis and open positions
+    for each calendar day from `start` through `through`.
+
+    When the snapshot for the day before `start` has positions, the replay
+    resumes from its cash and positions and streams only later trades.
+    Otherwise the whole ledger is streamed once in date order over the
+    (portfolio_id, transaction_date) index, and opening cash is derived from
+    the current balance, so deposits made outside of trades are not needed;
+    the caller holds the portfolio lock so balance and ledger agree.
+    Positions use average cost, as `execute_transaction` does, and are
+    valued at the day's close (or the latest earlier one, or the last trade
+    price when a stock has no bars).
+    """
+    previous = db.session.execute(
+        db.select(
+            PortfolioDailySnapshot.cash_balance, PortfolioDailySnapshot.positions
+        ).filter_by(portfolio_id=portfolio.portfolio_id, date=start - timedelta(days=1))
+    ).one_or_none()
+    resume = previous is not None and previous.positions is not None
+
+    quantities: Dict[int, Decimal] = defaultdict(lambda: ZERO)
+    costs: Dict[int, Decimal] = defaultdict(lambda: ZERO)
+    prices: Dict[int, Decimal] = {}
+    in_ledger = [Transaction.portfolio_id == portfolio.portfolio_id]
+    if resume:
+        # Cash only changes with trades, so the stored balance carries forward
+        cash = previous.cash_balance
+        for stock_id, (quantity, cost, price) in previous.positions.items():
+            quantities[int(stock_id)] = Decimal(quantity)
+            costs[int(stock_id)] = Decimal(cost)
+            prices[int(stock_id)] = Decimal(price)
+        in_ledger.append(
+            Transaction.transaction_date >= datetime.combine(start, time.min)
+        )
+    else:
+        # Cash relative to the opening balance, fixed up once the ledger is read
+        cash = ZERO
+
+    stock_ids = set(quantities) | set(
+        db.session.scalars(db.select(Transaction.stock_id).where(*in_ledger).distinct())
+    )
+    closes = _closes(stock_ids, start, through)
+
+    pending = iter(
+        db.session.execute(
+            db.select(
+                Transaction.stock_id,
+                Transaction.transaction_type,
+                Transaction.quantity,
+                Transaction.price_per_share,
+                Transaction.transaction_date,
+            )
+            .where(*in_ledger)
+            .order_by(Transaction.transaction_date, Transaction.transaction_id)
+            .execution_options(yield_per=1000)
+        )
+    )
+    tx = next(pending, None)
+
+    def apply_until(cutoff: Optional[datetime]) -> None:
+        nonlocal cash, tx
+        while tx is not None and (cutoff is None or tx.transaction_date < cutoff):
+            amount = tx.quantity * tx.price_per_share
+            if tx.stock_id not in closes:
+                prices[tx.stock_id] = tx.price_per_share
+            if tx.transaction_type == TransactionTypeEnum.BUY:
+                cash -= amount
+                quantities[tx.stock_id] += tx.quantity
+                costs[tx.stock_id] += amount
+            else:
+                cash += amount
+                held = quantities[tx.stock_id]
+                if held:
+                    costs[tx.stock_id] -= costs[tx.stock_id] * tx.quantity / held
+                quantities[tx.stock_id] = held - tx.quantity
+            tx = next(pending, None)
+
+    apply_until(datetime.combine(start, time.min))
+    series = {stock_id: iter(bars) for stock_id, bars in closes.items()}
+    next_close = {stock_id: next(bars, None) for stock_id, bars in series.items()}
+
+    snapshots = []
+    day = start
+    while day <= through:
+        apply_until(datetime.combine(day + timedelta(days=1), time.min))
+        for stock_id, bar in next_close.items():
+            while bar is not None and bar[0] <= day:
+                prices[stock_id] = bar[1]
+                bar = next(series[stock_id], None)
+            next_close[stock_id] = bar
+
+        open_positions = [stock_id for stock_id, qty in quantities.items() if qty]
+        snapshots.append(
+            {
+                "portfolio_id": portfolio.portfolio_id,
+                "date": day,
+                "cash_balance": cash,
+                "market_value": sum(
+                    (quantities[i] * prices.get(i, ZERO) for i in open_positions),
+                    ZERO,
+                ),
+                "cost_basis": sum((costs[i] for i in open_positions), ZERO),
+                "watermark": watermark,
+                "positions": {
+                    str(i): [
+                        str(quantities[i]),
+                        str(costs[i]),
+                        str(prices.get(i, ZERO)),
+                    ]
+                    for i in open_positions
+                },
+            }
+        )
+        day += timedelta(days=1)
+
+    if not resume:
+        apply_until(None)
+        opening = portfolio.cash_balance - cash
+        for snapshot in snapshots:
+            snapshot["cash_balance"] += opening
+    return snapshots
+
+
+def snapshot_portfolios(through: Optional[date] = None) -> SnapshotResult:
+    """
+    Brings `portfolio_daily_snapshots` up to date through `through` (today
+    by default).
+
+    Only portfolios with missing days or trades newer than their last
+    snapshot are touched, and each is rewritten from the first affected day
+    in its own transaction, holding the portfolio's row lock so trades on it
+    wait until its snapshots are written.
+    """
+    watermark = utcnow() - WATERMARK_SLACK
+    through = through or utcnow().date()
+    result = SnapshotResult()
+
+    dirty = _dirty_portfolios(through)
+    result.portfolios_skipped = (
+        db.session.scalar(db.select(func.count(Portfolio.portfolio_id))) - len(dirty)
+    )
+    for portfolio_id, start in dirty:
+        try:
+            portfolio = lock_portfolio(
+                db.session, db.session.get(Portfolio, portfolio_id)
+            )
+            rows = _replay(portfolio, start, through, watermark)
+            db.session.execute(
+                delete(PortfolioDailySnapshot).where(
+                    PortfolioDailySnapshot.portfolio_id == portfolio_id,
+                    PortfolioDailySnapshot.date >= start,
+                )
+            )
+            if rows:
+                db.session.execute(insert(PortfolioDailySnapshot), rows)
+            db.session.commit()
+            result.portfolios_processed += 1
+            result.rows_written += len(rows)
+        except Exception as e:
+            db.session.rollback()
+            print(f"Failed to snapshot portfolio {portfolio_id}: {e}")
+    return result
@@ -0,0 +1,131 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, insert
+
+from app.extensions import db
+from app.models import Portfolio, RealizedGain, TaxLot, Transaction, TransactionTypeEnum
+from app.services.tax_lots import ZERO, LotMethod, consume_lots, open_quantity
+
+
+@dataclass
+class RebuildResult:
+    transactions: int = 0
+    open_lots: int = 0
+    realized_rows: int = 0
+    unmatched_sells: int = 0
+
+
+@dataclass
+class _Lot:
+    portfolio_id: int
+    stock_id: int
+    opened_at: datetime
+    quantity: Decimal
+    remaining_quantity: Decimal
+    cost_per_share: Decimal
+    transaction_id: Optional[int]
+
+
+def rebuild_tax_lots(method: LotMethod, batch_size: int = 1000) -> RebuildResult:
+    """
+    Recomputes `tax_lots` and `realized_gains` from the transaction ledger.
+
+    Transactions are streamed once, `batch_size` rows at a time, in
+    (portfolio_id, transaction_date) index order. Only open lots and
+    per-stock realized totals are held in memory. Existing rows are replaced
+    in a single transaction, so readers never see a partial rebuild.
+
+    Every portfolio row is locked first, the way a trade locks its own, so
+    trades wait until the rebuild commits instead of being left out of it.
+    The old rows are deleted before the ledger is read, which on SQLite takes
+    the database write lock for the same purpose.
+    """
+    result = RebuildResult()
+    lots: Dict[Tuple[int, int], List[_Lot]] = defaultdict(list)
+    realized: Dict[Tuple[int, int], List[Decimal]] = {}
+
+    db.session.execute(
+        db.select(Portfolio.portfolio_id)
+        .order_by(Portfolio.portfolio_id)
+        .with_for_update()
+    ).all()
+    db.session.execute(delete(TaxLot))
+    db.session.execute(delete(RealizedGain))
+
+    rows = db.session.execute(
+        db.select(
+            Transaction.transaction_id,
+            Transaction.portfolio_id,
+            Transaction.stock_id,
+            Transaction.transaction_type,
+            Transaction.quantity,
+            Transaction.price_per_share,
+            Transaction.transaction_date,
+        )
+        .order_by(
+            Transaction.portfolio_id,
+            Transaction.transaction_date,
+            Transaction.transaction_id,
+        )
+        .execution_options(yield_per=batch_size)
+    )
+    for tx in rows:
+        result.transactions += 1
+        key = (tx.portfolio_id, tx.stock_id)
+        if tx.transaction_type == TransactionTypeEnum.BUY:
+            lots[key].append(
+                _Lot(
+                    tx.portfolio_id,
+                    tx.stock_id,
+                    tx.transaction_date,
+                    tx.quantity,
+                    tx.quantity,
+                    tx.price_per_share,
+                    tx.transaction_id,
+                )
+            )
+            continue
+
+        open_lots = lots[key]
+        matched = min(tx.quantity, open_quantity(open_lots))
+        if matched < tx.quantity:
+            result.unmatched_sells += 1
+        cost = consume_lots(open_lots, matched, method)
+        lots[key] = [lot for lot in open_lots if lot.remaining_quantity]
+        totals = realized.setdefault(key, [ZERO, ZERO, ZERO, ZERO])
+        totals[0] += matched
+        totals[1] += matched * tx.price_per_share
+        totals[2] += cost
+        totals[3] += tx.quantity - matched
+
+    lot_rows = [vars(lot) for open_lots in lots.values() for lot in open_lots]
+    realized_rows = [
+        {
+            "portfolio_id": portfolio_id,
+            "stock_id": stock_id,
+            "quantity_sold": quantity_sold,
+            "proceeds": proceeds,
+            "cost_basis": cost_basis,
+            "unmatched_quantity": unmatched_quantity,
+        }
+        for (portfolio_id, stock_id), (
+            quantity_sold,
+            proceeds,
+            cost_basis,
+            unmatched_quantity,
+        ) in realized.items()
+    ]
+
+    if lot_rows:
+        db.session.execute(insert(TaxLot), lot_rows)
+    if realized_rows:
+        db.session.execute(insert(RealizedGain), realized_rows)
+    db.session.commit()
+
+    result.open_lots = len(lot_rows)
+    result.realized_rows = len(realized_rows)
+    return result
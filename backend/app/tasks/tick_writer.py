@@ -0,0 +1,274 @@
+import atexit
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import case, update, tuple_
+
+from app.engines import ingestion_context
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.services.data_versions import bump_data_versions
+from app.tasks.bulk import upsert
+
+
+@dataclass
+class PendingBar:
+    """Ticks for one symbol and day merged since the last flush."""
+
+    symbol: str
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: Optional[int] = None
+    ticks: int = 1
+
+    def merge(self, price: float, day_volume: Optional[int]) -> None:
+        self.high = max(self.high, price)
+        self.low = min(self.low, price)
+        self.close = price
+        if day_volume is not None:
+            self.volume = day_volume
+        self.ticks += 1
+
+    def absorb(self, newer: "PendingBar") -> None:
+        """Folds in a bar for the same symbol and day built from later ticks."""
+        self.high = max(self.high, newer.high)
+        self.low = min(self.low, newer.low)
+        self.close = newer.close
+        if newer.volume is not None:
+            self.volume = newer.volume
+        self.ticks += newer.ticks
+
+
+def _merge_bar(excluded) -> Dict[str, Any]:
+    """Upsert values folding a coalesced bar into a stored row for its day."""
+    return {
+        "high": case(
+            (excluded.high > TimeSeries.high, excluded.high), else_=TimeSeries.high
+        ),
+        "low": case((excluded.low < TimeSeries.low, excluded.low), else_=TimeSeries.low),
+        "close": excluded.close,
+        # Day volume only grows, and a bar without one is inserted with 0
+        "volume": case(
+            (excluded.volume > TimeSeries.volume, excluded.volume),
+            else_=TimeSeries.volume,
+        ),
+    }
+
+
+class TickWriter:
+    """
+    Write-behind buffer for WebSocket ticks.
+
+    Ticks are coalesced per (symbol, day) in memory and flushed as one bulk
+    update/insert of day bars every `TICK_FLUSH_INTERVAL_SECONDS`, or sooner
+    once `TICK_FLUSH_BATCH_SIZE` ticks are waiting. A batch whose write fails
+    is merged back into the buffer and retried with the next flush. Pending
+    bars are flushed on interpreter shutdown.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.flush_interval = 1.0
+        self.batch_size = 500
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[str, date], PendingBar] = {}
+        self._pending_ticks = 0
+        self._stock_ids: Dict[str, int] = {}
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.ticks_received = 0
+        self.ticks_coalesced = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.rows_written = 0
+        self.last_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.flush_interval = app.config.get("TICK_FLUSH_INTERVAL_SECONDS", 1.0)
+        self.batch_size = app.config.get("TICK_FLUSH_BATCH_SIZE", 500)
+
+    def add(
+        self, symbol: str, price: float, day_volume: Optional[int], day: date
+    ) -> None:
+        """Queues a tick, merging it into the pending bar for its symbol and day."""
+        with self._lock:
+            self.ticks_received += 1
+            key = (symbol, day)
+            bar = self._pending.get(key)
+            if bar is None:
+                self._pending[key] = PendingBar(
+                    symbol, day, price, price, price, price, day_volume
+                )
+            else:
+                bar.merge(price, day_volume)
+                self.ticks_coalesced += 1
+            self._pending_ticks += 1
+            if self._pending_ticks >= self.batch_size:
+                self._wakeup.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="tick-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stops the flush thread and writes out anything still pending."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing ticks: {e}")
+
+    def flush(self) -> int:
+        """Writes all pending bars in a single transaction. Returns rows written."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._pending_ticks = 0
+        if not pending:
+            return 0
+
+        start = time.perf_counter()
+        try:
+            with ingestion_context(self.app):
+                written = self._write(list(pending.values()))
+        except Exception:
+            self._requeue(pending)
+            raise
+        elapsed = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self.flushes += 1
+            self.rows_written += written
+            self.last_flush_ms = elapsed
+            self.total_flush_ms += elapsed
+        return written
+
+    def _requeue(self, failed: Dict[Tuple[str, date], PendingBar]) -> None:
+        """Puts a batch that failed to write back in front of newer ticks."""
+        with self._lock:
+            self.failed_flushes += 1
+            for key, bar in failed.items():
+                newer = self._pending.get(key)
+                if newer is not None:
+                    bar.absorb(newer)
+                    self._pending_ticks -= newer.ticks
+                self._pending[key] = bar
+                self._pending_ticks += bar.ticks
+
+    def _resolve_stock_ids(self, symbols) -> Dict[str, int]:
+        missing = [s for s in symbols if s not in self._stock_ids]
+        if missing:
+            self._stock_ids.update(
+                db.session.execute(
+                    db.select(Stock.symbol, Stock.stock_id).where(
+                        Stock.symbol.in_(missing)
+                    )
+                ).all()
+            )
+        return self._stock_ids
+
+    def _write(self, bars) -> int:
+        stock_ids = self._resolve_stock_ids({bar.symbol for bar in bars})
+        bars = [bar for bar in bars if bar.symbol in stock_ids]
+        if not bars:
+            return 0
+
+        keys = [(stock_ids[bar.symbol], bar.date) for bar in bars]
+        existing = {
+            (row.stock_id, row.date): row
+            for row in db.session.execute(
+                db.select(
+                    TimeSeries.id,
+                    TimeSeries.stock_id,
+                    TimeSeries.date,
+                    TimeSeries.high,
+                    TimeSeries.low,
+                    TimeSeries.volume,
+                ).where(tuple_(TimeSeries.stock_id, TimeSeries.date).in_(keys))
+            )
+        }
+
+        updates, inserts = [], []
+        for key, bar in zip(keys, bars):
+            row = existing.get(key)
+            if row is None:
+                inserts.append(
+                    {
+                        "stock_id": key[0],
+                        "date": bar.date,
+                        "open": bar.open,
+                        "high": bar.high,
+                        "low": bar.low,
+                        "close": bar.close,
+                        "volume": bar.volume or 0,
+                    }
+                )
+            else:
+                updates.append(
+                    {
+                        "id": row.id,
+                        "high": max(row.high, bar.high),
+                        "low": min(row.low, bar.low),
+                        "close": bar.close,
+                        "volume": row.volume if bar.volume is None else bar.volume,
+                    }
+                )
+
+        if updates:
+            db.session.execute(update(TimeSeries), updates)
+        # A backfill may have stored today's bar since it was read above; merge
+        # into that row rather than losing the bar
+        upsert(
+            TimeSeries,
+            inserts,
+            [TimeSeries.stock_id, TimeSeries.date],
+            _merge_bar,
+        )
+        bump_data_versions(stock_id for stock_id, _ in keys)
+        db.session.commit()
+        return len(updates) + len(inserts)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "ticks_received": self.ticks_received,
+                "ticks_coalesced": self.ticks_coalesced,
+                "ticks_pending": self._pending_ticks,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "rows_written": self.rows_written,
+                "last_flush_ms": self.last_flush_ms,
+                "avg_flush_ms": self.total_flush_ms / self.flushes
+                if self.flushes
+                else 0.0,
+            }
+
+
+tick_writer = TickWriter()
@@ -0,0 +1,177 @@
+"""
+Benchmark for /portfolio/analytics on 50 holdings x 5 years of daily bars.
+
+Seeds a throwaway SQLite database with the TOP_50_STOCKS universe, buys every
+stock into one portfolio and times the close-matrix load, the vectorized
+metric computation and a memoized repeat call. For reference it also times
+a per-row pure-Python version of the returns/volatility/drawdown/beta
+loops over the same, already loaded, closes. Run from the ``backend`` directory:
+
+    python -m benchmarks.analytics [--years 5] [--repeat 5]
+"""
+
+import argparse
+import datetime
+import math
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from flask import Flask
+from sqlalchemy import Float, cast, insert
+
+from app.extensions import db
+from app.models import Holding, Portfolio, Stock, TimeSeries, User
+from app.services import analytics
+from app.tasks.universe import TOP_50_STOCKS
+
+
+def build_app() -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(years: int, rng: random.Random) -> Portfolio:
+    db.create_all()
+    db.session.execute(
+        insert(Stock),
+        [{"symbol": s, "company_name": s, "sector": "Bench"} for s in TOP_50_STOCKS],
+    )
+    days = [
+        datetime.date.today() - datetime.timedelta(days=d)
+        for d in range(years * 365, -1, -1)
+    ]
+    days = [d for d in days if d.weekday() < 5]
+    rows = []
+    for stock_id in range(1, len(TOP_50_STOCKS) + 1):
+        price = rng.uniform(100, 3000)
+        for day in days:
+            price *= 1 + rng.gauss(0.0003, 0.018)
+            rows.append(
+                {
+                    "stock_id": stock_id,
+                    "date": day,
+                    "open": price,
+                    "high": price,
+                    "low": price,
+                    "close": round(price, 4),
+                    "volume": 1000,
+                }
+            )
+    db.session.execute(insert(TimeSeries), rows)
+
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    portfolio = Portfolio(user_id=user.user_id, portfolio_name="Bench")
+    db.session.add(portfolio)
+    db.session.flush()
+    db.session.add_all(
+        Holding(
+            portfolio_id=portfolio.portfolio_id,
+            stock_id=stock_id,
+            quantity=Decimal(rng.randint(1, 100)),
+            average_cost_per_share=Decimal("100"),
+        )
+        for stock_id in range(1, len(TOP_50_STOCKS) + 1)
+    )
+    db.session.commit()
+    print(f"seeded {len(rows)} bars ({len(days)} days x {len(TOP_50_STOCKS)} stocks)")
+    return portfolio
+
+
+def load_series(portfolio: Portfolio) -> dict:
+    """Per-stock close lists, the input of the per-row version."""
+    series = {}
+    for stock_id, day, close in db.session.connection().execute(
+        db.select(
+            TimeSeries.stock_id, TimeSeries.date, cast(TimeSeries.close, Float)
+        ).order_by(TimeSeries.stock_id, TimeSeries.date)
+    ):
+        series.setdefault(stock_id, []).append(close)
+    return series
+
+
+def loop_metrics(series: dict) -> None:
+    """Per-row Python version of the core metrics, for comparison."""
+    returns = {
+        stock_id: [b / a - 1 for a, b in zip(closes, closes[1:])]
+        for stock_id, closes in series.items()
+    }
+    n = min(len(r) for r in returns.values())
+    market = [sum(r[i] for r in returns.values()) / len(returns) for i in range(n)]
+    market_mean = sum(market) / n
+    market_var = sum((m - market_mean) ** 2 for m in market)
+    for r in returns.values():
+        mean = sum(r) / n
+        std = math.sqrt(sum((x - mean) ** 2 for x in r) / (n - 1))
+        _ = mean * 252, std * math.sqrt(252)
+        _ = sum((x - mean) * (m - market_mean) for x, m in zip(r, market)) / market_var
+        wealth, peak, drawdown = 1.0, 1.0, 0.0
+        for x in r:
+            wealth *= 1 + x
+            peak = max(peak, wealth)
+            drawdown = min(drawdown, wealth / peak - 1)
+
+
+def vectorized_metrics(closes) -> None:
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    analytics._metrics(returns, returns.mean(axis=1), 0.0)
+    returns.corr()
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    app = build_app()
+    with app.app_context():
+        portfolio = seed(args.years, random.Random(args.seed))
+        ids = list(range(1, len(TOP_50_STOCKS) + 1))
+
+        load_ms = timed(
+            lambda: analytics.load_close_matrix(db.session, ids), args.repeat
+        )
+        closes = analytics.load_close_matrix(db.session, ids)
+        series = load_series(portfolio)
+        vector_ms = timed(lambda: vectorized_metrics(closes), args.repeat)
+        loop_ms = timed(lambda: loop_metrics(series), args.repeat)
+        compute_ms = timed(
+            lambda: analytics.compute_analytics(db.session, portfolio, "max", 0.0),
+            args.repeat,
+        )
+
+        analytics.analytics_cache.clear()
+        app.config["ANALYTICS_RISK_FREE_RATE"] = 0.0
+        with app.test_request_context():
+            analytics.portfolio_analytics(db.session, portfolio, "max")
+            cached_ms = timed(
+                lambda: analytics.portfolio_analytics(db.session, portfolio, "max"),
+                args.repeat,
+            )
+
+    print(f"close matrix load (1 query):    {load_ms:8.2f} ms")
+    print(f"metrics, vectorized:            {vector_ms:8.2f} ms")
+    print(f"metrics, per-row Python loops:  {loop_ms:8.2f} ms")
+    print(f"compute_analytics end to end:   {compute_ms:8.2f} ms")
+    print(f"memoized repeat:                {cached_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
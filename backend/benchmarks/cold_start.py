@@ -0,0 +1,60 @@
+"""
+Cold-start timing for create_app.
+
+Spawns fresh interpreters that import the app package and call create_app,
+reporting import and construction time separately. Nothing here should touch
+the network: backfill and streaming belong to `flask run-ingest`. Run from
+the ``backend`` directory:
+
+    python -m benchmarks.cold_start [--runs 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "create_ms": (t2 - t1) * 1000}))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite://")
+    env.setdefault("JWT_SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+    env["RUN_INGESTION_IN_PROCESS"] = "0"
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    for key in ("import_ms", "create_ms"):
+        values = [s[key] for s in samples]
+        print(
+            f"{key:>10}: median {statistics.median(values):8.2f}  "
+            f"min {min(values):8.2f}  max {max(values):8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
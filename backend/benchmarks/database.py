@@ -0,0 +1,63 @@
+"""
+Databases for the benchmarks that create and drop tables.
+
+The URL never comes from DATABASE_URL: importing `app.config` loads the
+app's `.env`, so that would be the application's own database. Each run
+uses a new SQLite database unless `--database-url` (or BENCH_DATABASE_URL)
+names another one, e.g. a scratch PostgreSQL database to measure a real
+server. That database must be empty or hold only tables an earlier
+benchmark run created: benchmarks mark the databases they build and refuse
+to drop tables anywhere else.
+"""
+
+import os
+import tempfile
+
+from sqlalchemy import Column, DateTime, MetaData, Table, func, inspect
+
+MARKER_TABLE = "benchmark_owned"
+
+_marker = Table(
+    MARKER_TABLE,
+    MetaData(),
+    Column("created_at", DateTime, server_default=func.current_timestamp()),
+)
+
+
+def add_database_argument(parser) -> None:
+    parser.add_argument(
+        "--database-url",
+        default=os.environ.get("BENCH_DATABASE_URL"),
+        help="Scratch database to run against (default: a temporary SQLite "
+        "database). Must be empty or created by an earlier benchmark run.",
+    )
+
+
+def database_url(args, sqlite_filename=None) -> str:
+    """
+    `--database-url`, else a SQLite file in a new temporary directory, or
+    in-memory SQLite when `sqlite_filename` is None.
+    """
+    if args.database_url:
+        return args.database_url
+    if sqlite_filename is None:
+        return "sqlite://"
+    return "sqlite:///" + os.path.join(tempfile.mkdtemp(), sqlite_filename)
+
+
+def reset_database(db) -> None:
+    """
+    Drops and recreates the app's tables, but only in a database that is
+    empty or that a benchmark created. Call inside an app context.
+    """
+    engine = db.engine
+    tables = set(inspect(engine).get_table_names())
+    if tables and MARKER_TABLE not in tables:
+        raise SystemExit(
+            f"Refusing to drop tables in {engine.url.render_as_string()}: no "
+            f"benchmark created it (it has {', '.join(sorted(tables)[:5])}). "
+            "Pass an empty scratch database with --database-url."
+        )
+    db.drop_all()
+    db.create_all()
+    _marker.create(engine, checkfirst=True)
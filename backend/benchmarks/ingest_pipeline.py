@@ -0,0 +1,161 @@
+"""
+Offline benchmark of the full tick -> database -> Socket.IO pipeline.
+
+Writes synthetic tick files, backfills daily history from one through the
+replay provider, connects Socket.IO test clients to the /stocks namespace
+and then runs `start_websocket` against the replay provider, so every tick
+goes through the quote book, tick writer, intraday bar aggregator, order
+book and price broadcaster exactly as live ticks do. Reports handler
+latency, end-to-end throughput and what each stage wrote. Runs on a
+temporary SQLite file unless --database-url names a scratch database (see
+benchmarks/database.py). Run from the ``backend`` directory:
+
+    python -m benchmarks.ingest_pipeline [--ticks 50000] [--speed 0]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from app.config import Config
+from app.extensions import db, socketio
+from app.models import IntradayBar, TimeSeries
+from app.services.quote_book import quote_book, warm_quote_book
+from app.tasks.bar_aggregator import bar_aggregator
+from app.tasks.broadcaster import ALL_SYMBOLS_ROOM, price_broadcaster
+from app.tasks.data_fetch import fetch_and_update_stock_data, start_websocket
+from app.tasks.market_data import ReplayProvider, write_synthetic_ticks
+from app.tasks.order_executor import order_executor
+from app.tasks.tick_writer import tick_writer
+from app.tasks.universe import TOP_50_STOCKS
+from benchmarks.database import add_database_argument, database_url, reset_database
+
+WORKDIR = tempfile.mkdtemp()
+
+
+class PipelineConfig(Config):
+    SQLALCHEMY_DATABASE_URI = None  # set from --database-url in main()
+    JWT_SECRET_KEY = (
+        Config.JWT_SECRET_KEY or "pipeline-benchmark-secret-key-of-sufficient-length"
+    )
+    SOCKETIO_MESSAGE_QUEUE = None
+    MARKET_DATA_RECORD_PATH = None
+
+
+class TimedProvider:
+    """Wraps a provider and records how long the ingestion handler takes per tick."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.latencies = []
+
+    def fetch(self, symbol, start, with_info):
+        return self.provider.fetch(symbol, start, with_info)
+
+    def stream(self, symbols, on_tick):
+        def timed(tick):
+            t0 = time.perf_counter_ns()
+            on_tick(tick)
+            self.latencies.append(time.perf_counter_ns() - t0)
+
+        self.provider.stream(symbols, timed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ticks", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--speed", type=float, default=0.0)
+    parser.add_argument("--interval-ms", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--watchlist", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    add_database_argument(parser)
+    args = parser.parse_args()
+    PipelineConfig.SQLALCHEMY_DATABASE_URI = database_url(args, "pipeline.db")
+    rng = random.Random(args.seed)
+
+    history_path = os.path.join(WORKDIR, "history.jsonl")
+    ticks_path = os.path.join(WORKDIR, "ticks.jsonl")
+    write_synthetic_ticks(
+        history_path, TOP_50_STOCKS, 1000 * args.days, seed=args.seed, days=args.days
+    )
+    write_synthetic_ticks(
+        ticks_path,
+        TOP_50_STOCKS,
+        args.ticks,
+        seed=args.seed + 1,
+        interval_ms=args.interval_ms,
+    )
+
+    app = create_app(PipelineConfig)
+    with app.app_context():
+        reset_database(db)
+        start = time.perf_counter()
+        fetch_and_update_stock_data(ReplayProvider(history_path))
+        print(f"backfill from replay file: {time.perf_counter() - start:.2f}s")
+        warm_quote_book()
+        bars_before = db.session.scalar(db.select(db.func.count(TimeSeries.id)))
+
+    clients = []
+    for index in range(args.clients):
+        client = socketio.test_client(app, namespace="/stocks")
+        tickers = (
+            [ALL_SYMBOLS_ROOM]
+            if index == 0
+            else rng.sample(TOP_50_STOCKS, args.watchlist)
+        )
+        client.emit("subscribe", {"tickers": tickers}, namespace="/stocks")
+        client.get_received("/stocks")
+        clients.append(client)
+
+    provider = ReplayProvider(ticks_path, speed=args.speed)
+    provider.ticks()
+    timed = TimedProvider(provider)
+    start = time.perf_counter()
+    start_websocket(app, timed)
+    stream_s = time.perf_counter() - start
+    tick_writer.stop()
+    bar_aggregator.stop()
+    order_executor.stop()
+    price_broadcaster.stop()
+    price_broadcaster.flush()
+    drain_s = time.perf_counter() - start
+
+    latencies = sorted(timed.latencies)
+    frames = sum(len(client.get_received("/stocks")) for client in clients)
+    with app.app_context():
+        bars_after = db.session.scalar(db.select(db.func.count(TimeSeries.id)))
+        intraday = db.session.scalar(db.select(db.func.count(IntradayBar.id)))
+    writer = tick_writer.stats()
+
+    print(f"\nticks replayed:          {len(latencies)}")
+    print(
+        f"stream wall time:        {stream_s:.2f}s "
+        f"({len(latencies) / stream_s:,.0f} ticks/s)"
+    )
+    print(f"including final flushes: {drain_s:.2f}s")
+    print(
+        f"handler latency:         p50 {statistics.median(latencies) / 1000:.1f} us, "
+        f"p99 {latencies[int(len(latencies) * 0.99)] / 1000:.1f} us"
+    )
+    print(
+        f"tick writer:             {writer['flushes']} flushes, "
+        f"{writer['rows_written']} rows, avg {writer['avg_flush_ms']:.1f} ms"
+    )
+    print(f"day bars:                {bars_before} -> {bars_after}")
+    # Replayed ticks are stamped "now", so only minutes the replay spans close
+    print(
+        f"intraday bars:           {bar_aggregator.ticks_received} ticks "
+        f"aggregated, {intraday} closed bars written"
+    )
+    print(f"quotes in book:          {len(quote_book)}")
+    print(f"frames to {args.clients} clients:    {frames}")
+
+
+if __name__ == "__main__":
+    main()
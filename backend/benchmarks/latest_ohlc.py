@@ -0,0 +1,103 @@
+"""
+Benchmark the latest-OHLC snapshot behind GET /stocks.
+
+Compares the set-based query in ``app.api.stocks.services`` with the old
+one-query-per-stock loop at 50, 500 and 5,000 symbols on a throwaway SQLite
+database. Run from the ``backend`` directory:
+
+    python -m benchmarks.latest_ohlc [--days 30] [--repeat 5]
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+
+from flask import Flask
+from sqlalchemy import desc, insert
+
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.api.stocks import services as stock_services
+
+
+def legacy_latest_ohlc():
+    """The previous N+1 implementation, kept here for comparison."""
+    results = []
+    for stock in db.session.query(Stock).all():
+        latest_timeseries = (
+            db.session.query(TimeSeries)
+            .filter_by(stock_id=stock.stock_id)
+            .order_by(desc(TimeSeries.date))
+            .first()
+        )
+        results.append((stock, latest_timeseries))
+    return results
+
+
+def build_app() -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(symbols: int, days: int) -> None:
+    db.drop_all()
+    db.create_all()
+    db.session.execute(
+        insert(Stock),
+        [
+            {"symbol": f"SYM{i}", "company_name": f"Company {i}", "sector": "Bench"}
+            for i in range(symbols)
+        ],
+    )
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    rows = []
+    for stock_id in range(1, symbols + 1):
+        for d in range(days):
+            price = 100.0 + stock_id + d
+            rows.append(
+                {
+                    "stock_id": stock_id,
+                    "date": start + datetime.timedelta(days=d),
+                    "open": price,
+                    "high": price + 1,
+                    "low": price - 1,
+                    "close": price,
+                    "volume": 1000,
+                }
+            )
+    db.session.execute(insert(TimeSeries), rows)
+    db.session.commit()
+
+
+def measure(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = build_app()
+    with app.app_context():
+        print(f"{'symbols':>8} {'set-based ms':>14} {'n+1 ms':>10}")
+        for symbols in (50, 500, 5000):
+            seed(symbols, args.days)
+            new = measure(stock_services.get_all_stocks_with_latest_ohlc, args.repeat)
+            old = measure(legacy_latest_ohlc, args.repeat)
+            print(f"{symbols:>8} {new:>14.2f} {old:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
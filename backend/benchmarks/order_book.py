@@ -0,0 +1,167 @@
+"""
+Benchmark for matching ticks against resting limit and stop orders.
+
+Builds an order book of `--orders` resting orders spread over `--symbols`
+symbols, priced within 10% of each symbol's starting price, then replays
+a random-walk tick stream through `OrderBook.match`. Every fired order is
+replaced by a new one near the current price, so the book stays at full
+size for the whole run. The same stream is replayed through a linear scan
+of each symbol's orders for comparison. Run from the ``backend`` directory:
+
+    python -m benchmarks.order_book [--orders 100000] [--ticks 200000]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+from app.models import OrderTypeEnum, TransactionTypeEnum
+from app.tasks.order_book import OrderBook, RestingOrder
+
+KINDS = [
+    (TransactionTypeEnum.BUY, OrderTypeEnum.LIMIT, -1),
+    (TransactionTypeEnum.SELL, OrderTypeEnum.LIMIT, 1),
+    (TransactionTypeEnum.SELL, OrderTypeEnum.STOP, -1),
+    (TransactionTypeEnum.BUY, OrderTypeEnum.STOP, 1),
+]
+
+
+class OrderFactory:
+    """Creates orders a few percent away from the price, on the untriggered side."""
+
+    def __init__(self, rng: random.Random, next_id: int = 1):
+        self.rng = rng
+        self.next_id = next_id
+
+    def make(self, symbol: str, price: float) -> RestingOrder:
+        side, order_type, direction = self.rng.choice(KINDS)
+        trigger = price * (1 + direction * self.rng.uniform(0.001, 0.10))
+        order = RestingOrder(
+            self.next_id,
+            self.next_id % 1000,
+            symbol,
+            side,
+            order_type,
+            Decimal(1),
+            Decimal(f"{trigger:.4f}"),
+        )
+        self.next_id += 1
+        return order
+
+
+def tick_stream(prices: Dict[str, float], count: int, rng: random.Random):
+    symbols = list(prices)
+    prices = dict(prices)
+    ticks = []
+    for _ in range(count):
+        symbol = rng.choice(symbols)
+        prices[symbol] *= 1 + rng.gauss(0, 0.002)
+        ticks.append((symbol, round(prices[symbol], 2)))
+    return ticks
+
+
+class LinearBook:
+    """Baseline: every tick scans all resting orders of its symbol."""
+
+    def __init__(self):
+        self.orders: Dict[str, List[RestingOrder]] = {}
+
+    def add(self, order: RestingOrder) -> None:
+        self.orders.setdefault(order.symbol, []).append(order)
+
+    def match(self, symbol: str, price: float) -> List[RestingOrder]:
+        fired, resting = [], []
+        for order in self.orders.get(symbol, ()):
+            trigger = float(order.price)
+            hit = price <= trigger if order.fires_on_fall else price >= trigger
+            (fired if hit else resting).append(order)
+        self.orders[symbol] = resting
+        return fired
+
+
+def replay(book, ticks, factory: OrderFactory):
+    """Returns elapsed seconds, orders fired per tick and match latencies (ns)."""
+    latencies, fired_counts = [], []
+    start = time.perf_counter()
+    for symbol, price in ticks:
+        t0 = time.perf_counter_ns()
+        fired = book.match(symbol, price)
+        latencies.append(time.perf_counter_ns() - t0)
+        fired_counts.append(len(fired))
+        for _ in fired:
+            book.add(factory.make(symbol, price))
+    elapsed = time.perf_counter() - start
+    return elapsed, fired_counts, latencies
+
+
+def report(name: str, elapsed: float, fired_counts, latencies) -> None:
+    ticks, fired = len(fired_counts), sum(fired_counts)
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99)] / 1000
+    print(
+        f"{name:<14} {ticks:>8} {ticks / elapsed:>12,.0f} {fired:>8} "
+        f"{fired / elapsed:>11,.0f} {statistics.median(latencies) / 1000:>8.2f} "
+        f"{p99:>8.2f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--linear-ticks", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    prices = {f"SYM{i}.NS": rng.uniform(50, 5000) for i in range(args.symbols)}
+    symbols = list(prices)
+    factory = OrderFactory(rng)
+    orders = [
+        factory.make(symbol, prices[symbol])
+        for symbol in (rng.choice(symbols) for _ in range(args.orders))
+    ]
+    ticks = tick_stream(prices, args.ticks, rng)
+
+    book = OrderBook()
+    start = time.perf_counter()
+    for order in orders:
+        book.add(order)
+    build_ms = (time.perf_counter() - start) * 1000
+    cancelled = rng.sample(orders, 1000)
+    start = time.perf_counter()
+    for order in cancelled:
+        book.cancel(order.order_id)
+    cancel_us = (time.perf_counter() - start) * 1e6 / len(cancelled)
+    for order in cancelled:
+        book.add(order)
+
+    linear = LinearBook()
+    for order in orders:
+        linear.add(order)
+
+    print(f"resting orders: {len(book)} over {args.symbols} symbols")
+    print(f"book build:     {build_ms:8.1f} ms ({len(orders) / build_ms:,.0f}/ms)")
+    print(f"cancel:         {cancel_us:8.2f} us/order")
+    print(
+        f"\n{'book':<14} {'ticks':>8} {'ticks/s':>12} {'fired':>8} "
+        f"{'fired/s':>11} {'p50 us':>8} {'p99 us':>8}"
+    )
+    # Both books get identical replacement orders, so they must fire alike
+    def replacements():
+        return OrderFactory(random.Random(args.seed + 1), factory.next_id)
+
+    heap = replay(book, ticks, replacements())
+    linear_run = replay(linear, ticks[: args.linear_ticks], replacements())
+    report("heap", *heap)
+    report("linear scan", *linear_run)
+    assert heap[1][: args.linear_ticks] == linear_run[1], "books disagree"
+    print(f"\nresting after replay: {len(book)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Load test for batched price_batch fan-out over Socket.IO.
+
+Connects N in-process Socket.IO test clients to the /stocks namespace, each
+subscribed to a small watchlist (a share of them to every symbol), replays
+random ticks through the PriceBroadcaster and reports frames delivered and
+flush time against the old one-emit-per-tick-per-client model. Run from the
+``backend`` directory:
+
+    python -m benchmarks.price_fanout [--clients 1000] [--ticks 5000]
+"""
+
+import argparse
+import random
+import time
+
+from flask import Flask
+
+from app.extensions import socketio
+from app.tasks.broadcaster import ALL_SYMBOLS_ROOM, PriceBroadcaster
+from app.tasks.data_fetch import TOP_50_STOCKS
+
+
+def build_app() -> Flask:
+    # Importing the routes registers the /stocks Socket.IO handlers
+    from app.api.stocks import routes  # noqa: F401
+
+    flask_app = Flask(__name__)
+    flask_app.config["PRICE_BATCH_INTERVAL_MS"] = 250
+    socketio.init_app(flask_app)
+    return flask_app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--watchlist", type=int, default=5)
+    parser.add_argument("--all-share", type=float, default=0.1)
+    parser.add_argument("--ticks", type=int, default=5000)
+    parser.add_argument("--intervals", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = build_app()
+    broadcaster = PriceBroadcaster(app)
+
+    start = time.perf_counter()
+    clients = []
+    for _ in range(args.clients):
+        client = socketio.test_client(app, namespace="/stocks")
+        if rng.random() < args.all_share:
+            tickers = [ALL_SYMBOLS_ROOM]
+        else:
+            tickers = rng.sample(TOP_50_STOCKS, args.watchlist)
+        client.emit("subscribe", {"tickers": tickers}, namespace="/stocks")
+        client.get_received("/stocks")
+        clients.append(client)
+    print(f"connected {len(clients)} clients in {time.perf_counter() - start:.2f}s")
+
+    ticks_per_interval = args.ticks // args.intervals
+    flush_time = 0.0
+    frames_emitted = 0
+    for _ in range(args.intervals):
+        for _ in range(ticks_per_interval):
+            broadcaster.publish(rng.choice(TOP_50_STOCKS), rng.uniform(100, 200))
+        start = time.perf_counter()
+        frames_emitted += broadcaster.flush()
+        flush_time += time.perf_counter() - start
+
+    delivered = sum(len(client.get_received("/stocks")) for client in clients)
+    legacy = ticks_per_interval * args.intervals * args.clients
+    print(f"ticks published:         {ticks_per_interval * args.intervals}")
+    print(f"room emits:              {frames_emitted}")
+    print(f"frames delivered:        {delivered}")
+    print(f"legacy frames (ticks*N): {legacy}")
+    print(f"fan-out reduction:       {legacy / max(delivered, 1):.1f}x")
+    print(f"avg flush:               {flush_time / args.intervals * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmark for /stocks/screener on a universe of thousands of symbols.
+
+Seeds a throwaway SQLite database with `--symbols` stocks of `--days` daily
+bars each, then times the first indicator build, an incremental refresh
+after a new bar lands for every stock (and for a handful of stocks), and
+full-universe screens over the columnar table. Run from the ``backend``
+directory:
+
+    python -m benchmarks.screener [--symbols 5000] [--days 300]
+"""
+
+import argparse
+import datetime
+import random
+import statistics
+import time
+
+from flask import Flask
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.services.data_versions import bump_data_versions, data_versions
+from app.services.screener import Screener
+
+SCREENS = {
+    "oversold (rsi_14 <= 30), by rsi": dict(
+        ranges=[("rsi_14", None, 30.0)], sort="rsi_14", limit=50
+    ),
+    "near 52w high, liquid, by change": dict(
+        ranges=[("pct_from_52w_high", -5.0, None), ("avg_volume_20", 500.0, None)],
+        sort="change_pct",
+        descending=True,
+        limit=50,
+    ),
+    "above sma_200 in one sector": dict(
+        ranges=[("pct_from_52w_low", 10.0, None)],
+        sector="Sector 3",
+        sort="sma_200",
+        limit=50,
+    ),
+    "whole universe, by volume": dict(sort="volume", descending=True),
+}
+
+
+def build_app() -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(symbols: int, days: int, rng: random.Random) -> dict:
+    db.create_all()
+    db.session.execute(
+        insert(Stock),
+        [
+            {
+                "symbol": f"SYM{i}",
+                "company_name": f"Company {i}",
+                "sector": f"Sector {i % 10}",
+            }
+            for i in range(symbols)
+        ],
+    )
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    last_closes = {}
+    for stock_id in range(1, symbols + 1):
+        price = rng.uniform(50, 3000)
+        rows = []
+        for d in range(days):
+            price *= 1 + rng.gauss(0, 0.02)
+            rows.append(
+                {
+                    "stock_id": stock_id,
+                    "date": start + datetime.timedelta(days=d),
+                    "open": price,
+                    "high": price * 1.01,
+                    "low": price * 0.99,
+                    "close": price,
+                    "volume": rng.randint(100, 5000),
+                }
+            )
+        db.session.execute(insert(TimeSeries), rows)
+        last_closes[stock_id] = price
+    db.session.commit()
+    return last_closes
+
+
+def land_bars(last_closes: dict, stock_ids, day, rng: random.Random) -> None:
+    """Inserts one bar on `day` for each stock and bumps its data version."""
+    rows = []
+    for stock_id in stock_ids:
+        price = last_closes[stock_id] * (1 + rng.gauss(0, 0.02))
+        last_closes[stock_id] = price
+        rows.append(
+            {
+                "stock_id": stock_id,
+                "date": day,
+                "open": price,
+                "high": price * 1.01,
+                "low": price * 0.99,
+                "close": price,
+                "volume": rng.randint(100, 5000),
+            }
+        )
+    db.session.execute(insert(TimeSeries), rows)
+    bump_data_versions(stock_ids)
+    db.session.commit()
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def median_us(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    app = build_app()
+    with app.app_context():
+        data_versions.ttl = 0
+        last_closes = seed(args.symbols, args.days, rng)
+        next_day = datetime.date.today()
+        print(f"seeded {args.symbols * args.days} bars")
+        screener = Screener()
+        all_ids = list(range(1, args.symbols + 1))
+
+        build_ms = timed(screener.table)
+        land_bars(last_closes, all_ids, next_day, rng)
+        all_ms = timed(screener.table)
+        few = rng.sample(all_ids, 50)
+        land_bars(last_closes, few, next_day + datetime.timedelta(days=1), rng)
+        few_ms = timed(screener.table)
+        table = screener.table()
+
+        print(f"initial build ({args.symbols} stocks):     {build_ms:10.1f} ms")
+        print(f"refresh, new bar for every stock: {all_ms:10.1f} ms")
+        print(f"refresh, new bar for 50 stocks:   {few_ms:10.1f} ms")
+        print(f"\n{'screen':<36} {'matches':>8} {'screen us':>10} {'+rows us':>10}")
+        for name, params in SCREENS.items():
+            count, positions = table.screen(**params)
+            screen_us = median_us(lambda: table.screen(**params), args.repeat)
+            rows_us = median_us(
+                lambda: table.rows(table.screen(**params)[1][:50]), args.repeat
+            )
+            print(f"{name:<36} {count:>8} {screen_us:>10.1f} {rows_us:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Micro-benchmark for transaction list serialization.
+
+Compares the legacy path (per-row ``__table__.columns`` walk with the
+``sanitize_value`` isinstance chain, then the stdlib JSON encoder) with the
+compiled per-model serializer fed column tuples and encoded by orjson. No
+database is needed. Run from the ``backend`` directory:
+
+    python -m benchmarks.serialization [--rows 10000] [--repeat 20]
+"""
+
+import argparse
+import datetime
+import json
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from app.models import Transaction, TransactionTypeEnum
+from app.routes.portfolio_routes import sanitize_value
+from app.serialization import model_serializer, orjson
+
+
+def legacy_model_to_dict(obj):
+    return {c.name: sanitize_value(getattr(obj, c.name)) for c in obj.__table__.columns}
+
+
+def make_transactions(count: int, rng: random.Random):
+    base = datetime.datetime(2024, 1, 1)
+    transactions = []
+    for i in range(count):
+        tx = Transaction(
+            portfolio_id=1,
+            stock_id=rng.randint(1, 50),
+            transaction_type=rng.choice(list(TransactionTypeEnum)),
+            quantity=Decimal(rng.randint(1, 500)),
+            price_per_share=Decimal(f"{rng.uniform(10, 5000):.4f}"),
+        )
+        tx.transaction_id = i + 1
+        tx.transaction_date = base + datetime.timedelta(minutes=i)
+        transactions.append(tx)
+    return transactions
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    transactions = make_transactions(args.rows, random.Random(args.seed))
+    serializer = model_serializer(Transaction)
+    keys = serializer.keys
+    rows = [tuple(getattr(tx, key) for key in keys) for tx in transactions]
+
+    def legacy():
+        return json.dumps([legacy_model_to_dict(tx) for tx in transactions])
+
+    def compiled_stdlib():
+        return json.dumps(serializer.rows(rows))
+
+    def compiled_orjson():
+        return orjson.dumps(serializer.rows(rows))
+
+    legacy_out = json.loads(legacy())
+    if json.loads(compiled_stdlib()) != legacy_out:
+        raise SystemExit("compiled serializer output differs from legacy path")
+
+    results = [
+        ("legacy model_to_dict + json", timed(legacy, args.repeat)),
+        ("compiled rows + json", timed(compiled_stdlib, args.repeat)),
+    ]
+    if orjson is not None:
+        if orjson.loads(compiled_orjson()) != legacy_out:
+            raise SystemExit("orjson output differs from legacy path")
+        results.append(("compiled rows + orjson", timed(compiled_orjson, args.repeat)))
+    else:
+        print("orjson is not installed; skipping the orjson path")
+
+    baseline = results[0][1]
+    print(f"{args.rows} transactions, median of {args.repeat} runs")
+    for label, ms in results:
+        print(f"{label:>28}: {ms:8.2f} ms  ({baseline / ms:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+"""
+End-to-end latency and throughput suite for the backend hot paths.
+
+Builds the app against a freshly seeded database with `--users` users, each
+holding `--holdings` stocks with `--transactions` past trades, and
+`--years` years of daily bars for `--stocks` stocks. Nothing is fetched
+from yfinance. Each HTTP scenario is then timed through the Flask test
+client from `--concurrency` threads. Tick ingestion is timed by replaying
+synthetic ticks through `start_websocket`. Results are written as JSON, to
+stdout or `--output`, with the human-readable table on stderr. Pass
+`--compare` with an earlier result file to see the change per scenario;
+the run exits non-zero if any p50 or p99 regressed by more than
+`--threshold`. Runs on a temporary SQLite file unless `--database-url`
+names a scratch database (see benchmarks/database.py). Run from the
+``backend`` directory:
+
+    python -m benchmarks.suite [--users 50] [--years 5] [--output run.json]
+    python -m benchmarks.suite --compare run.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Holding, Portfolio, Stock, TimeSeries, Transaction, User
+from app.models import TransactionTypeEnum
+from app.tasks.universe import TOP_50_STOCKS
+from benchmarks.database import add_database_argument, database_url, reset_database
+
+WORKDIR = tempfile.mkdtemp()
+
+
+class SuiteConfig(Config):
+    SQLALCHEMY_DATABASE_URI = None  # set from --database-url in main()
+    JWT_SECRET_KEY = (
+        Config.JWT_SECRET_KEY or "benchmark-suite-secret-key-of-sufficient-length"
+    )
+    RUN_INGESTION_IN_PROCESS = False
+    SOCKETIO_MESSAGE_QUEUE = None
+    MARKET_DATA_RECORD_PATH = None
+
+
+@dataclass
+class SeedSpec:
+    stocks: int = 50
+    years: int = 5
+    users: int = 50
+    holdings: int = 10
+    transactions: int = 200
+    seed: int = 42
+
+
+@dataclass
+class Seeded:
+    stock_ids: List[int]
+    symbols: List[str]
+    headers: List[Dict[str, str]]
+
+
+def _trading_days(years: int) -> List[datetime.date]:
+    day = datetime.date.today() - datetime.timedelta(days=365 * years)
+    days = []
+    while day <= datetime.date.today():
+        if day.weekday() < 5:
+            days.append(day)
+        day += datetime.timedelta(days=1)
+    return days
+
+
+def seed_database(app, spec: SeedSpec) -> Seeded:
+    """Creates a fresh schema and bulk-loads it as described by `spec`."""
+    rng = random.Random(spec.seed)
+    symbols = TOP_50_STOCKS[: spec.stocks] + [
+        f"B{i}.NS" for i in range(max(0, spec.stocks - len(TOP_50_STOCKS)))
+    ]
+    with app.app_context():
+        reset_database(db)
+        db.session.execute(
+            insert(Stock),
+            [
+                {"symbol": s, "company_name": s, "sector": f"Sector {i % 10}"}
+                for i, s in enumerate(symbols)
+            ],
+        )
+        stock_ids = list(db.session.scalars(db.select(Stock.stock_id)))
+        closes = {}
+        days = _trading_days(spec.years)
+        for stock_id in stock_ids:
+            close = rng.uniform(100, 3000)
+            rows = []
+            for day in days:
+                open_ = close
+                close *= 1 + rng.gauss(0, 0.015)
+                rows.append(
+                    {
+                        "stock_id": stock_id,
+                        "date": day,
+                        "open": open_,
+                        "high": max(open_, close) * 1.005,
+                        "low": min(open_, close) * 0.995,
+                        "close": close,
+                        "volume": rng.randint(10_000, 1_000_000),
+                    }
+                )
+            db.session.execute(insert(TimeSeries), rows)
+            closes[stock_id] = close
+
+        password_hash = generate_password_hash("benchmark")
+        db.session.execute(
+            insert(User),
+            [
+                {
+                    "username": f"user{i}",
+                    "email": f"user{i}@example.com",
+                    "password_hash": password_hash,
+                }
+                for i in range(spec.users)
+            ],
+        )
+        user_ids = list(db.session.scalars(db.select(User.user_id)))
+        db.session.execute(
+            insert(Portfolio),
+            [
+                {
+                    "user_id": user_id,
+                    "portfolio_name": f"Portfolio {user_id}",
+                    "cash_balance": 1_000_000_000,
+                }
+                for user_id in user_ids
+            ],
+        )
+        portfolios = dict(
+            db.session.execute(
+                db.select(Portfolio.user_id, Portfolio.portfolio_id)
+            ).all()
+        )
+
+        now = datetime.datetime.utcnow()
+        holdings, transactions = [], []
+        for portfolio_id in portfolios.values():
+            held = rng.sample(stock_ids, min(spec.holdings, len(stock_ids)))
+            for stock_id in held:
+                holdings.append(
+                    {
+                        "portfolio_id": portfolio_id,
+                        "stock_id": stock_id,
+                        "quantity": rng.randint(1, 500),
+                        "average_cost_per_share": closes[stock_id],
+                    }
+                )
+            for _ in range(spec.transactions):
+                stock_id = rng.choice(held)
+                transactions.append(
+                    {
+                        "portfolio_id": portfolio_id,
+                        "stock_id": stock_id,
+                        "transaction_type": rng.choice(list(TransactionTypeEnum)),
+                        "quantity": rng.randint(1, 50),
+                        "price_per_share": closes[stock_id] * rng.uniform(0.8, 1.2),
+                        "transaction_date": now
+                        - datetime.timedelta(minutes=rng.randint(1, 525_600)),
+                    }
+                )
+        if holdings:
+            db.session.execute(insert(Holding), holdings)
+        if transactions:
+            db.session.execute(insert(Transaction), transactions)
+        db.session.commit()
+
+        # Same claims as /auth/login issues
+        with app.test_request_context():
+            headers = [
+                {
+                    "Authorization": "Bearer "
+                    + create_access_token(
+                        identity=str(user_id),
+                        additional_claims={"portfolio_id": portfolio_id},
+                    )
+                }
+                for user_id, portfolio_id in portfolios.items()
+            ]
+    return Seeded(stock_ids, symbols, headers)
+
+
+def summarize(latencies_ns: List[int], elapsed: float, errors: int) -> Dict:
+    latencies = sorted(latencies_ns)
+
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * q))] / 1e6
+
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "mean_ms": statistics.fmean(latencies) / 1e6,
+        "max_ms": latencies[-1] / 1e6,
+        "throughput_per_s": len(latencies) / elapsed,
+    }
+
+
+Request = Tuple[str, str, dict]
+
+
+def run_http(
+    app,
+    make_request: Callable[[random.Random], Request],
+    requests: int,
+    warmup: int,
+    concurrency: int,
+    seed: int,
+) -> Dict:
+    """
+    Sends `requests` requests built by `make_request`, split over
+    `concurrency` threads with one test client each, after `warmup`
+    untimed ones. Any response outside 2xx counts as an error.
+    """
+    client = app.test_client()
+    rng = random.Random(seed)
+    for _ in range(warmup):
+        method, url, kwargs = make_request(rng)
+        client.open(url, method=method, **kwargs)
+
+    latencies: List[int] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(count: int, worker_seed: int):
+        worker_client = app.test_client()
+        worker_rng = random.Random(worker_seed)
+        local, failed = [], 0
+        for _ in range(count):
+            method, url, kwargs = make_request(worker_rng)
+            t0 = time.perf_counter_ns()
+            status = worker_client.open(url, method=method, **kwargs).status_code
+            local.append(time.perf_counter_ns() - t0)
+            failed += not 200 <= status < 300
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    shares = [requests // concurrency] * concurrency
+    shares[0] += requests - sum(shares)
+    threads = [
+        threading.Thread(target=worker, args=(share, seed + index + 1))
+        for index, share in enumerate(shares)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter() - start, errors[0])
+
+
+def run_ingest(app, ticks: int, seed: int) -> Dict:
+    """
+    Replays `ticks` synthetic ticks through `start_websocket` at full speed.
+    Latency is the tick handler's; throughput includes the final flush of
+    the tick writer and bar aggregator.
+    """
+    from app.tasks.bar_aggregator import bar_aggregator
+    from app.tasks.broadcaster import price_broadcaster
+    from app.tasks.data_fetch import start_websocket
+    from app.tasks.market_data import ReplayProvider, write_synthetic_ticks
+    from app.tasks.order_executor import order_executor
+    from app.tasks.tick_writer import tick_writer
+    from benchmarks.ingest_pipeline import TimedProvider
+
+    path = os.path.join(WORKDIR, "ticks.jsonl")
+    write_synthetic_ticks(path, TOP_50_STOCKS, ticks, seed=seed)
+    provider = ReplayProvider(path, speed=0)
+    provider.ticks()
+    timed = TimedProvider(provider)
+
+    start = time.perf_counter()
+    start_websocket(app, timed)
+    tick_writer.stop()
+    bar_aggregator.stop()
+    order_executor.stop()
+    price_broadcaster.stop()
+    result = summarize(timed.latencies, time.perf_counter() - start, 0)
+    result["rows_written"] = tick_writer.stats()["rows_written"]
+    return result
+
+
+def http_scenarios(seeded: Seeded) -> Dict[str, Callable[[random.Random], Request]]:
+    def auth(rng):
+        return {"headers": rng.choice(seeded.headers)}
+
+    return {
+        "stocks_list": lambda rng: ("GET", "/stocks", auth(rng)),
+        "stock_history": lambda rng: (
+            "GET",
+            f"/stocks/{rng.choice(seeded.stock_ids)}/history",
+            auth(rng),
+        ),
+        "portfolio_holdings": lambda rng: ("GET", "/portfolio/holdings", auth(rng)),
+        "transactions_get": lambda rng: ("GET", "/portfolio/transactions", auth(rng)),
+        "transactions_post": lambda rng: (
+            "POST",
+            "/portfolio/transactions",
+            {
+                **auth(rng),
+                "json": {
+                    "symbol": rng.choice(seeded.symbols),
+                    "quantity": str(rng.randint(1, 10)),
+                    "transaction_type": "BUY",
+                },
+            },
+        ),
+    }
+
+
+def _git(*args) -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Prints per-scenario changes; returns the regressions beyond `threshold`."""
+    regressions = []
+    for key in ("seed", "concurrency", "database", "ticks"):
+        if results["meta"].get(key) != baseline.get("meta", {}).get(key):
+            print(f"warning: baseline was run with a different {key}", file=sys.stderr)
+    print(f"\n{'vs baseline':<20} {'p50':>9} {'p99':>9} {'per s':>9}", file=sys.stderr)
+    for name, current in results["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        changes = [
+            current[key] / before[key] - 1 if before[key] else 0.0
+            for key in ("p50_ms", "p99_ms", "throughput_per_s")
+        ]
+        print(
+            f"{name:<20} {changes[0]:>+9.1%} {changes[1]:>+9.1%} {changes[2]:>+9.1%}",
+            file=sys.stderr,
+        )
+        for key, change in zip(("p50_ms", "p99_ms"), changes):
+            if change > threshold:
+                regressions.append(f"{name} {key} {change:+.1%}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stocks", type=int, default=50)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--holdings", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--ticks", type=int, default=20_000)
+    parser.add_argument(
+        "--only", help="Comma-separated scenarios to run (ticks_ingest included)."
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write JSON here instead of stdout.")
+    parser.add_argument("--compare", help="Earlier JSON result to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.20)
+    add_database_argument(parser)
+    args = parser.parse_args()
+    SuiteConfig.SQLALCHEMY_DATABASE_URI = database_url(args, "suite.db")
+
+    spec = SeedSpec(
+        args.stocks, args.years, args.users, args.holdings, args.transactions, args.seed
+    )
+    only = set(args.only.split(",")) if args.only else None
+    scenarios: Dict[str, Dict] = {}
+
+    # App and task logging goes to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        app = create_app(SuiteConfig)
+        start = time.perf_counter()
+        seeded = seed_database(app, spec)
+        print(f"seeded database in {time.perf_counter() - start:.1f}s")
+
+        for name, make_request in http_scenarios(seeded).items():
+            if only is None or name in only:
+                scenarios[name] = run_http(
+                    app,
+                    make_request,
+                    args.requests,
+                    args.warmup,
+                    args.concurrency,
+                    args.seed,
+                )
+        if only is None or "ticks_ingest" in only:
+            scenarios["ticks_ingest"] = run_ingest(app, args.ticks, args.seed)
+
+    print(
+        f"\n{'scenario':<20} {'count':>6} {'err':>4} {'p50 ms':>8} "
+        f"{'p99 ms':>8} {'per s':>9}",
+        file=sys.stderr,
+    )
+    for name, r in scenarios.items():
+        print(
+            f"{name:<20} {r['count']:>6} {r['errors']:>4} {r['p50_ms']:>8.3f} "
+            f"{r['p99_ms']:>8.3f} {r['throughput_per_s']:>9.1f}",
+            file=sys.stderr,
+        )
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "git_commit": _git("rev-parse", "HEAD"),
+            "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": dialect,
+            "seed": asdict(spec),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "ticks": args.ticks,
+        },
+        "scenarios": scenarios,
+    }
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("\nregressions: " + ", ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Query plans and timings for the hot TimeSeries reads, before and after the
+unique (stock_id, date) and covering (stock_id, date, close) indexes.
+
+"before" rebuilds the previous layout (a plain, non-unique (stock_id, date)
+index and no covering index); "after" is the current model. For each layout
+the script prints the plan of every query (EXPLAIN QUERY PLAN on SQLite,
+EXPLAIN ANALYZE on PostgreSQL) and its median runtime. Runs on in-memory
+SQLite unless --database-url names a scratch database (see
+benchmarks/database.py). Run from the ``backend`` directory:
+
+    python -m benchmarks.time_series_plans [--symbols 500] [--days 250]
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+
+from flask import Flask
+from sqlalchemy import insert, text
+
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.api.stocks import services as stock_services
+from benchmarks.database import add_database_argument, database_url, reset_database
+
+
+def build_app(url: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def seed(symbols: int, days: int) -> None:
+    reset_database(db)
+    db.session.execute(
+        insert(Stock),
+        [
+            {"symbol": f"SYM{i}", "company_name": f"Company {i}", "sector": "Bench"}
+            for i in range(symbols)
+        ],
+    )
+    start = datetime.date.today() - datetime.timedelta(days=days)
+    rows = []
+    for stock_id in range(1, symbols + 1):
+        for d in range(days):
+            price = 100 + stock_id + d * 0.25
+            rows.append(
+                {
+                    "stock_id": stock_id,
+                    "date": start + datetime.timedelta(days=d),
+                    "open": price,
+                    "high": price + 1,
+                    "low": price - 1,
+                    "close": price,
+                    "volume": 1000,
+                }
+            )
+    db.session.execute(insert(TimeSeries), rows)
+    db.session.commit()
+
+
+def use_previous_indexes() -> None:
+    """Recreates the index layout from before the unique/covering indexes."""
+    db.session.execute(text("DROP INDEX ix_time_series_stock_id_date_close"))
+    db.session.execute(text("DROP INDEX ix_time_series_stock_id_date"))
+    db.session.execute(
+        text(
+            "CREATE INDEX ix_time_series_stock_id_date "
+            "ON time_series (stock_id, date)"
+        )
+    )
+    db.session.commit()
+    db.session.execute(text("ANALYZE"))
+
+
+def hot_queries(symbols: int, days: int):
+    watchlist = list(range(1, symbols + 1, max(symbols // 20, 1)))
+    close_bars = stock_services.latest_bars_subquery(
+        watchlist, columns=(TimeSeries.stock_id, TimeSeries.date, TimeSeries.close)
+    )
+    latest = stock_services.latest_bars_subquery()
+    since = datetime.date.today() - datetime.timedelta(days=days // 4)
+    return {
+        "latest bar per stock (/stocks)": db.select(latest).where(latest.c.rn == 1),
+        "latest + previous close (valuation)": db.select(close_bars).where(
+            close_bars.c.rn <= 2
+        ),
+        "latest bar for one stock (quotes)": db.select(TimeSeries)
+        .filter_by(stock_id=symbols // 2)
+        .order_by(TimeSeries.date.desc())
+        .limit(1),
+        "history range (/history)": db.select(
+            TimeSeries.date, TimeSeries.close, TimeSeries.volume
+        )
+        .where(TimeSeries.stock_id == symbols // 2, TimeSeries.date >= since)
+        .order_by(TimeSeries.date.desc()),
+    }
+
+
+def explain(stmt) -> str:
+    dialect = db.engine.dialect
+    sql = str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == "sqlite":
+        rows = db.session.execute(text("EXPLAIN QUERY PLAN " + sql)).all()
+        return "\n".join(f"    {row[-1]}" for row in rows)
+    rows = db.session.execute(text("EXPLAIN ANALYZE " + sql)).all()
+    return "\n".join(f"    {row[0]}" for row in rows)
+
+
+def measure(stmt, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.session.execute(stmt).all()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def report(label: str, queries, repeat: int) -> dict:
+    print(f"== {label} ==")
+    timings = {}
+    for name, stmt in queries.items():
+        timings[name] = measure(stmt, repeat)
+        print(f"  {name}: {timings[name]:.2f} ms")
+        print(explain(stmt))
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--days", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    app = build_app(database_url(args))
+    with app.app_context():
+        seed(args.symbols, args.days)
+        queries = hot_queries(args.symbols, args.days)
+        db.session.execute(text("ANALYZE"))
+        after = report("after", queries, args.repeat)
+        use_previous_indexes()
+        before = report("before", queries, args.repeat)
+
+        print(f"\n{'query':<40} {'before ms':>10} {'after ms':>10}")
+        for name in queries:
+            print(f"{name:<40} {before[name]:>10.2f} {after[name]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
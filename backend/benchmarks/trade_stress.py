@@ -0,0 +1,168 @@
+"""
+Concurrency stress test for POST /portfolio/transactions.
+
+Fires hundreds of buy and sell orders for a single user from many threads at
+once, then checks that the portfolio's cash balance and every holding still
+match a replay of the recorded transactions. Exits non-zero on any
+inconsistency. Runs on a temporary SQLite file unless --database-url names
+a scratch database (see benchmarks/database.py). Run from the ``backend``
+directory:
+
+    python -m benchmarks.trade_stress [--threads 16] [--orders 25]
+"""
+
+import argparse
+import collections
+import datetime
+import random
+import sys
+import threading
+import time
+from decimal import Decimal
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Holding, Portfolio, Stock, TimeSeries, Transaction
+from app.models import TransactionTypeEnum
+from benchmarks.database import add_database_argument, database_url, reset_database
+
+SYMBOLS = ["AAA.NS", "BBB.NS", "CCC.NS"]
+
+
+class StressConfig(Config):
+    SQLALCHEMY_DATABASE_URI = None  # set from --database-url in main()
+    JWT_SECRET_KEY = (
+        Config.JWT_SECRET_KEY or "stress-test-secret-key-of-sufficient-length"
+    )
+    RUN_INGESTION_IN_PROCESS = False
+    TRADE_MAX_ATTEMPTS = 20
+
+
+def seed(app) -> dict:
+    with app.app_context():
+        reset_database(db)
+        db.session.execute(
+            insert(Stock),
+            [{"symbol": s, "company_name": s, "sector": "Stress"} for s in SYMBOLS],
+        )
+        db.session.execute(
+            insert(TimeSeries),
+            [
+                {
+                    "stock_id": stock_id,
+                    "date": datetime.date.today(),
+                    "open": 100.0,
+                    "high": 100.0,
+                    "low": 100.0,
+                    "close": 100.0 * stock_id,
+                    "volume": 0,
+                }
+                for stock_id in range(1, len(SYMBOLS) + 1)
+            ],
+        )
+        db.session.commit()
+
+    client = app.test_client()
+    client.post(
+        "/auth/register",
+        json={"username": "stress", "password": "stress", "email": "s@example.com"},
+    )
+    token = client.post(
+        "/auth/login", json={"username": "stress", "password": "stress"}
+    ).get_json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def worker(app, headers, orders, seed_value, statuses, lock):
+    rng = random.Random(seed_value)
+    client = app.test_client()
+    for _ in range(orders):
+        body = {
+            "symbol": rng.choice(SYMBOLS),
+            "quantity": str(rng.randint(1, 40)),
+            "transaction_type": rng.choice(["BUY", "BUY", "SELL"]),
+        }
+        status = client.post(
+            "/portfolio/transactions", json=body, headers=headers
+        ).status_code
+        with lock:
+            statuses[status] += 1
+
+
+def verify(app) -> list:
+    """Replays the transaction log and compares it with stored state."""
+    errors = []
+    with app.app_context():
+        portfolio = db.session.scalars(db.select(Portfolio)).one()
+        cash = Decimal("100000.00")
+        quantities = collections.defaultdict(Decimal)
+        for tx in db.session.scalars(
+            db.select(Transaction).order_by(Transaction.transaction_id)
+        ):
+            amount = tx.quantity * tx.price_per_share
+            if tx.transaction_type == TransactionTypeEnum.BUY:
+                cash -= amount
+                quantities[tx.stock_id] += tx.quantity
+            else:
+                cash += amount
+                quantities[tx.stock_id] -= tx.quantity
+            if cash < 0 or quantities[tx.stock_id] < 0:
+                errors.append(f"transaction {tx.transaction_id} overdraws portfolio")
+
+        if portfolio.cash_balance != cash:
+            errors.append(f"cash {portfolio.cash_balance} != replayed {cash}")
+
+        held = {
+            h.stock_id: h.quantity for h in db.session.scalars(db.select(Holding))
+        }
+        for stock_id, quantity in quantities.items():
+            if held.get(stock_id, Decimal(0)) != quantity:
+                errors.append(
+                    f"stock {stock_id}: holding {held.get(stock_id)} != replayed {quantity}"
+                )
+    return errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--orders", type=int, default=25)
+    add_database_argument(parser)
+    args = parser.parse_args()
+
+    StressConfig.SQLALCHEMY_DATABASE_URI = database_url(args, "stress.db")
+    app = create_app(StressConfig)
+    headers = seed(app)
+
+    statuses = collections.Counter()
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(
+            target=worker, args=(app, headers, args.orders, i, statuses, lock)
+        )
+        for i in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    total = args.threads * args.orders
+    print(f"{total} orders in {elapsed:.2f}s ({total / elapsed:.0f} orders/s)")
+    print("status codes:", dict(sorted(statuses.items())))
+
+    errors = verify(app)
+    for error in errors:
+        print("INCONSISTENT:", error)
+    if errors:
+        sys.exit(1)
+    print("balances and holdings are consistent")
+
+
+if __name__ == "__main__":
+    main()
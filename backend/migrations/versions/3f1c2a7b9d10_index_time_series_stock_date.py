@@ -0,0 +1,26 @@
+"""Index time_series on (stock_id, date)
+
+Revision ID: 3f1c2a7b9d10
+Revises: 09d833113007
+Create Date: 2026-10-17 09:12:44.118502
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9d10'
+down_revision = '09d833113007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('time_series', schema=None) as batch_op:
+        batch_op.create_index('ix_time_series_stock_id_date', ['stock_id', 'date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('time_series', schema=None) as batch_op:
+        batch_op.drop_index('ix_time_series_stock_id_date')
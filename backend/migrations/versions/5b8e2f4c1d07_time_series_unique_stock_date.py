@@ -0,0 +1,36 @@
+"""Dedupe time_series and make (stock_id, date) unique
+
+Revision ID: 5b8e2f4c1d07
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-17 17:30:12.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2f4c1d07'
+down_revision = '3f1c2a7b9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Keep the most recently written bar for each (stock_id, date); earlier
+    # duplicates come from the live stream racing the backfill.
+    op.execute(
+        'DELETE FROM time_series WHERE id NOT IN '
+        '(SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM time_series '
+        'GROUP BY stock_id, date) AS latest)'
+    )
+
+    with op.batch_alter_table('time_series', schema=None) as batch_op:
+        batch_op.drop_index('ix_time_series_stock_id_date')
+        batch_op.create_index('ix_time_series_stock_id_date', ['stock_id', 'date'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('time_series', schema=None) as batch_op:
+        batch_op.drop_index('ix_time_series_stock_id_date')
+        batch_op.create_index('ix_time_series_stock_id_date', ['stock_id', 'date'], unique=False)
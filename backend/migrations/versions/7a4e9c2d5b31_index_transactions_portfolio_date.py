@@ -0,0 +1,26 @@
+"""Index transactions on (portfolio_id, transaction_date)
+
+Revision ID: 7a4e9c2d5b31
+Revises: 5b8e2f4c1d07
+Create Date: 2026-10-17 11:02:19.530114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4e9c2d5b31'
+down_revision = '5b8e2f4c1d07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_transactions_portfolio_id_transaction_date', ['portfolio_id', 'transaction_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_portfolio_id_transaction_date')
@@ -0,0 +1,63 @@
+"""Add tax_lots and realized_gains tables
+
+Run `flask rebuild-tax-lots` after upgrading to derive lots for existing
+transactions.
+
+Revision ID: a6c29e4f8d13
+Revises: f1b8c6d2e574
+Create Date: 2026-10-17 21:12:08.441927
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6c29e4f8d13'
+down_revision = 'f1b8c6d2e574'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'tax_lots',
+        sa.Column('lot_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('stock_id', sa.Integer(), nullable=False),
+        sa.Column('opened_at', sa.DateTime(), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('remaining_quantity', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('cost_per_share', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('transaction_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.portfolio_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['stock_id'], ['stocks.stock_id'], ),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.transaction_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('lot_id')
+    )
+    with op.batch_alter_table('tax_lots', schema=None) as batch_op:
+        batch_op.create_index('ix_tax_lots_portfolio_id_stock_id_opened_at', ['portfolio_id', 'stock_id', 'opened_at'], unique=False)
+
+    op.create_table(
+        'realized_gains',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('stock_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_sold', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('proceeds', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('cost_basis', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.portfolio_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['stock_id'], ['stocks.stock_id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('portfolio_id', 'stock_id', name='uq_realized_gains_portfolio_stock')
+    )
+
+
+def downgrade():
+    op.drop_table('realized_gains')
+
+    with op.batch_alter_table('tax_lots', schema=None) as batch_op:
+        batch_op.drop_index('ix_tax_lots_portfolio_id_stock_id_opened_at')
+
+    op.drop_table('tax_lots')
@@ -0,0 +1,53 @@
+"""Add pending_orders table for limit and stop orders
+
+Revision ID: b3e7a1c95d02
+Revises: a6c29e4f8d13
+Create Date: 2026-10-17 23:41:52.118304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e7a1c95d02'
+down_revision = 'a6c29e4f8d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'pending_orders',
+        sa.Column('order_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('stock_id', sa.Integer(), nullable=False),
+        sa.Column('side', sa.Enum('BUY', 'SELL', name='order_side_enum'), nullable=False),
+        sa.Column('order_type', sa.Enum('LIMIT', 'STOP', name='order_type_enum'), nullable=False),
+        sa.Column('quantity', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('price', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('status', sa.Enum('OPEN', 'FILLED', 'CANCELLED', 'REJECTED', name='order_status_enum'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('filled_at', sa.DateTime(), nullable=True),
+        sa.Column('transaction_id', sa.Integer(), nullable=True),
+        sa.Column('reject_reason', sa.String(length=255), nullable=True),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.portfolio_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['stock_id'], ['stocks.stock_id'], ),
+        sa.ForeignKeyConstraint(['transaction_id'], ['transactions.transaction_id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('order_id')
+    )
+    with op.batch_alter_table('pending_orders', schema=None) as batch_op:
+        batch_op.create_index('ix_pending_orders_portfolio_id_status', ['portfolio_id', 'status'], unique=False)
+        batch_op.create_index('ix_pending_orders_status_updated_at', ['status', 'updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pending_orders', schema=None) as batch_op:
+        batch_op.drop_index('ix_pending_orders_status_updated_at')
+        batch_op.drop_index('ix_pending_orders_portfolio_id_status')
+
+    op.drop_table('pending_orders')
+    bind = op.get_bind()
+    for name in ('order_status_enum', 'order_type_enum', 'order_side_enum'):
+        sa.Enum(name=name).drop(bind, checkfirst=True)
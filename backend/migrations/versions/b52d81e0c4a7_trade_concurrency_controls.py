@@ -0,0 +1,42 @@
+"""Add idempotency_keys table and portfolio version column
+
+Revision ID: b52d81e0c4a7
+Revises: 7a4e9c2d5b31
+Create Date: 2026-10-17 12:40:51.207733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52d81e0c4a7'
+down_revision = '7a4e9c2d5b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('portfolios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version_id', sa.Integer(), server_default='1', nullable=False))
+
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('response_status', sa.Integer(), nullable=False),
+        sa.Column('response_body', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.portfolio_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('portfolio_id', 'key', name='uq_idempotency_keys_portfolio_key')
+    )
+
+
+def downgrade():
+    op.drop_table('idempotency_keys')
+
+    with op.batch_alter_table('portfolios', schema=None) as batch_op:
+        batch_op.drop_column('version_id')
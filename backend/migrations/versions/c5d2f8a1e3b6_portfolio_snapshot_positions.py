@@ -0,0 +1,26 @@
+"""Store end-of-day positions on portfolio_daily_snapshots
+
+Revision ID: c5d2f8a1e3b6
+Revises: b3e7a1c95d02
+Create Date: 2026-10-18 10:12:37.402915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d2f8a1e3b6'
+down_revision = 'b3e7a1c95d02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('portfolio_daily_snapshots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('positions', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('portfolio_daily_snapshots', schema=None) as batch_op:
+        batch_op.drop_column('positions')
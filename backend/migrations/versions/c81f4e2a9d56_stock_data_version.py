@@ -0,0 +1,26 @@
+"""Add data_version column to stocks
+
+Revision ID: c81f4e2a9d56
+Revises: b52d81e0c4a7
+Create Date: 2026-10-17 17:52:08.416302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4e2a9d56'
+down_revision = 'b52d81e0c4a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('stocks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('stocks', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,38 @@
+"""Store time_series prices as Numeric and cover (stock_id, date, close)
+
+Revision ID: d4a7b3e91f20
+Revises: c81f4e2a9d56
+Create Date: 2026-10-17 18:20:37.904155
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7b3e91f20'
+down_revision = 'c81f4e2a9d56'
+branch_labels = None
+depends_on = None
+
+PRICE_COLUMNS = ('open', 'high', 'low', 'close')
+
+
+def upgrade():
+    with op.batch_alter_table('time_series', schema=None) as batch_op:
+        for column in PRICE_COLUMNS:
+            batch_op.alter_column(column,
+                   existing_type=sa.Float(),
+                   type_=sa.Numeric(precision=18, scale=4),
+                   existing_nullable=False)
+        batch_op.create_index('ix_time_series_stock_id_date_close', ['stock_id', 'date', 'close'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('time_series', schema=None) as batch_op:
+        batch_op.drop_index('ix_time_series_stock_id_date_close')
+        for column in PRICE_COLUMNS:
+            batch_op.alter_column(column,
+                   existing_type=sa.Numeric(precision=18, scale=4),
+                   type_=sa.Float(),
+                   existing_nullable=False)
@@ -0,0 +1,29 @@
+"""Track shares sold without an open lot on realized_gains
+
+Run `flask rebuild-tax-lots` after upgrading to move unmatched shares out of
+existing proceeds.
+
+Revision ID: d8e4b2a6f1c9
+Revises: c5d2f8a1e3b6
+Create Date: 2026-10-18 14:03:51.226184
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e4b2a6f1c9'
+down_revision = 'c5d2f8a1e3b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('realized_gains', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('unmatched_quantity', sa.Numeric(precision=18, scale=8), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('realized_gains', schema=None) as batch_op:
+        batch_op.drop_column('unmatched_quantity')
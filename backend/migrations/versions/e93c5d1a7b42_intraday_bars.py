@@ -0,0 +1,42 @@
+"""Add intraday_bars table
+
+Revision ID: e93c5d1a7b42
+Revises: d4a7b3e91f20
+Create Date: 2026-10-17 18:58:12.530671
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93c5d1a7b42'
+down_revision = 'd4a7b3e91f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'intraday_bars',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('stock_id', sa.Integer(), nullable=False),
+        sa.Column('interval_minutes', sa.SmallInteger(), nullable=False),
+        sa.Column('start', sa.DateTime(), nullable=False),
+        sa.Column('open', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('high', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('low', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('close', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('volume', sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(['stock_id'], ['stocks.stock_id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('intraday_bars', schema=None) as batch_op:
+        batch_op.create_index('ix_intraday_bars_stock_id_interval_start', ['stock_id', 'interval_minutes', 'start'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('intraday_bars', schema=None) as batch_op:
+        batch_op.drop_index('ix_intraday_bars_stock_id_interval_start')
+
+    op.drop_table('intraday_bars')
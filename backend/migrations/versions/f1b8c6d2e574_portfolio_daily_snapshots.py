@@ -0,0 +1,40 @@
+"""Add portfolio_daily_snapshots table
+
+Revision ID: f1b8c6d2e574
+Revises: e93c5d1a7b42
+Create Date: 2026-10-17 19:41:26.718093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b8c6d2e574'
+down_revision = 'e93c5d1a7b42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'portfolio_daily_snapshots',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('cash_balance', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('market_value', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('cost_basis', sa.Numeric(precision=18, scale=4), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.portfolio_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('portfolio_daily_snapshots', schema=None) as batch_op:
+        batch_op.create_index('ix_portfolio_daily_snapshots_portfolio_id_date', ['portfolio_id', 'date'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('portfolio_daily_snapshots', schema=None) as batch_op:
+        batch_op.drop_index('ix_portfolio_daily_snapshots_portfolio_id_date')
+
+    op.drop_table('portfolio_daily_snapshots')
@@ -0,0 +1,181 @@
+"""
+Shared fixtures. Every test gets a new app on its own SQLite database
+(in memory unless a test overrides `database_url`), never the database
+DATABASE_URL points at, and starts with the process-wide caches empty.
+Modules override `app_config` to change other settings.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import insert
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.services.analytics import analytics_cache
+from app.services.data_versions import data_versions
+from app.services.identity_cache import identity_cache
+from app.services.quote_book import quote_book
+from app.services.screener import screener
+from app.tasks.order_book import order_book
+
+SYMBOLS = ["AAA.NS", "BBB.NS", "CCC.NS"]
+HISTORY_DAYS = 30
+
+
+class TestingConfig(Config):
+    __test__ = False
+
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    JWT_SECRET_KEY = "test-secret-key-that-is-long-enough-for-hs256"
+    RUN_INGESTION_IN_PROCESS = False
+    PROFILING_ENABLED = False
+    METRICS_ENABLED = False
+
+
+def _clear_caches() -> None:
+    for cache in (
+        quote_book,
+        identity_cache,
+        analytics_cache,
+        data_versions,
+        screener,
+        order_book,
+    ):
+        cache.clear()
+
+
+@pytest.fixture
+def database_url():
+    return "sqlite://"
+
+
+@pytest.fixture
+def app_config():
+    return {}
+
+
+@pytest.fixture
+def app(database_url, app_config):
+    config = type(
+        "Config",
+        (TestingConfig,),
+        {**app_config, "SQLALCHEMY_DATABASE_URI": database_url},
+    )
+    _clear_caches()
+    flask_app = create_app(config)
+    with flask_app.app_context():
+        # `db` remembers bind keys from earlier apps; the "ingest" bind of a
+        # file database shares its tables, so only the default bind is created
+        db.create_all(bind_key=None)
+        yield flask_app
+        db.session.remove()
+        db.engine.dispose()
+    _clear_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def stocks(app):
+    """Three stocks with a month of daily bars closing at 100, 101, ..."""
+    db.session.execute(
+        insert(Stock),
+        [{"symbol": s, "company_name": s, "sector": "Test"} for s in SYMBOLS],
+    )
+    first = date.today() - timedelta(days=HISTORY_DAYS - 1)
+    db.session.execute(
+        insert(TimeSeries),
+        [
+            {
+                "stock_id": stock_id,
+                "date": first + timedelta(days=day),
+                "open": 100 + day,
+                "high": 101 + day,
+                "low": 99 + day,
+                "close": 100 + day,
+                "volume": 1000,
+            }
+            for stock_id in range(1, len(SYMBOLS) + 1)
+            for day in range(HISTORY_DAYS)
+        ],
+    )
+    db.session.commit()
+    return SYMBOLS
+
+
+@pytest.fixture
+def set_price():
+    """Sets a symbol's live price in the quote book."""
+
+    def set_price(symbol: str, price) -> None:
+        quote_book.apply_tick(symbol, float(price))
+
+    return set_price
+
+
+@pytest.fixture
+def make_user(client):
+    """Registers a user (with the default portfolio) and returns auth headers."""
+
+    def make_user(username: str = "alice") -> dict:
+        client.post(
+            "/auth/register",
+            json={
+                "username": username,
+                "password": "secret",
+                "email": f"{username}@example.com",
+            },
+        )
+        token = client.post(
+            "/auth/login", json={"username": username, "password": "secret"}
+        ).get_json()["access_token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    return make_user
+
+
+@pytest.fixture
+def auth(make_user):
+    return make_user()
+
+
+
+@pytest.fixture
+def trade(client):
+    """
+    Posts a trade to /portfolio/transactions and returns the response.
+    Threads pass their own `client`.
+    """
+
+    def trade(auth, symbol, quantity, side="BUY", key=None, client=client):
+        headers = {**auth, "Idempotency-Key": key} if key else auth
+        return client.post(
+            "/portfolio/transactions",
+            json={
+                "symbol": symbol,
+                "quantity": str(quantity),
+                "transaction_type": side,
+            },
+            headers=headers,
+        )
+
+    return trade
+
+
+@pytest.fixture
+def cash(client):
+    """Returns a user's portfolio cash balance."""
+
+    def cash(auth) -> Decimal:
+        portfolio = client.get("/portfolio/", headers=auth).get_json()
+        return Decimal(str(portfolio["cash_balance"]))
+
+    return cash
@@ -0,0 +1,133 @@
+import threading
+from datetime import date, timedelta
+
+from app.extensions import db
+from app.models import Stock, TimeSeries
+from app.tasks.backfill import Bar, SymbolHistory, backfill
+
+TODAY = date(2026, 3, 20)
+
+
+class FakeHistorySource:
+    """Serves canned bars and records every fetch."""
+
+    def __init__(self, bars_by_symbol, failing=()):
+        self.bars_by_symbol = bars_by_symbol
+        self.failing = set(failing)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, start, with_info):
+        with self._lock:
+            self.calls.append((symbol, start, with_info))
+        if symbol in self.failing:
+            raise ConnectionError(f"{symbol} is unavailable")
+        history = SymbolHistory(symbol, list(self.bars_by_symbol.get(symbol, [])))
+        if with_info:
+            history.company_name = f"{symbol} Ltd"
+            history.sector = "Energy"
+        return history
+
+
+def _bars(first: date, days: int, close: float = 100.0):
+    return [
+        Bar(first + timedelta(days=i), close, close + 1, close - 1, close + i, 1000)
+        for i in range(days)
+    ]
+
+
+def _stored(symbol):
+    return db.session.scalars(
+        db.select(TimeSeries.date)
+        .join(Stock, Stock.stock_id == TimeSeries.stock_id)
+        .where(Stock.symbol == symbol)
+        .order_by(TimeSeries.date)
+    ).all()
+
+
+def test_new_symbol_is_created_with_its_metadata_and_history(app):
+    source = FakeHistorySource({"NEW.NS": _bars(TODAY - timedelta(days=4), 5)})
+
+    result = backfill(["NEW.NS"], source, today=TODAY)
+
+    assert source.calls == [("NEW.NS", None, True)]
+    stock = db.session.scalars(db.select(Stock).filter_by(symbol="NEW.NS")).one()
+    assert (stock.company_name, stock.sector) == ("NEW.NS Ltd", "Energy")
+    assert len(_stored("NEW.NS")) == 5
+    assert (result.symbols_fetched, result.bars_inserted) == (1, 5)
+
+
+def test_known_symbol_is_fetched_from_the_day_after_its_last_bar(app):
+    first = TODAY - timedelta(days=9)
+    backfill(["AAA.NS"], FakeHistorySource({"AAA.NS": _bars(first, 5)}), today=TODAY)
+    version = db.session.scalar(db.select(Stock.data_version))
+
+    # The source returns overlapping history; only the new days are added
+    source = FakeHistorySource({"AAA.NS": _bars(first, 10)})
+    result = backfill(["AAA.NS"], source, today=TODAY)
+
+    assert source.calls == [("AAA.NS", first + timedelta(days=4), False)]
+    assert _stored("AAA.NS") == [first + timedelta(days=i) for i in range(10)]
+    assert (result.bars_inserted, result.bars_refreshed) == (5, 1)
+    db.session.expire_all()
+    assert db.session.scalar(db.select(Stock.data_version)) == version + 1
+
+
+def test_up_to_date_symbols_are_not_fetched(app):
+    backfill(
+        ["AAA.NS"],
+        FakeHistorySource({"AAA.NS": _bars(TODAY - timedelta(days=2), 3)}),
+        today=TODAY,
+    )
+    source = FakeHistorySource({})
+
+    result = backfill(["AAA.NS"], source, today=TODAY)
+
+    assert source.calls == []
+    assert result.symbols_skipped == 1
+
+
+def test_a_failing_symbol_does_not_stop_the_others(app):
+    source = FakeHistorySource(
+        {
+            "AAA.NS": _bars(TODAY - timedelta(days=2), 3),
+            "CCC.NS": _bars(TODAY - timedelta(days=2), 3),
+        },
+        failing={"BBB.NS"},
+    )
+
+    result = backfill(
+        ["AAA.NS", "BBB.NS", "CCC.NS"], source, max_workers=3, today=TODAY
+    )
+
+    assert (result.symbols_fetched, result.symbols_failed) == (2, 1)
+    assert len(_stored("AAA.NS")) == len(_stored("CCC.NS")) == 3
+    assert db.session.scalars(db.select(Stock).filter_by(symbol="BBB.NS")).all() == []
+
+
+def test_duplicate_bars_for_a_day_are_stored_once(app):
+    day = TODAY - timedelta(days=1)
+    source = FakeHistorySource({"AAA.NS": _bars(day, 1) + _bars(day, 1, close=90.0)})
+
+    result = backfill(["AAA.NS"], source, today=TODAY)
+
+    assert _stored("AAA.NS") == [day]
+    assert result.bars_inserted == 1
+
+
+def test_a_partial_last_day_is_replaced_by_the_daily_bar(app):
+    day = TODAY - timedelta(days=1)
+    # As the tick writer leaves it when ingestion stops before the close
+    backfill(
+        ["AAA.NS"], FakeHistorySource({"AAA.NS": _bars(day, 1, 90.0)}), today=TODAY
+    )
+    version = db.session.scalar(db.select(Stock.data_version))
+
+    result = backfill(
+        ["AAA.NS"], FakeHistorySource({"AAA.NS": _bars(day, 1, 95.0)}), today=TODAY
+    )
+
+    close = db.session.scalar(db.select(TimeSeries.close))
+    assert (close, result.bars_refreshed, result.bars_inserted) == (95, 1, 0)
+    db.session.expire_all()
+    assert db.session.scalar(db.select(Stock.data_version)) == version + 1
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from app.extensions import db
+from app.models import IntradayBar
+from app.tasks.bar_aggregator import BarAggregator
+
+MINUTE = datetime(2026, 10, 16, 9, 30)
+
+
+def _bars():
+    db.session.expire_all()
+    return db.session.execute(
+        db.select(
+            IntradayBar.start,
+            IntradayBar.open,
+            IntradayBar.high,
+            IntradayBar.low,
+            IntradayBar.close,
+            IntradayBar.volume,
+        )
+    ).all()
+
+
+def test_stop_writes_the_open_bar(app, stocks):
+    aggregator = BarAggregator(app)
+    aggregator.add(stocks[0], 100, 1000, MINUTE.replace(second=5))
+    aggregator.add(stocks[0], 102, 1010, MINUTE.replace(second=20))
+
+    aggregator.stop()
+
+    assert _bars() == [(MINUTE, 100, 102, 100, 102, 10)]
+    assert aggregator.stats()["bars_open"] == 0
+
+
+def test_a_minute_split_by_a_restart_is_merged(app, stocks):
+    before = BarAggregator(app)
+    before.add(stocks[0], 100, 1000, MINUTE.replace(second=5))
+    before.add(stocks[0], 102, 1010, MINUTE.replace(second=20))
+    before.stop()
+
+    after = BarAggregator(app)
+    after.add(stocks[0], 99, 1020, MINUTE.replace(second=40))
+    after.add(stocks[0], 101, 1025, MINUTE.replace(second=50))
+    after.stop()
+
+    assert _bars() == [(MINUTE, 100, 102, 99, 101, 15)]
@@ -0,0 +1,132 @@
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.models import Holding, Portfolio, Stock, Transaction, TransactionTypeEnum
+from app.services.portfolio_service import (
+    LIMIT_NOT_REACHED,
+    BatchRejectedError,
+    OrderRequest,
+    execute_batch,
+)
+
+
+def _batch(client, auth, *orders):
+    return client.post(
+        "/portfolio/orders:batch",
+        json={
+            "orders": [
+                {"symbol": symbol, "quantity": str(quantity), "transaction_type": side}
+                for symbol, quantity, side in orders
+            ]
+        },
+        headers=auth,
+    )
+
+
+def _held(symbol) -> Decimal:
+    quantity = db.session.scalar(
+        db.select(Holding.quantity)
+        .join(Stock, Stock.stock_id == Holding.stock_id)
+        .where(Stock.symbol == symbol)
+    )
+    return quantity or Decimal(0)
+
+
+def test_sells_in_a_batch_can_draw_on_its_buys(client, auth, stocks, set_price):
+    set_price(stocks[0], 100)
+
+    response = _batch(client, auth, (stocks[0], 3, "SELL"), (stocks[0], 5, "BUY"))
+
+    assert response.status_code == 201
+    results = response.get_json()["results"]
+    assert [r["index"] for r in results] == [0, 1]
+    assert [r["transaction"]["transaction_type"] for r in results] == ["SELL", "BUY"]
+    assert _held(stocks[0]) == 2
+
+
+def test_cash_is_checked_on_the_net_of_the_batch(client, auth, cash, stocks, set_price):
+    set_price(stocks[0], 100)
+    set_price(stocks[1], 200)
+    assert _batch(client, auth, (stocks[0], 900, "BUY")).status_code == 201
+    assert cash(auth) == 10000
+
+    # The buy alone costs 100,000; the sale in the same batch pays for it
+    response = _batch(client, auth, (stocks[1], 500, "BUY"), (stocks[0], 900, "SELL"))
+
+    assert response.status_code == 201
+    assert cash(auth) == 0
+    assert (_held(stocks[0]), _held(stocks[1])) == (0, 500)
+
+
+def test_a_failing_order_rejects_the_whole_batch(client, auth, cash, stocks, set_price):
+    set_price(stocks[0], 100)
+    set_price(stocks[2], 100)
+    start = cash(auth)
+
+    response = _batch(client, auth, (stocks[0], 1, "BUY"), (stocks[2], 5, "SELL"))
+
+    assert response.status_code == 400
+    assert response.get_json()["results"] == [
+        {"index": 0, "status": "not_executed"},
+        {"index": 1, "status": "rejected", "message": "Insufficient holdings to sell."},
+    ]
+    assert cash(auth) == start
+    assert db.session.scalars(db.select(Transaction)).all() == []
+
+
+def test_an_unaffordable_batch_marks_every_buy(client, auth, stocks, set_price):
+    set_price(stocks[0], 30000)
+    set_price(stocks[1], 30000)
+
+    response = _batch(client, auth, (stocks[0], 2, "BUY"), (stocks[1], 2, "BUY"))
+
+    assert response.status_code == 400
+    assert [r["status"] for r in response.get_json()["results"]] == [
+        "rejected",
+        "rejected",
+    ]
+
+
+def test_unknown_symbols_are_rejected_by_index(client, auth, stocks, set_price):
+    set_price(stocks[0], 100)
+
+    response = _batch(client, auth, (stocks[0], 1, "BUY"), ("NOPE.NS", 1, "BUY"))
+
+    assert response.status_code == 400
+    assert response.get_json()["results"][1] == {
+        "index": 1,
+        "status": "rejected",
+        "message": "Stock with symbol 'NOPE.NS' not found.",
+    }
+
+
+def test_only_the_sells_are_blamed_for_missing_holdings(
+    client, auth, stocks, set_price
+):
+    set_price(stocks[0], 100)
+
+    response = _batch(client, auth, (stocks[0], 2, "BUY"), (stocks[0], 5, "SELL"))
+
+    assert response.status_code == 400
+    assert [r["status"] for r in response.get_json()["results"]] == [
+        "not_executed",
+        "rejected",
+    ]
+
+
+def test_unreached_limits_are_not_reported_as_unknown_stocks(
+    app, auth, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    portfolio = db.session.scalars(db.select(Portfolio)).one()
+    order = OrderRequest(
+        stocks[0], Decimal(1), TransactionTypeEnum.BUY, limit_price=Decimal(90)
+    )
+
+    with pytest.raises(BatchRejectedError) as rejected:
+        execute_batch(db.session, portfolio, [order])
+
+    assert str(rejected.value) == "Some limit prices were not reached."
+    assert rejected.value.errors == {0: LIMIT_NOT_REACHED}
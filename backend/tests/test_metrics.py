@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import text
+
+from app.extensions import db
+from app.instrumentation import QueryBudgetExceeded, QueryRecorder
+
+
+@pytest.fixture
+def app_config():
+    return {"METRICS_ENABLED": True, "METRICS_TOKEN": None}
+
+
+def test_metrics_are_served_to_direct_loopback_requests(client):
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert "stockvault_identity_cache_hits" in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize(
+    "environ, headers",
+    [
+        ({"REMOTE_ADDR": "10.0.0.7"}, {}),
+        ({}, {"X-Forwarded-For": "203.0.113.9"}),
+    ],
+)
+def test_metrics_are_refused_to_other_clients(client, environ, headers):
+    response = client.get("/metrics", environ_base=environ, headers=headers)
+
+    assert response.status_code == 403
+
+
+def test_a_configured_token_is_required(app, client):
+    app.config["METRICS_TOKEN"] = "scrape-me"
+
+    assert client.get("/metrics").status_code == 403
+    assert (
+        client.get(
+            "/metrics",
+            headers={"Authorization": "Bearer wrong"},
+            environ_base={"REMOTE_ADDR": "10.0.0.7"},
+        ).status_code
+        == 403
+    )
+    assert (
+        client.get(
+            "/metrics",
+            headers={"Authorization": "Bearer scrape-me"},
+            environ_base={"REMOTE_ADDR": "10.0.0.7"},
+        ).status_code
+        == 200
+    )
+
+
+def test_budget_errors_without_kept_statements_only_count(app):
+    with QueryRecorder() as recorder:
+        for _ in range(3):
+            db.session.execute(text("SELECT 1"))
+
+    error = QueryBudgetExceeded("view", 2, recorder)
+
+    assert str(error) == "view ran 3 SQL statements, budget is 2"
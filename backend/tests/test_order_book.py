@@ -0,0 +1,195 @@
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.models import (
+    Holding,
+    OrderStatusEnum,
+    OrderTypeEnum,
+    PendingOrder,
+    TransactionTypeEnum,
+)
+from app.tasks.order_book import OrderBook, RestingOrder
+from app.tasks.order_executor import OrderExecutor
+
+BUY, SELL = TransactionTypeEnum.BUY, TransactionTypeEnum.SELL
+LIMIT, STOP = OrderTypeEnum.LIMIT, OrderTypeEnum.STOP
+
+
+def _order(order_id, side, order_type, price, symbol="AAA.NS"):
+    return RestingOrder(
+        order_id, 1, symbol, side, order_type, Decimal(1), Decimal(price)
+    )
+
+
+def _ids(orders):
+    return [order.order_id for order in orders]
+
+
+@pytest.fixture
+def book():
+    return OrderBook()
+
+
+@pytest.mark.parametrize(
+    "side, order_type, misses, fires",
+    [
+        (BUY, LIMIT, 100.5, 100),
+        (SELL, LIMIT, 99.5, 100),
+        (BUY, STOP, 99.5, 100),
+        (SELL, STOP, 100.5, 100),
+    ],
+)
+def test_orders_fire_once_the_price_reaches_their_trigger(
+    book, side, order_type, misses, fires
+):
+    book.add(_order(1, side, order_type, 100))
+
+    assert book.match("AAA.NS", misses) == []
+    assert _ids(book.match("AAA.NS", fires)) == [1]
+    assert book.match("AAA.NS", fires) == []
+    assert len(book) == 0
+
+
+def test_a_tick_past_the_trigger_fires_too(book):
+    book.add(_order(1, BUY, LIMIT, 100))
+    book.add(_order(2, SELL, LIMIT, 100))
+
+    assert _ids(book.match("AAA.NS", 90)) == [1]
+    assert _ids(book.match("AAA.NS", 110)) == [2]
+
+
+def test_orders_fire_in_trigger_price_order_then_first_added(book):
+    book.add(_order(1, BUY, LIMIT, 95))
+    book.add(_order(2, BUY, LIMIT, 99))
+    book.add(_order(3, SELL, STOP, 99))
+    book.add(_order(4, BUY, LIMIT, 97))
+
+    assert _ids(book.match("AAA.NS", 96)) == [2, 3, 4]
+    assert _ids(book.match("AAA.NS", 90)) == [1]
+
+
+def test_ticks_only_match_their_own_symbol(book):
+    book.add(_order(1, BUY, LIMIT, 100, symbol="AAA.NS"))
+
+    assert book.match("BBB.NS", 50) == []
+    assert book.match("NOPE.NS", 50) == []
+    assert 1 in book
+
+
+def test_adding_a_resting_id_again_is_ignored(book):
+    book.add(_order(1, BUY, LIMIT, 100))
+    book.add(_order(1, BUY, LIMIT, 200))
+
+    assert book.match("AAA.NS", 150) == []
+    assert len(book) == 1
+
+
+def test_cancelled_orders_never_fire(book):
+    book.add(_order(1, BUY, LIMIT, 100))
+    book.add(_order(2, BUY, LIMIT, 99))
+
+    assert book.cancel(1) is True
+    assert book.cancel(1) is False
+    assert book.cancel(42) is False
+    assert 1 not in book
+    assert _ids(book.match("AAA.NS", 90)) == [2]
+
+
+def test_a_re_added_order_fires_only_at_its_new_price(book):
+    book.add(_order(1, BUY, LIMIT, 100))
+    book.add(_order(2, SELL, LIMIT, 500))
+    book.cancel(1)
+    book.add(_order(1, BUY, LIMIT, 80))
+
+    assert book.match("AAA.NS", 90) == []
+    assert _ids(book.match("AAA.NS", 80)) == [1]
+
+
+def test_compaction_keeps_the_live_orders(book):
+    for order_id in range(10):
+        book.add(_order(order_id, BUY, LIMIT, 100 - order_id))
+    for order_id in range(0, 10, 2):
+        book.cancel(order_id)
+    book.cancel(1)
+
+    assert len(book) == 4
+    assert _ids(book.match("AAA.NS", 0)) == [3, 5, 7, 9]
+    assert book.stats()["matched"] == 4
+
+
+def _place(client, auth, symbol, quantity, side, order_type, price):
+    response = client.post(
+        "/portfolio/orders",
+        json={
+            "symbol": symbol,
+            "quantity": str(quantity),
+            "transaction_type": side,
+            "order_type": order_type,
+            "price": str(price),
+        },
+        headers=auth,
+    )
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["order_id"]
+
+
+def _status(order_id) -> OrderStatusEnum:
+    db.session.expire_all()
+    return db.session.get(PendingOrder, order_id).status
+
+
+@pytest.fixture
+def executor(app):
+    return OrderExecutor(OrderBook(), app)
+
+
+def test_a_fired_limit_order_is_filled(client, auth, stocks, set_price, executor):
+    order_id = _place(client, auth, stocks[0], 5, "BUY", "LIMIT", 90)
+    assert executor.load() == 1
+
+    set_price(stocks[0], 90)
+    executor.submit(executor.book.match(stocks[0], 90))
+
+    assert executor.execute() == 1
+    assert _status(order_id) == OrderStatusEnum.FILLED
+    assert db.session.scalars(db.select(Holding)).one().quantity == 5
+
+
+def test_an_order_cancelled_after_it_fires_is_not_filled(
+    client, auth, stocks, set_price, executor
+):
+    order_id = _place(client, auth, stocks[0], 5, "BUY", "LIMIT", 90)
+    executor.load()
+    executor.submit(executor.book.match(stocks[0], 90))
+
+    response = client.delete(f"/portfolio/orders/{order_id}", headers=auth)
+
+    assert response.status_code == 200
+    set_price(stocks[0], 90)
+    assert executor.execute() == 0
+    assert _status(order_id) == OrderStatusEnum.CANCELLED
+    assert db.session.scalars(db.select(Holding)).all() == []
+
+
+def test_sync_drops_cancelled_orders_from_the_book(client, auth, stocks, executor):
+    order_id = _place(client, auth, stocks[0], 5, "BUY", "LIMIT", 90)
+    executor.load()
+
+    client.delete(f"/portfolio/orders/{order_id}", headers=auth)
+    executor.sync()
+
+    assert order_id not in executor.book
+    assert executor.book.match(stocks[0], 50) == []
+
+
+def test_an_unaffordable_order_is_rejected(client, auth, stocks, set_price, executor):
+    order_id = _place(client, auth, stocks[0], 10, "BUY", "STOP", 20000)
+    executor.load()
+
+    set_price(stocks[0], 20000)
+    executor.submit(executor.book.match(stocks[0], 20000))
+
+    assert executor.execute() == 0
+    assert _status(order_id) == OrderStatusEnum.REJECTED
@@ -0,0 +1,58 @@
+import pytest
+
+from app.instrumentation import assert_max_queries
+from app.services.data_versions import data_versions
+from app.services.identity_cache import identity_cache
+
+# Statements per request with cold identity and data version caches, auth
+# lookups included. Each GET view declares the same number with @query_budget.
+READ_BUDGETS = [
+    ("/stocks", 4),
+    ("/stocks/1/history", 3),
+    ("/stocks/screener", 4),
+    ("/portfolio/holdings", 3),
+    ("/portfolio/summary", 3),
+    ("/portfolio/realized", 4),
+    ("/portfolio/analytics", 7),
+    ("/portfolio/history", 3),
+    ("/portfolio/transactions", 3),
+    ("/portfolio/orders", 3),
+]
+
+# One attempt of POST /portfolio/transactions; a SELL also closes tax lots
+TRADE_BUDGET = 12
+IDEMPOTENCY_STATEMENTS = 2
+
+
+@pytest.fixture
+def traded(auth, trade, stocks, set_price):
+    set_price(stocks[0], 100)
+    set_price(stocks[1], 50)
+    assert trade(auth, stocks[0], 10, "BUY").status_code == 201
+    assert trade(auth, stocks[1], 10, "BUY").status_code == 201
+    assert trade(auth, stocks[0], 4, "SELL").status_code == 201
+
+
+@pytest.mark.parametrize("path, budget", READ_BUDGETS)
+def test_read_views_stay_within_their_budget(app, client, auth, traded, path, budget):
+    endpoint, _ = app.url_map.bind("localhost").match(path, "GET")
+    assert app.view_functions[endpoint].query_budget == budget
+
+    identity_cache.clear()
+    data_versions.clear()
+    with assert_max_queries(budget, path):
+        response = client.get(path, headers=auth)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("side", ["BUY", "SELL"])
+@pytest.mark.parametrize("key", [None, "trade-1"])
+def test_a_trade_stays_within_its_budget(auth, trade, stocks, traded, side, key):
+    budget = TRADE_BUDGET + (IDEMPOTENCY_STATEMENTS if key else 0)
+
+    identity_cache.clear()
+    with assert_max_queries(budget, f"{side} /portfolio/transactions"):
+        response = trade(auth, stocks[0], 1, side, key=key)
+
+    assert response.status_code == 201
@@ -0,0 +1,57 @@
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from app.extensions import db
+from app.models import Stock
+from app.services.quote_book import QuoteBook, lookup_quote, quote_book, quote_from_row
+
+TODAY = date.today()
+
+
+def _row(day, close=100):
+    return SimpleNamespace(
+        date=day, open=close, high=close, low=close, close=close, volume=10
+    )
+
+
+def test_a_database_read_does_not_replace_a_newer_tick():
+    book = QuoteBook()
+    read_at = time.time()
+    tick = book.apply_tick("AAA.NS", 105)
+
+    kept = book.put(quote_from_row("AAA.NS", _row(TODAY), read_at))
+
+    assert kept is tick
+    assert book.get("AAA.NS").price == 105
+
+
+def test_a_newer_day_replaces_an_older_one():
+    book = QuoteBook()
+    book.apply_tick("AAA.NS", 105, today=TODAY - timedelta(days=1))
+
+    book.put(quote_from_row("AAA.NS", _row(TODAY)))
+
+    assert book.get("AAA.NS").date == TODAY
+
+
+def test_bars_from_earlier_days_are_never_fresh():
+    old = quote_from_row("AAA.NS", _row(TODAY - timedelta(days=3)))
+
+    assert not old.is_fresh(3600)
+    assert quote_from_row("AAA.NS", _row(TODAY)).is_fresh(60)
+
+
+def test_lookup_returns_the_tick_that_beat_the_database(app, stocks, monkeypatch):
+    stock = db.session.scalars(db.select(Stock).filter_by(symbol=stocks[0])).one()
+    scalar = db.session.scalar
+
+    def tick_during_query(*args, **kwargs):
+        row = scalar(*args, **kwargs)
+        quote_book.apply_tick(stocks[0], 500)
+        return row
+
+    monkeypatch.setattr(db.session, "scalar", tick_during_query)
+
+    assert lookup_quote(db.session, stock, max_age=60).price == 500
+    assert quote_book.get(stocks[0]).price == 500
@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.api.stocks.services import get_history_columns
+from app.extensions import db
+from app.instrumentation import QueryRecorder
+from app.models import Stock, TimeSeries
+
+DAYS = 800
+
+
+@pytest.fixture
+def long_history(app):
+    """One stock with two years of bars, weekends included, closing at 1, 2, ..."""
+    db.session.execute(insert(Stock), [{"symbol": "OLD.NS", "company_name": "Old"}])
+    first = date(2026, 10, 16) - timedelta(days=DAYS - 1)
+    db.session.execute(
+        insert(TimeSeries),
+        [
+            {
+                "stock_id": 1,
+                "date": first + timedelta(days=day),
+                "open": day + 1,
+                "high": day + 1,
+                "low": day + 1,
+                "close": day + 1,
+                "volume": 1,
+            }
+            for day in range(DAYS)
+        ],
+    )
+    db.session.commit()
+    return 1
+
+
+@pytest.mark.parametrize("resolution", ["weekly", "monthly"])
+@pytest.mark.parametrize("limit", [1, 5, 12])
+def test_limited_buckets_match_the_full_history(long_history, resolution, limit):
+    full = get_history_columns(long_history, resolution=resolution)
+
+    with QueryRecorder(keep_statements=True) as recorder:
+        limited = get_history_columns(long_history, limit=limit, resolution=resolution)
+
+    assert limited == {key: values[:limit] for key, values in full.items()}
+    assert "LIMIT" in recorder.statements[-1]
+
+
+def test_limit_is_exact_for_daily_bars(long_history):
+    columns = get_history_columns(long_history, limit=3)
+
+    assert columns["closes"] == [DAYS, DAYS - 1, DAYS - 2]
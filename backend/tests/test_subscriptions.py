@@ -0,0 +1,46 @@
+import pytest
+
+from app.api.stocks.routes import MAX_SUBSCRIBE_TICKERS
+from app.extensions import socketio
+
+
+@pytest.fixture
+def socket(app):
+    client = socketio.test_client(app, namespace="/stocks")
+    client.get_received("/stocks")
+    yield client
+    client.disconnect(namespace="/stocks")
+
+
+def _reply(socket):
+    return [(m["name"], m["args"][0]) for m in socket.get_received("/stocks")]
+
+
+def test_known_symbols_and_the_all_room_can_be_joined(socket):
+    socket.emit("subscribe", {"tickers": ["TCS.NS", "*"]}, namespace="/stocks")
+
+    assert _reply(socket) == [
+        ("subscribed", {"tickers": ["TCS.NS", "*"], "unknown": []})
+    ]
+
+
+def test_another_connections_room_cannot_be_joined(app, socket):
+    other = socketio.test_client(app, namespace="/stocks")
+    other_sid = socketio.server.manager.sid_from_eio_sid(other.eio_sid, "/stocks")
+
+    socket.emit("subscribe", {"tickers": [other_sid, "JUNK", 7]}, namespace="/stocks")
+    socketio.emit("private", {"to": "other"}, to=other_sid, namespace="/stocks")
+
+    assert _reply(socket) == [
+        ("subscribed", {"tickers": [], "unknown": [other_sid[:32], "JUNK"]})
+    ]
+    other.disconnect(namespace="/stocks")
+
+
+def test_long_ticker_lists_are_rejected(socket):
+    tickers = ["TCS.NS"] * (MAX_SUBSCRIBE_TICKERS + 1)
+
+    socket.emit("subscribe", {"tickers": tickers}, namespace="/stocks")
+
+    [(name, _)] = _reply(socket)
+    assert name == "error"
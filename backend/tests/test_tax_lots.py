@@ -0,0 +1,176 @@
+import threading
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import delete
+
+import app.tasks.tax_lots as rebuild_module
+from app.extensions import db
+from app.models import RealizedGain, TaxLot, Transaction, TransactionTypeEnum
+from app.services.tax_lots import LotMethod, consume_lots
+from app.tasks.tax_lots import rebuild_tax_lots
+
+
+def _lots(*lots):
+    """Open lots, oldest first, from (quantity, cost_per_share) pairs."""
+    return [
+        SimpleNamespace(remaining_quantity=Decimal(q), cost_per_share=Decimal(c))
+        for q, c in lots
+    ]
+
+
+def _remaining(lots):
+    return [(lot.remaining_quantity, lot.cost_per_share) for lot in lots]
+
+
+def test_fifo_draws_the_oldest_lots_first():
+    lots = _lots((10, 100), (10, 200))
+
+    assert consume_lots(lots, Decimal(15), LotMethod.FIFO) == 10 * 100 + 5 * 200
+    assert _remaining(lots) == [(0, 100), (5, 200)]
+
+
+def test_lifo_draws_the_newest_lots_first():
+    lots = _lots((10, 100), (10, 200))
+
+    assert consume_lots(lots, Decimal(15), LotMethod.LIFO) == 10 * 200 + 5 * 100
+    assert _remaining(lots) == [(5, 100), (0, 200)]
+
+
+def test_average_charges_the_pooled_cost_and_reprices_what_is_left():
+    lots = _lots((10, 100), (30, 200))
+
+    assert consume_lots(lots, Decimal(20), LotMethod.AVERAGE) == 20 * 175
+    assert _remaining(lots) == [(0, 100), (20, 175)]
+
+
+@pytest.mark.parametrize("method", list(LotMethod))
+def test_selling_more_than_is_held_matches_only_the_open_lots(method):
+    lots = _lots((4, 100), (6, 200))
+
+    assert consume_lots(lots, Decimal(25), method) == 4 * 100 + 6 * 200
+    assert all(lot.remaining_quantity == 0 for lot in lots)
+
+
+def _ledger_state():
+    lots = db.session.execute(
+        db.select(
+            TaxLot.stock_id,
+            TaxLot.opened_at,
+            TaxLot.remaining_quantity,
+            TaxLot.cost_per_share,
+        ).order_by(TaxLot.stock_id, TaxLot.opened_at, TaxLot.lot_id)
+    ).all()
+    gains = db.session.execute(
+        db.select(
+            RealizedGain.stock_id,
+            RealizedGain.quantity_sold,
+            RealizedGain.proceeds,
+            RealizedGain.cost_basis,
+            RealizedGain.unmatched_quantity,
+        ).order_by(RealizedGain.stock_id)
+    ).all()
+    return [tuple(row) for row in lots], [tuple(row) for row in gains]
+
+
+@pytest.mark.parametrize("method", ["FIFO", "LIFO", "AVERAGE"])
+def test_rebuild_matches_incremental_maintenance(
+    app, auth, trade, stocks, set_price, method
+):
+    app.config["TAX_LOT_METHOD"] = method
+    trades = ((100, 10, "BUY"), (200, 10, "BUY"), (300, 15, "SELL"))
+    for price, quantity, side in trades:
+        set_price(stocks[0], price)
+        trade(auth, stocks[0], quantity, side)
+    set_price(stocks[1], 50)
+    trade(auth, stocks[1], 4, "BUY")
+    incremental = _ledger_state()
+
+    result = rebuild_tax_lots(LotMethod[method])
+
+    db.session.expire_all()
+    assert _ledger_state() == incremental
+    assert (result.transactions, result.unmatched_sells) == (4, 0)
+
+
+def test_a_buy_opens_its_lot_at_the_transaction_date(auth, trade, stocks, set_price):
+    set_price(stocks[0], 100)
+    trade(auth, stocks[0], 5, "BUY")
+
+    lot = db.session.scalars(db.select(TaxLot)).one()
+    assert lot.opened_at == db.session.scalar(db.select(Transaction.transaction_date))
+
+
+def test_shares_sold_without_a_lot_are_not_booked_as_gains(
+    client, auth, trade, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    trade(auth, stocks[0], 5, "BUY")
+    # Lots missing for 3 of the 5 shares, as for holdings bought before lots
+    db.session.scalars(db.select(TaxLot)).one().remaining_quantity = 2
+    db.session.commit()
+
+    set_price(stocks[0], 150)
+    trade(auth, stocks[0], 5, "SELL")
+
+    realized = client.get("/portfolio/realized", headers=auth).get_json()
+    [row] = realized["realized"]
+    assert (row["quantity_sold"], row["unmatched_quantity"]) == (2, 3)
+    assert (row["proceeds"], row["cost_basis"], row["realized_pnl"]) == (300, 200, 100)
+    assert realized["totals"]["realized_pnl"] == 100
+
+
+def test_rebuild_reports_sells_beyond_the_ledger(auth, trade, stocks, set_price):
+    set_price(stocks[0], 100)
+    trade(auth, stocks[0], 5, "BUY")
+    trade(auth, stocks[0], 5, "SELL")
+    db.session.execute(
+        delete(Transaction).where(
+            Transaction.transaction_type == TransactionTypeEnum.BUY
+        )
+    )
+    db.session.commit()
+
+    result = rebuild_tax_lots(LotMethod.FIFO)
+
+    assert result.unmatched_sells == 1
+    _, gains = _ledger_state()
+    assert gains == [(1, 0, 0, 0, 5)]
+
+
+class TestRebuildWhileTrading:
+    @pytest.fixture
+    def database_url(self, tmp_path):
+        return f"sqlite:///{tmp_path / 'lots.db'}"
+
+    def test_a_trade_during_a_rebuild_keeps_its_lot(
+        self, app, auth, trade, stocks, set_price, monkeypatch
+    ):
+        set_price(stocks[0], 100)
+        trade(auth, stocks[0], 5, "BUY")
+        trade(auth, stocks[0], 1, "SELL")
+
+        replaying = threading.Event()
+
+        def slow_consume_lots(*args):
+            replaying.set()
+            time.sleep(0.5)
+            return consume_lots(*args)
+
+        monkeypatch.setattr(rebuild_module, "consume_lots", slow_consume_lots)
+
+        def rebuild():
+            with app.app_context():
+                rebuild_tax_lots(LotMethod.FIFO)
+
+        thread = threading.Thread(target=rebuild)
+        thread.start()
+        replaying.wait(5)
+        trade(auth, stocks[0], 7, "BUY")
+        thread.join()
+
+        db.session.expire_all()
+        lots, _ = _ledger_state()
+        assert [quantity for _, _, quantity, _ in lots] == [4, 7]
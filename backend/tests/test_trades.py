@@ -0,0 +1,114 @@
+import threading
+from decimal import Decimal
+
+import pytest
+
+from app.extensions import db
+from app.models import Holding, IdempotencyKey, Portfolio, Transaction
+
+
+def _count_transactions() -> int:
+    return db.session.scalar(db.select(db.func.count(Transaction.transaction_id)))
+
+
+def test_buy_and_sell_move_cash_and_holdings(auth, cash, trade, stocks, set_price):
+    set_price(stocks[0], 250)
+    start = cash(auth)
+
+    assert trade(auth, stocks[0], 4).status_code == 201
+    assert trade(auth, stocks[0], 1, "SELL").status_code == 201
+
+    assert cash(auth) == start - 3 * 250
+    holding = db.session.scalars(db.select(Holding)).one()
+    assert holding.quantity == 3
+
+
+def test_rejected_trade_changes_nothing(auth, cash, trade, stocks, set_price):
+    set_price(stocks[0], 250)
+    start = cash(auth)
+
+    response = trade(auth, stocks[0], 1, "SELL")
+
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Insufficient holdings to sell."
+    assert cash(auth) == start
+    assert _count_transactions() == 0
+
+
+def test_idempotent_retry_replays_the_first_response(
+    auth, cash, trade, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    start = cash(auth)
+
+    first = trade(auth, stocks[0], 2, key="order-1")
+    set_price(stocks[0], 120)
+    retry = trade(auth, stocks[0], 2, key="order-1")
+
+    assert first.status_code == retry.status_code == 201
+    assert retry.get_json() == first.get_json()
+    assert _count_transactions() == 1
+    assert cash(auth) == start - 200
+
+
+def test_idempotency_key_reuse_with_another_body_is_rejected(
+    auth, trade, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    assert trade(auth, stocks[0], 2, key="order-1").status_code == 201
+
+    response = trade(auth, stocks[0], 3, key="order-1")
+
+    assert response.status_code == 422
+    assert _count_transactions() == 1
+
+
+def test_idempotency_keys_are_scoped_to_a_portfolio(
+    make_user, trade, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    alice, bob = make_user("alice"), make_user("bob")
+
+    assert trade(alice, stocks[0], 1, key="same").status_code == 201
+    assert trade(bob, stocks[0], 1, key="same").status_code == 201
+
+    assert db.session.scalar(db.select(db.func.count(IdempotencyKey.id))) == 2
+
+
+def test_failed_trade_does_not_store_its_idempotency_key(
+    auth, trade, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    assert trade(auth, stocks[0], 1, "SELL", key="k").status_code == 400
+
+    assert trade(auth, stocks[0], 1, key="k").status_code == 201
+
+
+class TestConcurrentTrades:
+    @pytest.fixture
+    def database_url(self, tmp_path):
+        # Threads need a shared database; in-memory SQLite is one connection
+        return f"sqlite:///{tmp_path / 'trades.db'}"
+
+    def test_concurrent_buys_never_overdraw(self, app, auth, trade, stocks, set_price):
+        app.config["TRADE_MAX_ATTEMPTS"] = 50
+        set_price(stocks[0], 30000)
+        statuses = []
+
+        def buy():
+            with app.test_client() as client:
+                statuses.append(trade(auth, stocks[0], 1, client=client).status_code)
+
+        threads = [threading.Thread(target=buy) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 100,000 of starting cash covers exactly three buys at 30,000
+        assert sorted(statuses) == [201] * 3 + [400] * 5
+        db.session.expire_all()
+        portfolio = db.session.scalars(db.select(Portfolio)).one()
+        assert portfolio.cash_balance == Decimal("10000")
+        assert db.session.scalars(db.select(Holding)).one().quantity == 3
+        assert _count_transactions() == 3
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from app.extensions import db
+from app.models import Holding, Portfolio, Stock
+
+
+def _summary(client, auth):
+    response = client.get("/portfolio/summary", headers=auth)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_holdings_are_valued_at_the_live_price(client, auth, trade, stocks, set_price):
+    set_price(stocks[0], 100)
+    trade(auth, stocks[0], 4)
+    set_price(stocks[0], 110)
+
+    summary = _summary(client, auth)
+
+    [holding] = summary["holdings"]
+    assert holding["priced"] is True
+    assert (holding["market_value"], holding["unrealized_pnl"]) == (440, 40)
+    assert holding["weight"] == 1
+    assert summary["totals"]["total_value"] == 100000 - 400 + 440
+
+
+def test_an_unpriced_holding_is_left_out_of_the_totals(
+    client, auth, trade, stocks, set_price
+):
+    set_price(stocks[0], 100)
+    trade(auth, stocks[0], 4)
+    set_price(stocks[0], 110)
+    # A stock with no bars and no live quote
+    stock = Stock(symbol="NEW.NS", company_name="New", sector="Test")
+    db.session.add(stock)
+    db.session.flush()
+    db.session.add(
+        Holding(
+            portfolio_id=db.session.scalar(db.select(Portfolio.portfolio_id)),
+            stock_id=stock.stock_id,
+            quantity=Decimal(10),
+            average_cost_per_share=Decimal(50),
+        )
+    )
+    db.session.commit()
+
+    summary = _summary(client, auth)
+
+    unpriced = next(h for h in summary["holdings"] if h["symbol"] == "NEW.NS")
+    assert unpriced["priced"] is False
+    assert unpriced["cost_basis"] == 500
+    assert [unpriced[k] for k in ("market_value", "unrealized_pnl", "weight")] == [
+        None,
+        None,
+        None,
+    ]
+    totals = summary["totals"]
+    assert (totals["market_value"], totals["cost_basis"]) == (440, 400)
+    assert totals["market_value"] - totals["cost_basis"] == totals["unrealized_pnl"]
+    assert totals["unpriced_holdings"] == 1
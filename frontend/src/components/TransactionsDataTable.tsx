@@ -30,6 +30,8 @@ export function TransactionsDataTable<TData, TValue>({
     columns,
     getCoreRowModel: getCoreRowModel(),
     getPaginationRowModel: getPaginationRowModel(),
+    // Keep the current page when more transactions are appended
+    autoResetPageIndex: false,
     initialState: {
       pagination: {
         pageSize: 25,
@@ -38,19 +38,30 @@ export function BuyStocksPage() {
   useEffect(() => {
     const socket = io("ws://localhost:5000/stocks");
 
-    socket.on("price_update", (data: { symbol: string; price: number }) => {
-      setStocks((prevStocks) =>
-        prevStocks.map((stock) =>
-          stock.symbol === data.symbol
-            ? {
-                ...stock,
-                latest_ohlc: { ...stock.latest_ohlc, close: data.price },
-              }
-            : stock
-        )
-      );
+    socket.on("connect", () => {
+      socket.emit("subscribe", { ticker: "*" });
     });
 
+    socket.on(
+      "price_batch",
+      (updates: { symbol: string; price: number }[]) => {
+        const prices = new Map(updates.map((u) => [u.symbol, u.price]));
+        setStocks((prevStocks) =>
+          prevStocks.map((stock) =>
+            prices.has(stock.symbol)
+              ? {
+                  ...stock,
+                  latest_ohlc: {
+                    ...stock.latest_ohlc,
+                    close: prices.get(stock.symbol)!,
+                  },
+                }
+              : stock
+          )
+        );
+      }
+    );
+
     return () => {
       socket.disconnect();
     };
@@ -147,17 +147,22 @@ export default function Dashboard() {
 
     socket.on("connect", () => {
       console.log("WebSocket connected to /stocks namespace");
+      socket.emit("subscribe", { ticker: "*" });
     });
 
-    socket.on("price_update", (update: { symbol: string; price: number }) => {
-      setHoldings((currentHoldings) =>
-        currentHoldings.map((holding) =>
-          holding.symbol === update.symbol
-            ? { ...holding, current_price: update.price }
-            : holding
-        )
-      );
-    });
+    socket.on(
+      "price_batch",
+      (updates: { symbol: string; price: number }[]) => {
+        const prices = new Map(updates.map((u) => [u.symbol, u.price]));
+        setHoldings((currentHoldings) =>
+          currentHoldings.map((holding) =>
+            prices.has(holding.symbol)
+              ? { ...holding, current_price: prices.get(holding.symbol)! }
+              : holding
+          )
+        );
+      }
+    );
 
     socket.on("disconnect", () => console.log("WebSocket disconnected"));
     socket.on("connect_error", (err) =>
@@ -3,45 +3,64 @@
 import React from "react";
 import { AppSidebar } from "@/components/app-sidebar";
 import { SiteHeader } from "@/components/site-header";
+import { Button } from "@/components/ui/button";
 import { SidebarInset, SidebarProvider } from "@/components/ui/sidebar";
 import { TransactionsDataTable } from "@/components/TransactionsDataTable";
 import { columns } from "@/components/transactions-table-columns";
 import { type Transaction } from "@/models/transaction";
 
+const PAGE_SIZE = 100;
+
 export default function TransactionsPage() {
   const [transactions, setTransactions] = React.useState<Transaction[]>([]);
+  const [nextCursor, setNextCursor] = React.useState<string | null>(null);
   const [isLoading, setIsLoading] = React.useState(true);
+  const [isLoadingMore, setIsLoadingMore] = React.useState(false);
 
-  const fetchData = React.useCallback(async () => {
+  // Fetches one page, newest first; pass the previous page's cursor to
+  // append the page after it.
+  const fetchPage = React.useCallback(async (cursor: string | null) => {
     const token = localStorage.getItem("token");
     if (!token) {
       console.error("No auth token found");
-      setIsLoading(false);
       return;
     }
 
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) {
+      params.set("cursor", cursor);
+    }
     try {
-      const res = await fetch("http://localhost:5000/portfolio/transactions", {
-        headers: { Authorization: `Bearer ${token}` },
-        cache: "no-store",
-      });
+      const res = await fetch(
+        `http://localhost:5000/portfolio/transactions?${params}`,
+        {
+          headers: { Authorization: `Bearer ${token}` },
+          cache: "no-store",
+        }
+      );
 
       if (!res.ok) {
         throw new Error("Failed to fetch transactions");
       }
-      const data: Transaction[] = await res.json();
-      console.log(data);
-      setTransactions(data);
+      const data: { transactions: Transaction[]; next_cursor: string | null } =
+        await res.json();
+      setTransactions((previous) =>
+        cursor ? [...previous, ...data.transactions] : data.transactions
+      );
+      setNextCursor(data.next_cursor);
     } catch (error) {
       console.error("Error fetching transactions:", error);
-    } finally {
-      setIsLoading(false);
     }
   }, []);
 
   React.useEffect(() => {
-    fetchData();
-  }, [fetchData]);
+    fetchPage(null).finally(() => setIsLoading(false));
+  }, [fetchPage]);
+
+  const loadMore = React.useCallback(() => {
+    setIsLoadingMore(true);
+    fetchPage(nextCursor).finally(() => setIsLoadingMore(false));
+  }, [fetchPage, nextCursor]);
 
   const style = {
     "--sidebar-width": "calc(var(--spacing) * 72)",
@@ -69,6 +88,17 @@ export default function TransactionsPage() {
                     columns={columns}
                     data={transactions}
                   />
+                  {nextCursor && (
+                    <div className="flex justify-center">
+                      <Button
+                        variant="outline"
+                        onClick={loadMore}
+                        disabled={isLoadingMore}
+                      >
+                        {isLoadingMore ? "Loading..." : "Load more"}
+                      </Button>
+                    </div>
+                  )}
                 </div>
               </div>
             )}